@@ -8,7 +8,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('core/data/materiales.json', 'core/data')],
     # --- INICIO DE LA MODIFICACIÓN ---
     hiddenimports=[
         'core.formulas.calorimetria',
@@ -0,0 +1,70 @@
+# Tiempos de renderizado de formula_latex: canvas de matplotlib (metodo anterior) contra
+# la cache de pixmaps en frio, en caliente desde disco y en caliente desde memoria.
+#
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.latex_render
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+def legacy_render(latex: str):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
+    fig = Figure(figsize=(5, 1), dpi=100)
+    fig.patch.set_facecolor('none')
+    canvas = FigureCanvas(fig)
+    ax = fig.add_subplot(111)
+    ax.text(0.5, 0.5, f"${latex}$", fontsize=20, ha='center', va='center')
+    ax.axis('off')
+    fig.tight_layout(pad=0)
+    canvas.draw()
+    return canvas
+
+def timed_ms(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1e3
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Tiempos de renderizado LaTeX")
+    parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    from core.formula_manager import load_catalog
+    from gui.latex_renderer import LatexRenderCache
+
+    latex_strings = [entry.formula_latex for entry in load_catalog()]
+
+    # Primera llamada fuera de la medicion para no contar la importacion de matplotlib
+    legacy_render(r"x")
+    results = {'canvas (anterior)': [], 'frio': [], 'disco': [], 'memoria': []}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cold_cache = LatexRenderCache(Path(tmp_dir))
+        cold_cache.pixmap(r"x")
+        for latex in latex_strings:
+            results['canvas (anterior)'].append(timed_ms(legacy_render, latex))
+            results['frio'].append(timed_ms(cold_cache.pixmap, latex))
+
+        disk_cache = LatexRenderCache(Path(tmp_dir))
+        for latex in latex_strings:
+            results['disco'].append(timed_ms(disk_cache.pixmap, latex))
+        for latex in latex_strings:
+            results['memoria'].append(timed_ms(disk_cache.pixmap, latex))
+
+    print(f"{len(latex_strings)} formulas")
+    print(f"{'modo':>18} {'media (ms)':>11} {'max (ms)':>10}")
+    for mode, times in results.items():
+        print(f"{mode:>18} {statistics.mean(times):>11.3f} {max(times):>10.3f}")
+    del app
+
+if __name__ == '__main__':
+    main()
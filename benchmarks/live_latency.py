@@ -0,0 +1,83 @@
+# Latencia entre la ultima edicion y el resultado mostrado en modo de calculo automatico.
+# Cada prueba simula una rafaga de pulsaciones; gracias al debounce solo se calcula el ultimo estado.
+#
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.live_latency --trials 50
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+def wait(app, milliseconds: float):
+    deadline = time.perf_counter() + milliseconds / 1e3
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.0005)
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Latencia del modo de cálculo automático")
+    parser.add_argument('--formula', default="Ley de los Gases Ideales")
+    parser.add_argument('--trials', type=int, default=30)
+    parser.add_argument('--keystrokes', type=int, default=4, help="Pulsaciones por ráfaga")
+    parser.add_argument('--gap-ms', type=float, default=40, help="Tiempo entre pulsaciones")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    # Los calculos de la prueba no se guardan en el historial del usuario
+    os.environ.setdefault('CALCULADORA_DATA_DIR', 'off')
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    from core.formula_manager import load_catalog
+    from gui.widgets.formula_view import FormulaView, LIVE_DEBOUNCE_MS
+
+    entry = next(entry for entry in load_catalog() if entry.name == args.formula)
+    view = FormulaView(entry.create())
+    view.show()
+
+    for value_edit, _ in view.input_widgets.values():
+        value_edit.setText("2")
+    view.live_checkbox.setChecked(True)
+    wait(app, LIVE_DEBOUNCE_MS * 2)
+    while view.calc_task is not None:
+        app.processEvents()
+
+    updates = []
+    view.result_output.textChanged.connect(lambda: updates.append(time.perf_counter()))
+    first_edit, _ = next(iter(view.input_widgets.values()))
+
+    latencies, evaluations = [], []
+    for trial in range(args.trials):
+        updates.clear()
+        base = str(trial + 3)
+        for keystroke in range(args.keystrokes):
+            first_edit.setText(base + "1" * keystroke)
+            last_edit = time.perf_counter()
+            wait(app, args.gap_ms)
+
+        deadline = last_edit + 5
+        while (not updates or view.calc_task is not None) and time.perf_counter() < deadline:
+            app.processEvents()
+            time.sleep(0.0002)
+        if not updates:
+            raise RuntimeError("No llegó ningún resultado")
+        latencies.append((updates[-1] - last_edit) * 1e3)
+        evaluations.append(len(updates))
+
+    from gui.workers import calculation_pool
+    view.cancel_tasks()
+    calculation_pool().waitForDone()
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+
+    latencies.sort()
+    print(f"{args.formula}: {args.trials} ráfagas de {args.keystrokes} pulsaciones cada {args.gap_ms:.0f} ms "
+          f"(debounce {LIVE_DEBOUNCE_MS} ms)")
+    print(f"latencia media {statistics.mean(latencies):.1f} ms, p50 {latencies[len(latencies) // 2]:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms")
+    print(f"resultados mostrados por ráfaga: {statistics.mean(evaluations):.2f}")
+
+if __name__ == '__main__':
+    main()
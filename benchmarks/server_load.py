@@ -0,0 +1,133 @@
+# Prueba de carga del servicio HTTP/JSON (core/server.py): varias conexiones keep-alive, cada una
+# con un numero fijo de peticiones en vuelo (pipelining). Informa de latencias p50/p99 y de
+# peticiones por segundo. Sin --address arranca el servidor en un subproceso con un puerto libre.
+#
+#   python -m benchmarks.server_load --connections 16 --pipeline 8 --requests 20000
+#   python -m benchmarks.server_load --address 127.0.0.1:8765
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def start_server(extra_args: List[str]) -> Tuple[subprocess.Popen, str, int]:
+    process = subprocess.Popen([sys.executable, 'main.py', 'serve', '--port', '0'] + extra_args,
+                               cwd=ROOT, stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if not line.startswith("Escuchando en http://"):
+        process.kill()
+        raise RuntimeError(f"El servidor no arrancó: {line.strip() or process.stderr.read()}")
+    host, port = line.strip().rsplit('/', 1)[1].rsplit(':', 1)
+    return process, host, int(port)
+
+def request_bytes(path: str, payload=None) -> bytes:
+    if payload is None:
+        return f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('ascii')
+    body = json.dumps(payload).encode('utf-8')
+    return (f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode('ascii') + body
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    status = int(lines[0].split(' ')[1])
+    length = next(int(line.split(':', 1)[1]) for line in lines if line.lower().startswith('content-length:'))
+    return status, await reader.readexactly(length)
+
+async def fetch(host: str, port: int, path: str, payload=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(request_bytes(path, payload))
+    _, body = await read_response(reader)
+    writer.close()
+    return json.loads(body)
+
+async def connection(host: str, port: int, requests: List[bytes], pipeline: int, latencies: List[float],
+                     errors: List[int]):
+    reader, writer = await asyncio.open_connection(host, port)
+    window = asyncio.Semaphore(pipeline)
+    sent = deque()
+
+    async def send():
+        for request in requests:
+            await window.acquire()
+            sent.append(time.perf_counter())
+            writer.write(request)
+            await writer.drain()
+
+    async def receive():
+        for _ in requests:
+            status, body = await read_response(reader)
+            latencies.append(time.perf_counter() - sent.popleft())
+            window.release()
+            if status != 200 or json.loads(body).get('error'):
+                errors[0] += 1
+
+    await asyncio.gather(send(), receive())
+    writer.close()
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run(args, host: str, port: int):
+    catalog = await fetch(host, port, '/formulas')
+    entry = next((item for item in catalog if item['name'] == args.formula), None) if args.formula else catalog[0]
+    if entry is None:
+        raise SystemExit(f"Fórmula desconocida: {args.formula!r}")
+
+    rng = random.Random(0)
+    per_connection = args.requests // args.connections
+    workloads = [[request_bytes('/solve', {'formula': entry['name'],
+                                           'inputs': {var[0]: rng.uniform(1.0, 10.0) for var in entry['variables']}})
+                  for _ in range(per_connection)] for _ in range(args.connections)]
+
+    latencies: List[float] = []
+    errors = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(connection(host, port, requests, args.pipeline, latencies, errors)
+                           for requests in workloads))
+    elapsed = time.perf_counter() - start
+    stats = await fetch(host, port, '/stats')
+
+    latencies.sort()
+    print(f"{entry['name']}: {len(latencies)} peticiones, {args.connections} conexiones, "
+          f"{args.pipeline} en vuelo por conexión")
+    print(f"  rendimiento: {len(latencies) / elapsed:.0f} peticiones/s ({elapsed:.2f} s, {errors[0]} errores)")
+    print(f"  latencia:    p50 {percentile(latencies, 0.50) * 1e3:.2f} ms, p99 {percentile(latencies, 0.99) * 1e3:.2f} ms, "
+          f"media {statistics.mean(latencies) * 1e3:.2f} ms")
+    print(f"  micro-lotes: {stats['batches']} ({stats['rows_per_batch']:.1f} filas de media)")
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de fórmulas")
+    parser.add_argument('--address', help="host:puerto de un servidor ya en marcha")
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--pipeline', type=int, default=8, help="Peticiones en vuelo por conexión")
+    parser.add_argument('--requests', type=int, default=20000, help="Peticiones en total")
+    parser.add_argument('--formula', help="Nombre de la fórmula (por defecto la primera del catálogo)")
+    parser.add_argument('--max-batch', type=int, help="Filas por micro-lote del servidor arrancado aquí")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.address:
+        host, port = args.address.rsplit(':', 1)
+    else:
+        extra = []
+        if args.max_batch:
+            extra += ['--max-batch', str(args.max_batch)]
+        process, host, port = start_server(extra)
+    try:
+        asyncio.run(run(args, host, int(port)))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == '__main__':
+    main()
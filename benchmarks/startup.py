@@ -0,0 +1,83 @@
+# Tiempo de importacion por modulo al arrancar la aplicacion (estilo python -X importtime)
+# y tiempo hasta la primera ventana.
+#
+#   python -m benchmarks.startup --top 20 --forbid pint matplotlib numpy
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+WINDOW_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from gui.main_window import MainWindow
+window = MainWindow()
+window.show()
+app.processEvents()
+print(time.perf_counter() - start)
+"""
+
+def parse_importtime(stderr: str) -> Dict[str, dict]:
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        modules[name.strip()] = {'self_us': int(self_us), 'cumulative_us': int(cumulative_us)}
+    return modules
+
+def measure_imports(module: str = 'main') -> Dict[str, dict]:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        check=True, capture_output=True, text=True,
+    )
+    return parse_importtime(result.stderr)
+
+def measure_first_window(extra_env: Dict[str, str] = None) -> float:
+    env = dict(os.environ, **(extra_env or {}))
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    result = subprocess.run([sys.executable, '-c', WINDOW_SNIPPET],
+                            check=True, capture_output=True, text=True, env=env)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de importacion por modulo al arrancar")
+    parser.add_argument('--module', default='main', help="Modulo a importar (por defecto main)")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--forbid', nargs='*', default=[],
+                        help="Paquetes que no deben importarse al arrancar (falla si aparecen)")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    parser.add_argument('--no-window', action='store_true', help="No medir el tiempo hasta la primera ventana")
+    args = parser.parse_args(argv)
+
+    # Una primera ejecucion llena las caches de usuario (manifiesto, pint, LaTeX)
+    measure_imports(args.module)
+    modules = measure_imports(args.module)
+    total_us = sum(info['self_us'] for info in modules.values())
+    first_window = None if args.no_window else measure_first_window()
+
+    forbidden = sorted(name for name in modules
+                       if any(name == package or name.startswith(package + '.') for package in args.forbid))
+
+    if args.json:
+        print(json.dumps({'total_us': total_us, 'first_window_s': first_window,
+                          'modules': modules, 'forbidden': forbidden}))
+    else:
+        print(f"Importacion total de '{args.module}': {total_us / 1e3:.1f} ms")
+        if first_window is not None:
+            print(f"Tiempo hasta la primera ventana: {first_window * 1e3:.1f} ms")
+        print(f"{'acumulado (ms)':>15} {'propio (ms)':>12}  modulo")
+        ranked = sorted(modules.items(), key=lambda item: item[1]['cumulative_us'], reverse=True)
+        for name, info in ranked[:args.top]:
+            print(f"{info['cumulative_us'] / 1e3:>15.1f} {info['self_us'] / 1e3:>12.1f}  {name}")
+        for name in forbidden:
+            print(f"Importado al arrancar: {name}", file=sys.stderr)
+
+    return 1 if forbidden else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# Suite de benchmarks con linea base en JSON. Cada metrica es la mediana del tiempo por llamada
+# (en segundos) entre varias repeticiones. Se compara con benchmarks/baseline.json y la ejecucion
+# falla si alguna metrica supera su umbral (cociente actual / linea base).
+#
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.suite                     # compara con la linea base
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.suite --update-baseline   # graba una nueva linea base
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.suite --only solve load
+#
+# La linea base depende de la maquina, asi que no se versiona: la primera ejecucion la graba en local
+# y se vuelve a grabar con --update-baseline (antes de un cambio) al cambiar de equipo.
+# Los umbrales por grupo cubren el ruido habitual de cada uno y se pueden ajustar en el propio JSON
+# por metrica ("view.LeyDeBoyle") o por grupo ("view").
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+# Holgura frente al ruido entre ejecuciones en la misma maquina; los arranques (procesos nuevos) varian mas
+DEFAULT_THRESHOLDS = {'default': 2.0, 'startup': 2.5}
+DEFAULT_REPEAT = 9
+GROUPS = ('solve', 'load', 'view', 'latex', 'startup')
+
+# Iteraciones fijas para los widgets: cada vista crea cientos de objetos Qt y con autorange
+# una sola metrica puede construir miles de ellas
+VIEW_ITERATIONS = 20
+LATEX_ITERATIONS = 100
+
+def per_call(function: Callable[[], object], repeat: int, number: int = None) -> float:
+    timer = timeit.Timer(function)
+    if number is None:
+        number, _ = timer.autorange()
+    return statistics.median(timer.repeat(repeat, number)) / number
+
+def process_deletions():
+    from PySide6.QtCore import QCoreApplication, QEvent
+
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+Measurement = Callable[[], float]
+
+def bench_solve(repeat: int) -> Dict[str, Measurement]:
+    from core.formula_manager import load_catalog
+    from core.unit_handler import Q_
+
+    def measure(formula, cached: bool = False) -> Measurement:
+        inputs = {var_name: Q_(2.0, unit) for var_name, _, unit in formula.variables}
+
+        def run():
+            # Sin cache se mide el calculo completo; con cache, el coste de un acierto
+            formula.cache_results = cached
+            try:
+                formula.solve(inputs)
+                return per_call(lambda: formula.solve(inputs), repeat)
+            finally:
+                del formula.cache_results
+        return run
+
+    catalog = load_catalog()
+    measurements = {f"solve.{entry.class_name}": measure(entry.create()) for entry in catalog}
+    measurements['solve.cache_hit'] = measure(catalog[0].create(), cached=True)
+    return measurements
+
+def bench_load(repeat: int) -> Dict[str, Measurement]:
+    from core.formula_manager import load_catalog, load_formulas
+
+    load_formulas()
+    return {
+        'load.load_formulas': lambda: per_call(load_formulas, repeat),
+        'load.load_catalog_uncached': lambda: per_call(lambda: load_catalog(use_cache=False), repeat),
+    }
+
+def bench_view(repeat: int) -> Dict[str, Measurement]:
+    from core.formula_manager import load_catalog
+    from gui.widgets.formula_view import FormulaView
+
+    def measure(entry) -> Measurement:
+        formula, consistency = entry.create(), entry.consistency
+
+        def build():
+            FormulaView(formula, consistency).deleteLater()
+
+        def run():
+            build()
+            try:
+                return per_call(build, repeat, VIEW_ITERATIONS)
+            finally:
+                process_deletions()
+        return run
+
+    return {f"view.{entry.class_name}": measure(entry) for entry in load_catalog()}
+
+def bench_latex(repeat: int) -> Dict[str, Measurement]:
+    from core.formula_manager import load_catalog
+    from gui.latex_renderer import get_latex_cache, render_latex_image
+    from gui.widgets.formula_view import FormulaView
+
+    entry = load_catalog()[0]
+    view = FormulaView(entry.create(), entry.consistency)
+    cache = get_latex_cache()
+    render_latex_image(entry.formula_latex)
+
+    def add_display():
+        view.add_latex_display()
+        view.layout.takeAt(view.layout.count() - 1).widget().deleteLater()
+
+    def add_display_from_disk():
+        cache.clear_memory()
+        add_display()
+
+    def measure(function) -> Measurement:
+        def run():
+            try:
+                return per_call(function, repeat, LATEX_ITERATIONS)
+            finally:
+                process_deletions()
+        return run
+
+    return {
+        'latex.add_latex_display': measure(add_display),
+        'latex.add_latex_display_disk': measure(add_display_from_disk),
+        'latex.render': measure(lambda: render_latex_image(entry.formula_latex)),
+    }
+
+def bench_startup(repeat: int) -> Dict[str, Measurement]:
+    # Procesos nuevos: con las caches de usuario llenas y sin ninguna cache
+    from benchmarks.startup import measure_first_window
+
+    measure_first_window()
+    return {
+        'startup.first_window': lambda: statistics.median(measure_first_window() for _ in range(repeat)),
+        'startup.first_window_no_cache': lambda: statistics.median(
+            measure_first_window({'CALCULADORA_CACHE_DIR': 'off'}) for _ in range(repeat)),
+    }
+
+BENCHMARKS = {
+    'solve': bench_solve,
+    'load': bench_load,
+    'view': bench_view,
+    'latex': bench_latex,
+    'startup': bench_startup,
+}
+
+def threshold_for(metric: str, thresholds: Dict[str, float]) -> float:
+    if metric in thresholds:
+        return thresholds[metric]
+    return thresholds.get(metric.split('.', 1)[0], thresholds['default'])
+
+def read_baseline(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def compare(results: Dict[str, float], baseline: dict) -> List[dict]:
+    thresholds = dict(DEFAULT_THRESHOLDS, **baseline.get('thresholds', {}))
+    reference = baseline.get('metrics', {})
+    rows = []
+    for metric, value in results.items():
+        base = reference.get(metric)
+        limit = threshold_for(metric, thresholds)
+        ratio = value / base if base else None
+        rows.append({'metric': metric, 'value': value, 'baseline': base, 'ratio': ratio, 'threshold': limit,
+                     'regression': ratio is not None and ratio > limit})
+    return rows
+
+def format_seconds(value: float) -> str:
+    if value is None:
+        return '-'
+    if value < 1e-3:
+        return f"{value * 1e6:.1f} µs"
+    if value < 1:
+        return f"{value * 1e3:.2f} ms"
+    return f"{value:.2f} s"
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks con comparacion contra una linea base")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', '--save', dest='save', action='store_true',
+                        help="Graba los resultados como nueva linea base")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    if {'view', 'latex'} & set(args.only):
+        from PySide6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv)
+
+    measurements: Dict[str, Measurement] = {}
+    for group in args.only:
+        measurements.update(BENCHMARKS[group](args.repeat))
+    results = {metric: measure() for metric, measure in measurements.items()}
+
+    baseline = read_baseline(args.baseline)
+    if not baseline.get('metrics'):
+        # Sin linea base en esta maquina no hay nada con que comparar: se graba la actual
+        args.save = True
+    if not args.save:
+        # Una regresion aparente se vuelve a medir antes de darla por buena (ruido de la maquina)
+        for row in compare(results, baseline):
+            if row['regression']:
+                results[row['metric']] = min(results[row['metric']], measurements[row['metric']]())
+    if args.save:
+        metrics = dict(baseline.get('metrics', {}), **results)
+        payload = {
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'thresholds': baseline.get('thresholds', {}),
+            'metrics': dict(sorted(metrics.items())),
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+
+    rows = compare(results, baseline)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'metrica':<42} {'base':>10} {'actual':>10} {'cociente':>9}")
+        for row in rows:
+            ratio = '-' if row['ratio'] is None else f"{row['ratio']:.2f}"
+            flag = f"  REGRESION (> {row['threshold']:.2f})" if row['regression'] else ''
+            print(f"{row['metric']:<42} {format_seconds(row['baseline']):>10} "
+                  f"{format_seconds(row['value']):>10} {ratio:>9}{flag}")
+        if args.save:
+            print(f"Linea base guardada en {args.baseline}")
+
+    return 1 if any(row['regression'] for row in rows) and not args.save else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# Rendimiento del solver termico: equilibrio de muchos sistemas a la vez (con cambios de fase) y
+# pasos por segundo del transitorio, en cuerpos por segundo.
+#
+#   python -m benchmarks.thermal --systems 10000 --bodies 20 --steps 200
+import argparse
+import time
+from typing import List
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Rendimiento del equilibrio térmico y del transitorio")
+    parser.add_argument('--systems', type=int, default=10_000)
+    parser.add_argument('--bodies', type=int, default=20)
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+
+    from core.thermal import ThermalSystem, simulate
+
+    # Agua entre -20 °C y 120 °C: hay cuerpos en las tres fases y mesetas de fusion y ebullicion
+    rng = np.random.default_rng(0)
+    shape = (args.systems, args.bodies)
+    start = time.perf_counter()
+    system = ThermalSystem(rng.uniform(0.1, 2.0, shape), rng.uniform(253.15, 393.15, shape), 4182.0,
+                           solid_specific_heat=2050.0, gas_specific_heat=2080.0, melting_point=273.15,
+                           latent_fusion=333.55e3, boiling_point=373.15, latent_vaporization=2256.4e3)
+    setup = time.perf_counter() - start
+    bodies = args.systems * args.bodies
+    print(f"{args.systems:,} sistemas de {args.bodies} cuerpos ({bodies:,} cuerpos), preparación {setup * 1e3:.0f} ms")
+
+    start = time.perf_counter()
+    result = system.equilibrium()
+    seconds = time.perf_counter() - start
+    error = np.abs(result.heat.sum(axis=1)).max()
+    print(f"equilibrio:  {seconds * 1e3:8.1f} ms  {bodies / seconds / 1e6:6.2f} M cuerpos/s  "
+          f"(balance de energía peor: {error:.1e} J)")
+
+    pairs = [(index, index + 1) for index in range(args.bodies - 1)]
+    start = time.perf_counter()
+    snapshots = sum(1 for _ in simulate(system, pairs, 5.0, duration=args.steps, dt=1.0, every=args.steps // 4 or 1))
+    seconds = time.perf_counter() - start
+    print(f"transitorio: {seconds / args.steps * 1e3:8.2f} ms/paso  {bodies * args.steps / seconds / 1e6:6.2f} "
+          f"M cuerpos·paso/s  ({snapshots} instantáneas)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# Rendimiento de la propagacion de incertidumbres: muestras por segundo del modo Monte Carlo
+# (1 proceso y varios) y tiempo por llamada del modo linealizado, para cada formula.
+#
+#   python -m benchmarks.uncertainty --samples 2000000 --workers 4
+import argparse
+import os
+import time
+from typing import List
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Rendimiento de la propagación de incertidumbres")
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    from core.formula_manager import load_catalog
+    from core.uncertainty import Measurement, UncertaintyPropagator
+
+    print(f"{args.samples:,} muestras en bloques de {args.chunk_size:,}")
+    print(f"{'formula':>26} {'lineal (us)':>12} {'MC 1 proc. (M/s)':>17} {f'MC {args.workers} proc. (M/s)':>17}")
+    for entry in load_catalog():
+        formula = entry.create()
+        inputs = {var[0]: Measurement(2.0 + index, 0.01 * (2.0 + index))
+                  for index, var in enumerate(formula.variables)}
+        propagator = UncertaintyPropagator(formula)
+
+        # Primera llamada fuera de la medicion: carga de sympy/NumPy y de la cache de derivadas
+        propagator.linearized(inputs)
+        calls = 1000
+        start = time.perf_counter()
+        for _ in range(calls):
+            propagator.linearized(inputs)
+        linear_us = (time.perf_counter() - start) / calls * 1e6
+
+        rates = []
+        for workers in (1, args.workers):
+            result = propagator.monte_carlo(inputs, args.samples, args.chunk_size, workers, seed=0)
+            rates.append(result.samples_per_second / 1e6)
+        print(f"{entry.name[:26]:>26} {linear_us:>12.1f} {rates[0]:>17.1f} {rates[1]:>17.1f}")
+
+if __name__ == '__main__':
+    main()
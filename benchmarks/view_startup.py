@@ -0,0 +1,101 @@
+# Compara el arranque de MainWindow construyendo todas las vistas de una vez (como se
+# hacia antes) contra la construccion bajo demanda con LRU.
+#
+#   QT_QPA_PLATFORM=offscreen python -m benchmarks.view_startup --sizes 500
+import argparse
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import List
+
+def resident_memory_mb() -> float:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 2**20 if sys.platform == 'darwin' else usage / 2**10
+
+def synthetic_catalog(size: int):
+    from core.formula_manager import FormulaEntry, load_catalog
+
+    @dataclasses.dataclass(frozen=True)
+    class SyntheticEntry(FormulaEntry):
+        # Cada copia necesita su propia clave: la ventana identifica las formulas por clave
+        copy: int = 0
+
+        @property
+        def key(self):
+            return (self.module, f"{self.class_name}#{self.copy}")
+
+    base = load_catalog()
+    if size <= len(base):
+        return base[:size]
+    copies = []
+    for i in range(size):
+        entry = base[i % len(base)]
+        fields = {field.name: getattr(entry, field.name) for field in dataclasses.fields(entry)}
+        copies.append(SyntheticEntry(**dict(fields, name=f"{entry.name} #{i}"), copy=i))
+    return copies
+
+def run_child(mode: str, size: int) -> dict:
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    rss_before = resident_memory_mb()
+    start = time.perf_counter()
+
+    from gui.main_window import MainWindow
+    from gui.widgets.formula_view import FormulaView
+
+    window = MainWindow(synthetic_catalog(size))
+    if mode == 'eager':
+        for key in sorted(window.formulas):
+            entry = window.formulas[key]
+            formula_view = FormulaView(entry.create(), entry.consistency)
+            window.stacked_widget.addWidget(formula_view)
+            formula_view.show_unit_warnings()
+    window.show()
+    app.processEvents()
+
+    return {
+        'mode': mode,
+        'size': size,
+        'startup_s': time.perf_counter() - start,
+        'rss_mb': resident_memory_mb() - rss_before,
+        'live_views': window.stacked_widget.count(),
+    }
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Tiempo de arranque y memoria de MainWindow")
+    parser.add_argument('--sizes', type=int, nargs='+', default=None)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'SIZE'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    if args.child:
+        print(json.dumps(run_child(args.child[0], int(args.child[1]))))
+        return
+
+    if args.sizes is None:
+        from core.formula_manager import load_catalog
+        args.sizes = [len(load_catalog()), 500]
+
+    print(f"{'formulas':>9} {'modo':>6} {'arranque (s)':>13} {'RSS (MB)':>10} {'vistas':>7}")
+    for size in args.sizes:
+        for mode in ('eager', 'lazy'):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.view_startup', '--child', mode, str(size)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['size']:>9} {result['mode']:>6} {result['startup_s']:>13.3f} "
+                  f"{result['rss_mb']:>10.1f} {result['live_views']:>7}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+import csv
+import io
+import json
+import math
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .materials import DEFAULT_TEMPERATURE, PROPERTIES, material_database, property_for_variable
+
+# Motor por lotes sin interfaz grafica. Las filas se leen en streaming desde CSV o JSONL, se
+# agrupan en bloques acotados y cada bloque se evalua vectorizado con los kernels compilados,
+# opcionalmente en un pool de procesos. Los resultados se escriben en el orden de entrada.
+#
+# CSV:   formula,<variable>,<variable>_unit,...,target_unit,unknown
+# JSONL: {"formula": ..., "inputs": {...}, "units": {...}, "target_unit": ..., "unknown": ...}
+#
+# Las propiedades de material (calor_especifico, coeficiente_dilatacion...) aceptan el nombre de un
+# material de core.materials en lugar de un numero; se interpolan a 'temperatura_material' (por
+# defecto 20 °C, con su columna de unidad como cualquier otra entrada).
+
+DEFAULT_CHUNK_SIZE = 10000
+UNIT_SUFFIX = '_unit'
+# Formato de salida interno: bloques en columnas para core.result_store
+STORE_FORMAT = 'store'
+MATERIAL_TEMPERATURE = 'temperatura_material'
+
+Row = Dict[str, Any]
+RowResult = Tuple[Optional[float], Optional[str], Optional[str]]
+
+_catalog = None
+
+def _formula_index():
+    global _catalog
+    if _catalog is None:
+        from .formula_manager import load_catalog
+        _catalog = {entry.name: entry for entry in load_catalog()}
+    return _catalog
+
+RESERVED_COLUMNS = ('formula', 'target_unit', 'unknown')
+
+def _csv_layout(header: List[str]) -> tuple:
+    # Posiciones de cada tipo de columna, calculadas una sola vez por cabecera
+    positions = {name: header.index(name) if name in header else None for name in RESERVED_COLUMNS}
+    inputs = [(index, name) for index, name in enumerate(header)
+              if name not in RESERVED_COLUMNS and not name.endswith(UNIT_SUFFIX)]
+    units = [(index, name[:-len(UNIT_SUFFIX)]) for index, name in enumerate(header) if name.endswith(UNIT_SUFFIX)]
+    return positions['formula'], positions['target_unit'], positions['unknown'], inputs, units
+
+def _csv_row(layout: tuple, record: List[str]) -> Row:
+    formula_index, target_index, unknown_index, input_columns, unit_columns = layout
+    size = len(record)
+
+    def field(index):
+        return record[index] or None if index is not None and index < size else None
+
+    return {
+        'formula': field(formula_index),
+        'inputs': {name: record[index] for index, name in input_columns if index < size and record[index]},
+        'units': {name: record[index] for index, name in unit_columns if index < size and record[index]},
+        'target_unit': field(target_index),
+        'unknown': field(unknown_index),
+    }
+
+def _jsonl_row(line: str) -> Row:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {'error': f"JSON inválido: {e}"}
+    if not isinstance(record, dict):
+        return {'error': "Cada línea debe ser un objeto JSON."}
+    return record_row(record)
+
+def record_row(record: Dict[str, Any]) -> Row:
+    # Fila a partir de un objeto ya decodificado (JSONL, servidor). Un objeto mal formado da una
+    # fila con 'error' en lugar de fallar mas tarde junto al resto del bloque
+    error = record_error(record)
+    if error is not None:
+        formula = record.get('formula')
+        return {'formula': formula if isinstance(formula, str) else None, 'error': error}
+    return {'formula': record.get('formula'), 'inputs': record.get('inputs') or {},
+            'units': record.get('units') or {}, 'target_unit': record.get('target_unit'),
+            'unknown': record.get('unknown')}
+
+def record_error(record: Dict[str, Any]) -> Optional[str]:
+    for name in RESERVED_COLUMNS:
+        if not isinstance(record.get(name), (str, type(None))):
+            return f"'{name}' debe ser un texto."
+    inputs, units = record.get('inputs'), record.get('units')
+    if not isinstance(inputs, (dict, type(None))):
+        return "'inputs' debe ser un objeto JSON."
+    if not isinstance(units, (dict, type(None))):
+        return "'units' debe ser un objeto JSON."
+    for name, value in (inputs or {}).items():
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return f"El valor de '{name}' debe ser un número o un texto."
+    for name, unit in (units or {}).items():
+        if not isinstance(unit, (str, type(None))):
+            return f"La unidad de '{name}' debe ser un texto."
+    return None
+
+def _parse_records(file_format: str, header: Optional[List[str]], records: Iterable[Any]) -> Iterator[Row]:
+    if file_format == 'csv':
+        layout = _csv_layout(header)
+        return (_csv_row(layout, record) for record in records)
+    return (_jsonl_row(record) for record in records)
+
+def read_records(stream: TextIO, file_format: str) -> Tuple[Optional[List[str]], Iterator[Any]]:
+    # Registros sin interpretar: el analisis de cada fila se hace dentro de los procesos del pool
+    if file_format == 'csv':
+        reader = csv.reader(stream)
+        return next(reader, []), reader
+    if file_format == 'jsonl':
+        return None, (line for line in stream if line.strip())
+    raise ValueError(f"Formato no soportado: {file_format}")
+
+def read_rows(stream: TextIO, file_format: str) -> Iterator[Row]:
+    header, records = read_records(stream, file_format)
+    yield from _parse_records(file_format, header, records)
+
+class _Material:
+    # Referencia a un material en una celda; se resuelve por columna en _evaluate_group
+    __slots__ = ('material_id',)
+
+    def __init__(self, material_id: int):
+        self.material_id = material_id
+
+def _input_value(value: Any, var_name: str, references: Dict[Tuple[str, str], '_Material']) -> Any:
+    # 'references' guarda los materiales ya resueltos en el bloque: los nombres se repiten mucho
+    if not isinstance(value, str):
+        return float(value)
+    try:
+        return float(value.replace(',', '.'))
+    except ValueError:
+        pass
+    reference = references.get((value, var_name))
+    if reference is None:
+        reference = references[(value, var_name)] = _material_reference(value, var_name)
+    return reference
+
+def _material_reference(value: str, var_name: str) -> '_Material':
+    property_name = property_for_variable(var_name)
+    if property_name is None:
+        raise ValueError(f"'{value}' no es un número válido para '{var_name.replace('_', ' ')}'.")
+    database = material_database()
+    material_id = database.material_id(value)
+    if not database.has_property(material_id, property_name):
+        raise ValueError(f"'{database.names[material_id]}' no tiene {PROPERTIES[property_name][1].lower()}.")
+    return _Material(material_id)
+
+def _material_temperature(row: Row, conversions: Dict[str, Tuple[float, float]]) -> float:
+    # Temperatura de interpolacion de la fila, en K
+    value = row['inputs'].get(MATERIAL_TEMPERATURE)
+    if value is None or value == '':
+        return DEFAULT_TEMPERATURE
+    unit = row['units'].get(MATERIAL_TEMPERATURE) or 'kelvin'
+    conversion = conversions.get(unit)
+    if conversion is None:
+        from .kernels import si_conversion
+        conversion = conversions[unit] = si_conversion(unit)
+    scale, offset = conversion
+    return (float(value.replace(',', '.')) if isinstance(value, str) else float(value)) * scale + offset
+
+def _resolve_materials(column: List[Any], temperatures: List[float], var_name: str, unit: str):
+    # Una interpolacion vectorizada por material para toda la columna del grupo
+    import numpy as np
+
+    positions = [index for index, value in enumerate(column) if isinstance(value, _Material)]
+    array = np.array([np.nan if isinstance(value, _Material) else value for value in column], dtype=float)
+    ids = np.array([column[index].material_id for index in positions], dtype=np.int64)
+    kelvin = np.array([temperatures[index] for index in positions], dtype=float)
+    array[positions] = material_database().values(ids, property_for_variable(var_name), kelvin, unit=unit)
+    return array
+
+def _evaluate_group(entry, unknown: Optional[str], units: Tuple[str, ...], target_unit: Optional[str],
+                    columns: List[List[Any]], temperatures: Optional[List[float]] = None,
+                    material_columns: Iterable[int] = ()) -> List[RowResult]:
+    import numpy as np
+
+    from .kernels import compile_formula
+
+    kernel = compile_formula(entry.create(), units, target_unit, unknown)
+    if material_columns:
+        names = kernel.var_names
+        columns = list(columns)
+        for index in material_columns:
+            columns[index] = _resolve_materials(columns[index], temperatures, names[index], units[index])
+    with np.errstate(all='ignore'):
+        results = kernel(*(np.asarray(column, dtype=float) for column in columns))
+    results = np.broadcast_to(results, (len(columns[0]),))
+    return [(float(value), kernel.target_unit, None) if math.isfinite(value)
+            else (None, kernel.target_unit, "Resultado no finito.")
+            for value in results.tolist()]
+
+def evaluate_chunk(rows: List[Row]) -> List[RowResult]:
+    catalog = _formula_index()
+    results: List[Optional[RowResult]] = [None] * len(rows)
+    groups: Dict[tuple, Tuple[Any, List[int], List[List[Any]], List[float], set]] = {}
+    layouts: Dict[Tuple[str, str], list] = {}
+    references: Dict[Tuple[str, str], _Material] = {}
+    conversions: Dict[str, Tuple[float, float]] = {}
+
+    for position, row in enumerate(rows):
+        if row.get('error'):
+            results[position] = (None, None, row['error'])
+            continue
+        try:
+            entry = catalog.get(row.get('formula'))
+            if entry is None:
+                raise KeyError(f"Fórmula desconocida: {row.get('formula')!r}")
+
+            unknown = row.get('unknown') or entry.target_variable[0]
+            inputs = row['inputs']
+            definitions = layouts.get((entry.name, unknown))
+            if definitions is None:
+                definitions = [var for var in list(entry.variables) + [entry.target_variable] if var[0] != unknown]
+                if len(definitions) == len(entry.variables) + 1:
+                    raise KeyError(f"'{unknown}' no es una variable de '{entry.name}'.")
+                layouts[(entry.name, unknown)] = definitions
+
+            values = []
+            for var_name, _, _ in definitions:
+                if var_name not in inputs:
+                    raise ValueError(f"El campo '{var_name.replace('_', ' ')}' no puede estar vacío.")
+                values.append(_input_value(inputs[var_name], var_name, references))
+            units = tuple(row['units'].get(var_name) or default_unit for var_name, _, default_unit in definitions)
+            materials = [index for index, value in enumerate(values) if isinstance(value, _Material)]
+            temperature = _material_temperature(row, conversions) if materials else 0.0
+        except Exception as e:
+            # Cualquier fallo al preparar la fila queda en su propio resultado
+            results[position] = (None, None, f"{type(e).__name__}: {e}")
+            continue
+
+        key = (entry.name, unknown, units, row.get('target_unit'))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = (entry, [], [[] for _ in values], [], set())
+        group[1].append(position)
+        for column, value in zip(group[2], values):
+            column.append(value)
+        group[3].append(temperature)
+        group[4].update(materials)
+
+    for (_, unknown, units, target_unit), (entry, positions, columns, temperatures, materials) in groups.items():
+        try:
+            group_results = _evaluate_group(entry, unknown, units, target_unit, columns, temperatures, materials)
+        except Exception as e:
+            group_results = [(None, None, f"{type(e).__name__}: {e}")] * len(positions)
+        for position, result in zip(positions, group_results):
+            results[position] = result
+
+    return results
+
+def format_results(rows: List[Row], results: List[RowResult], first_row: int, file_format: str) -> str:
+    buffer = io.StringIO()
+    if file_format == 'csv':
+        writer = csv.writer(buffer)
+        for row_number, (row, (value, unit, error)) in enumerate(zip(rows, results), first_row):
+            writer.writerow([row_number, row.get('formula') or '', '' if value is None else repr(value),
+                             unit or '', error or ''])
+    else:
+        for row_number, (row, (value, unit, error)) in enumerate(zip(rows, results), first_row):
+            buffer.write(json.dumps({'row': row_number, 'formula': row.get('formula'), 'result': value,
+                                     'unit': unit, 'error': error}, ensure_ascii=False))
+            buffer.write('\n')
+    return buffer.getvalue()
+
+def result_columns(rows: List[Row], results: List[RowResult], first_row: int) -> Dict[str, Any]:
+    # Bloque en columnas: formula, resultado, unidad y error de cada fila, mas una columna por
+    # variable de entrada con su columna de unidades (<variable>_unit)
+    import numpy as np
+
+    catalog = _formula_index()
+    count = len(rows)
+    columns = {
+        'row': np.arange(first_row, first_row + count, dtype=np.int64),
+        'formula': [row.get('formula') for row in rows],
+        'result': np.array([np.nan if value is None else value for value, _, _ in results], dtype=float),
+        'result' + UNIT_SUFFIX: [unit for _, unit, _ in results],
+        'error': [error for _, _, error in results],
+    }
+    defaults: Dict[str, Dict[str, str]] = {}
+    for position, row in enumerate(rows):
+        formula = row.get('formula')
+        if formula not in defaults:
+            entry = catalog.get(formula)
+            defaults[formula] = {var[0]: var[2] for var in list(entry.variables) + [entry.target_variable]} \
+                if entry is not None else {}
+        for name, value in (row.get('inputs') or {}).items():
+            if name not in columns:
+                columns[name] = np.full(count, np.nan)
+                columns[name + UNIT_SUFFIX] = [None] * count
+            try:
+                columns[name][position] = float(value.replace(',', '.')) if isinstance(value, str) else float(value)
+            except (TypeError, ValueError):
+                continue
+            columns[name + UNIT_SUFFIX][position] = row['units'].get(name) or defaults[formula].get(name)
+    return columns
+
+def declare_columns(store):
+    # Esquema fijo de las columnas de resultado, declarado antes del primer bloque: si se infiriera
+    # de ese bloque, uno sin errores dejaria 'error' como columna numerica
+    from .result_store import CATEGORY
+
+    store.add_column('row', 'int64')
+    store.add_column('formula', CATEGORY)
+    store.add_column('result', 'float64', unit_column='result' + UNIT_SUFFIX)
+    store.add_column('result' + UNIT_SUFFIX, CATEGORY)
+    store.add_column('error', CATEGORY)
+
+def append_columns(store, columns: Dict[str, Any]):
+    # Las columnas de entrada nuevas se registran en orden y cada valor junto a su columna de unidades
+    from .result_store import CATEGORY, infer_dtype
+
+    registered = store.meta['columns']
+    for name, values in columns.items():
+        if name in registered:
+            continue
+        unit_name = name + UNIT_SUFFIX
+        if unit_name in columns:
+            store.add_column(name, 'float64', unit_column=unit_name)
+            if unit_name not in registered:
+                store.add_column(unit_name, CATEGORY)
+        else:
+            store.add_column(name, infer_dtype(values))
+    store.append(columns)
+
+def _process_records(task: tuple) -> Tuple[Any, int, int]:
+    input_format, header, records, first_row, output_format = task
+    rows = list(_parse_records(input_format, header, records))
+    results = evaluate_chunk(rows)
+    errors = sum(result[2] is not None for result in results)
+    if output_format == STORE_FORMAT:
+        return result_columns(rows, results, first_row), len(rows), errors
+    return format_results(rows, results, first_row, output_format), len(rows), errors
+
+def _chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _ordered_map(function: Callable, tasks: Iterable[Any], workers: int) -> Iterator[Any]:
+    if workers <= 1:
+        for task in tasks:
+            yield function(task)
+        return
+
+    # Como mucho 2 bloques en vuelo por proceso: la memoria no depende del tamano de la entrada
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for task in tasks:
+            pending.append(executor.submit(function, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _stats(rows: int, errors: int, elapsed: float) -> Dict[str, float]:
+    return {'rows': rows, 'errors': errors, 'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed > 0 else float('inf')}
+
+def run_batch(rows: Iterable[Row], sink: Callable[[int, Row, RowResult], None],
+              workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, float]:
+    start = time.perf_counter()
+    processed = 0
+    errors = 0
+
+    in_flight = deque()
+
+    def tasks():
+        for chunk in _chunks(rows, chunk_size):
+            in_flight.append(chunk)
+            yield chunk
+
+    for chunk_results in _ordered_map(evaluate_chunk, tasks(), workers):
+        chunk = in_flight.popleft()
+        for row, result in zip(chunk, chunk_results):
+            sink(processed, row, result)
+            processed += 1
+            errors += result[2] is not None
+
+    return _stats(processed, errors, time.perf_counter() - start)
+
+def detect_format(path: str, default: str = 'csv') -> str:
+    lowered = path.lower()
+    if lowered.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if lowered.endswith('.csv'):
+        return 'csv'
+    return default
+
+def run_batch_files(input_path: str, output_path: Optional[str] = None, input_format: Optional[str] = None,
+                    output_format: Optional[str] = None, workers: int = 1,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, quiet: bool = False,
+                    store_path: Optional[str] = None) -> Dict[str, float]:
+    # Con store_path los resultados van a un almacen columnar (core.result_store) en vez de texto
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or (detect_format(output_path, input_format) if output_path else input_format)
+
+    store = None
+    if store_path:
+        from .result_store import ResultStore
+        store = ResultStore.create(store_path, {'source': input_path})
+        declare_columns(store)
+        output_format = STORE_FORMAT
+
+    input_stream = sys.stdin if input_path == '-' else open(input_path, newline='', encoding='utf-8')
+    output_stream = None if store is not None else sys.stdout if not output_path or output_path == '-' else \
+        open(output_path, 'w', newline='', encoding='utf-8')
+
+    start = last_report = time.perf_counter()
+    processed = 0
+    errors = 0
+    try:
+        header, records = read_records(input_stream, input_format)
+        if output_format == 'csv':
+            csv.writer(output_stream).writerow(['row', 'formula', 'result', 'unit', 'error'])
+
+        def tasks():
+            first_row = 0
+            for chunk in _chunks(records, chunk_size):
+                yield input_format, header, chunk, first_row, output_format
+                first_row += len(chunk)
+
+        for output, rows, chunk_errors in _ordered_map(_process_records, tasks(), workers):
+            if store is not None:
+                append_columns(store, output)
+            else:
+                output_stream.write(output)
+            processed += rows
+            errors += chunk_errors
+
+            now = time.perf_counter()
+            if not quiet and now - last_report > 0.5:
+                last_report = now
+                print(f"\r{processed} filas, {processed / (now - start):.0f} filas/s", end='', file=sys.stderr)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not None and output_stream is not sys.stdout:
+            output_stream.close()
+        if store is not None:
+            store.close()
+
+    stats = _stats(processed, errors, time.perf_counter() - start)
+    if not quiet:
+        print(f"\r{stats['rows']} filas ({stats['errors']} con error) en {stats['seconds']:.2f} s: "
+              f"{stats['rows_per_second']:.0f} filas/s", file=sys.stderr)
+    return stats
@@ -1,20 +1,245 @@
-import pkgutil
+import ast
+import hashlib
+import importlib
 import inspect
+import json
+import pkgutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Type
+
 from . import formulas
-from .formulas.base_formula import BaseFormula
-from typing import List, Type
-
-def load_formulas() -> List[Type[BaseFormula]]:
-
-    formula_classes = []
-
-    for importer, modname, ispkg in pkgutil.iter_modules(formulas.__path__):
-        if modname != 'base_formula':
-            module = __import__(f"core.formulas.{modname}", fromlist="dummy")
-            
-            for name, obj in inspect.getmembers(module):
-                
-                if inspect.isclass(obj) and issubclass(obj, BaseFormula) and obj is not BaseFormula:
-                    formula_classes.append(obj)
-    
-    return formula_classes
\ No newline at end of file
+from .instrumentation import timed
+from .user_cache import user_cache_dir, write_atomic
+
+if TYPE_CHECKING:
+    from .formulas.base_formula import BaseFormula
+    from .unit_consistency import ConsistencyIndex, UnitCheck
+
+MANIFEST_VERSION = 2
+MANIFEST_FILE = "formula_manifest.json"
+METADATA_FIELDS = ('name', 'description', 'variables', 'target_variable', 'formula_latex')
+
+_instances: Dict[Tuple[str, str], 'BaseFormula'] = {}
+_indexes: Dict[Tuple[str, str], 'ConsistencyIndex'] = {}
+
+@dataclass(frozen=True)
+class FormulaEntry:
+    module: str
+    class_name: str
+    name: str
+    description: str
+    variables: Tuple[Tuple[str, str, str], ...]
+    target_variable: Tuple[str, str, str]
+    formula_latex: str
+    # Comprobaciones de unidades calculadas al registrar la formula (None: se calculan al usarla)
+    unit_checks: Optional[Tuple['UnitCheck', ...]] = None
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.module, self.class_name)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.key in _instances
+
+    def load_class(self) -> Type['BaseFormula']:
+        module = importlib.import_module(f"{formulas.__name__}.{self.module}")
+        return getattr(module, self.class_name)
+
+    def create(self) -> 'BaseFormula':
+        # Se importa el modulo solo cuando la formula se usa por primera vez
+        instance = _instances.get(self.key)
+        if instance is None:
+            instance = _instances[self.key] = self.load_class()()
+        return instance
+
+    @property
+    def consistency(self) -> 'ConsistencyIndex':
+        index = _indexes.get(self.key)
+        if index is None:
+            from .unit_consistency import ConsistencyIndex, consistency_index
+            if self.unit_checks is None:
+                index = consistency_index(self.create())
+            else:
+                index = ConsistencyIndex(self.variables, self.unit_checks)
+            _indexes[self.key] = index
+        return index
+
+    def to_json(self) -> dict:
+        return {
+            'class_name': self.class_name,
+            'name': self.name,
+            'description': self.description,
+            'variables': [list(var) for var in self.variables],
+            'target_variable': list(self.target_variable),
+            'formula_latex': self.formula_latex,
+            'unit_checks': None if self.unit_checks is None else [check.to_json() for check in self.unit_checks],
+        }
+
+    @classmethod
+    def from_json(cls, module: str, data: dict) -> 'FormulaEntry':
+        unit_checks = data.get('unit_checks')
+        if unit_checks is not None:
+            from .unit_consistency import UnitCheck
+            unit_checks = tuple(UnitCheck.from_json(check) for check in unit_checks)
+        return cls(
+            module=module,
+            class_name=data['class_name'],
+            name=data['name'],
+            description=data['description'],
+            variables=tuple(tuple(var) for var in data['variables']),
+            target_variable=tuple(data['target_variable']),
+            formula_latex=data['formula_latex'],
+            unit_checks=unit_checks,
+        )
+
+def _entry_from_class(module: str, obj: type) -> FormulaEntry:
+    return FormulaEntry(
+        module=module,
+        class_name=obj.__name__,
+        name=obj.name,
+        description=obj.description,
+        variables=tuple(tuple(var) for var in obj.variables),
+        target_variable=tuple(obj.target_variable),
+        formula_latex=obj.formula_latex,
+    )
+
+def _scan_source(source: bytes) -> Optional[List[dict]]:
+    # Extrae los metadatos de las clases sin importar el modulo. Devuelve None si
+    # algo no es un literal simple, en cuyo caso se recurre a importar el modulo.
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    known: Dict[str, dict] = {'BaseFormula': {}}
+    imported_names = set()
+    found = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.level > 0:
+            imported_names.update(alias.asname or alias.name for alias in node.names)
+        if not isinstance(node, ast.ClassDef):
+            continue
+        base_names = [base.id for base in node.bases if isinstance(base, ast.Name)]
+        if any(name in imported_names and name not in known for name in base_names):
+            return None
+        if not any(name in known for name in base_names):
+            continue
+        if len(base_names) != len(node.bases):
+            return None
+
+        attributes = {}
+        for base_name in reversed(base_names):
+            attributes.update(known.get(base_name, {}))
+
+        for statement in node.body:
+            if isinstance(statement, ast.Assign) and len(statement.targets) == 1:
+                target, value = statement.targets[0], statement.value
+            elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+                target, value = statement.target, statement.value
+            else:
+                continue
+            if isinstance(target, ast.Name) and target.id in METADATA_FIELDS:
+                try:
+                    attributes[target.id] = ast.literal_eval(value)
+                except (ValueError, TypeError, SyntaxError):
+                    return None
+
+        known[node.name] = attributes
+        if all(key in attributes for key in METADATA_FIELDS):
+            found.append({'class_name': node.name, **attributes})
+
+    return found
+
+def _scan_module(module: str) -> List[FormulaEntry]:
+    from .formulas.base_formula import BaseFormula
+
+    imported = importlib.import_module(f"{formulas.__name__}.{module}")
+    entries = []
+    for name, obj in inspect.getmembers(imported):
+        if inspect.isclass(obj) and issubclass(obj, BaseFormula) and obj is not BaseFormula \
+                and not inspect.isabstract(obj) and obj.__module__ == imported.__name__:
+            entries.append(_entry_from_class(module, obj))
+    return entries
+
+def _unit_checks(module: str, class_name: str) -> list:
+    # El indice de unidades necesita la clase y pint: solo se calcula al (re)escanear el modulo
+    from .unit_consistency import build_checks
+
+    formula_class = getattr(importlib.import_module(f"{formulas.__name__}.{module}"), class_name)
+    try:
+        return [check.to_json() for check in build_checks(formula_class())]
+    except Exception:
+        # Unidades que pint no reconoce: el error aparecera al calcular
+        return []
+
+def _read_manifest(path: Optional[Path]) -> dict:
+    if path is None:
+        return {}
+    try:
+        manifest = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('modules', {})
+
+@timed('catalog.load_catalog')
+def load_catalog(use_cache: bool = True) -> List[FormulaEntry]:
+    cache_dir = user_cache_dir() if use_cache else None
+    manifest_path = cache_dir / MANIFEST_FILE if cache_dir else None
+    cached_modules = _read_manifest(manifest_path)
+
+    modules = {}
+    entries: List[FormulaEntry] = []
+    changed = False
+
+    for finder, modname, ispkg in pkgutil.iter_modules(formulas.__path__):
+        if modname == 'base_formula' or ispkg:
+            continue
+
+        spec = finder.find_spec(modname)
+        origin = Path(spec.origin) if spec and spec.origin else None
+        record = None
+        cached = cached_modules.get(modname)
+
+        if origin is not None and origin.suffix == '.py' and origin.is_file():
+            stat = origin.stat()
+            if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                record = cached
+            else:
+                source = origin.read_bytes()
+                digest = hashlib.sha256(source).hexdigest()
+                if cached and cached['sha256'] == digest:
+                    record = dict(cached, mtime_ns=stat.st_mtime_ns)
+                else:
+                    scanned = _scan_source(source)
+                    if scanned is None:
+                        scanned = [entry.to_json() for entry in _scan_module(modname)]
+                    for data in scanned:
+                        data['unit_checks'] = _unit_checks(modname, data['class_name'])
+                    record = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                              'sha256': digest, 'formulas': scanned}
+                changed = changed or record is not cached
+
+        if record is None:
+            # Sin fuente disponible (p. ej. ejecutable congelado): se importa el modulo
+            module_entries = _scan_module(modname)
+            entries.extend(module_entries)
+            continue
+
+        modules[modname] = record
+        module_entries = [FormulaEntry.from_json(modname, data) for data in record['formulas']]
+        entries.extend(sorted(module_entries, key=lambda entry: entry.class_name))
+
+    if manifest_path is not None and (changed or set(modules) != set(cached_modules)):
+        payload = json.dumps({'version': MANIFEST_VERSION, 'modules': modules}, ensure_ascii=False)
+        write_atomic(manifest_path, payload.encode('utf-8'))
+
+    return entries
+
+@timed('catalog.load_formulas')
+def load_formulas() -> List[Type['BaseFormula']]:
+
+    return [entry.load_class() for entry in load_catalog()]
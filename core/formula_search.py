@@ -0,0 +1,100 @@
+import bisect
+import re
+from itertools import compress
+from typing import TYPE_CHECKING, Dict, Iterable, List, Sequence
+
+from .text import normalize_name
+
+if TYPE_CHECKING:
+    from .formula_manager import FormulaEntry
+
+# Indice de busqueda del catalogo sobre las palabras normalizadas (sin acentos ni mayusculas) del
+# nombre, la descripcion, los nombres de variable y los simbolos de cada formula. Cada palabra
+# apunta al conjunto de formulas que la contienen, guardado como los bits de un int de Python:
+# una consulta es un OR de las palabras que empiezan por cada termino y un AND entre terminos.
+#
+#   index = SearchIndex(entries)
+#   index.search("presion vol")   # posiciones en 'entries' con palabras que empiezan por ambos
+
+# Los prefijos de hasta esta longitud se precalculan: son los que abarcan mas palabras
+SHORT_PREFIX = 3
+
+_WORD = re.compile(r'[a-z0-9]+')
+_BITS = bytes.maketrans(b'01', b'\x00\x01')
+
+def words(text: str) -> List[str]:
+    # "delta_temperatura" y r"\Delta T" dan ['delta', 'temperatura'] y ['delta', 't']
+    return _WORD.findall(normalize_name(text))
+
+def entry_texts(entry: 'FormulaEntry') -> Iterable[str]:
+    yield entry.name
+    yield entry.description
+    for var_name, symbol, _ in entry.variables + (entry.target_variable,):
+        yield var_name
+        yield symbol
+
+def _positions(mask: int) -> List[int]:
+    # Bits activos en orden creciente, sin recorrer el int bit a bit en Python
+    bits = bin(mask)[:1:-1].encode('ascii').translate(_BITS)
+    return list(compress(range(len(bits)), bits))
+
+class SearchIndex:
+    def __init__(self, entries: Sequence['FormulaEntry']):
+        # Variables, simbolos y descripciones se repiten mucho entre formulas: cada texto se
+        # normaliza una sola vez
+        text_words: Dict[str, List[str]] = {}
+        positions: Dict[str, List[int]] = {}
+        for position, entry in enumerate(entries):
+            entry_words = set()
+            for text in entry_texts(entry):
+                found = text_words.get(text)
+                if found is None:
+                    found = text_words[text] = words(text)
+                entry_words.update(found)
+            for word in entry_words:
+                positions.setdefault(word, []).append(position)
+
+        # Las palabras frecuentes se construyen de una vez como bytes y no bit a bit sobre el int
+        size = len(entries) // 8 + 1
+        self._words = sorted(positions)
+        self._masks = []
+        for word in self._words:
+            found = positions[word]
+            if len(found) == 1:
+                self._masks.append(1 << found[0])
+                continue
+            bits = bytearray(size)
+            for position in found:
+                bits[position >> 3] |= 1 << (position & 7)
+            self._masks.append(int.from_bytes(bits, 'little'))
+
+        self._short: Dict[str, int] = {}
+        for word, mask in zip(self._words, self._masks):
+            for length in range(1, min(len(word), SHORT_PREFIX) + 1):
+                prefix = word[:length]
+                self._short[prefix] = self._short.get(prefix, 0) | mask
+        self._all = (1 << len(entries)) - 1
+
+    def __len__(self) -> int:
+        return self._all.bit_length()
+
+    def _prefix_mask(self, prefix: str) -> int:
+        if len(prefix) <= SHORT_PREFIX:
+            return self._short.get(prefix, 0)
+        start = bisect.bisect_left(self._words, prefix)
+        stop = bisect.bisect_left(self._words, prefix + '\uffff', start)
+        mask = 0
+        for word_mask in self._masks[start:stop]:
+            mask |= word_mask
+        return mask
+
+    def mask(self, query: str) -> int:
+        result = self._all
+        for term in words(query):
+            result &= self._prefix_mask(term)
+            if not result:
+                break
+        return result
+
+    def search(self, query: str) -> List[int]:
+        return _positions(self.mask(query))
@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Optional, Tuple
+
+from ..instrumentation import timed
+from ..result_cache import result_cache
+from ..unit_handler import Q_, ureg
 
 class BaseFormula(ABC):
 
@@ -20,7 +24,7 @@ class BaseFormula(ABC):
     def variables(self) -> List[Tuple[str, str, str]]:
 
         pass
-    
+
     @property
     @abstractmethod
     def target_variable(self) -> Tuple[str, str, str]:
@@ -33,7 +37,86 @@ class BaseFormula(ABC):
 
         pass
 
-    @abstractmethod
+    constants: Dict[str, str] = {}
+
+    # Memoiza solve() y solve_for() en result_cache; se puede desactivar por formula
+    cache_results: bool = True
+
+    def equation(self, inputs: Dict[str, Any]) -> Any:
+
+        raise NotImplementedError
+
+    def _cache_key(self, names: List[str], inputs: Dict[str, Any], *extra: Any) -> Optional[tuple]:
+        if not (self.cache_results and result_cache.enabled):
+            return None
+        return result_cache.make_key(self, names, inputs, *extra)
+
+    @timed('solve', per_class=True)
     def solve(self, inputs: Dict[str, any]) -> any:
+        key = self._cache_key([var[0] for var in self.variables], inputs, self.target_variable[2])
+        if key is not None:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+
+        values = dict(inputs)
+        for symbol, unit in self.constants.items():
+            values[symbol] = ureg.Unit(unit)
+
+        result = self.equation(values).to(self.target_variable[2])
+        if key is not None:
+            result_cache.put(key, result)
+        return result
+
+    def solve_for(self, unknown: str, inputs: Dict[str, any], target_unit: Optional[str] = None) -> any:
+        # Despeja cualquier variable (o el objetivo) a partir de equation(); el resto deben ser datos
+        from ..kernels import compile_formula
+
+        names = [var[0] for var in list(self.variables) + [self.target_variable] if var[0] != unknown]
+        missing = [name for name in names if name not in inputs]
+        if missing:
+            raise KeyError(f"Faltan datos para '{self.name}': {', '.join(missing)}.")
+
+        key = self._cache_key(names, inputs, unknown, target_unit)
+        if key is not None:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+
+        kernel = compile_formula(self, [str(inputs[name].units) for name in names], target_unit, unknown)
+        result = Q_(kernel(*(inputs[name].magnitude for name in names)), kernel.target_unit)
+        if key is not None:
+            result_cache.put(key, result)
+        return result
+
+    def solve_batch(self, inputs: Dict[str, Any], units: Optional[Dict[str, str]] = None,
+                    target_unit: Optional[str] = None, unknown: Optional[str] = None) -> Any:
+        # Las conversiones de unidades se resuelven una sola vez por columna en el kernel
+        # compilado, asi el calculo opera sobre arreglos completos sin pasar por pint.
+        import numpy as np
+
+        from ..kernels import compile_formula
+
+        if unknown is None:
+            unknown = self.target_variable[0]
+
+        units = units or {}
+        columns, column_units = [], []
+        for var_name, _, default_unit in list(self.variables) + [self.target_variable]:
+            if var_name == unknown:
+                continue
+            if var_name not in inputs:
+                raise KeyError(f"Falta la columna '{var_name}' para '{self.name}'.")
+            value = inputs[var_name]
+
+            if hasattr(value, 'units'):
+                columns.append(np.asarray(value.magnitude, dtype=float))
+                column_units.append(str(value.units))
+            else:
+                columns.append(np.asarray(value, dtype=float))
+                column_units.append(units.get(var_name, default_unit))
+
+        np.broadcast_shapes(*(np.shape(c) for c in columns))
 
-        pass
\ No newline at end of file
+        kernel = compile_formula(self, tuple(column_units), target_unit, unknown)
+        return Q_(kernel(*columns), kernel.target_unit)
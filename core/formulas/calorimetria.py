@@ -1,6 +1,5 @@
 from .base_formula import BaseFormula
-from ..unit_handler import Q_
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 
 class CalorEspecifico(BaseFormula):
     name = "Calorimetría (Calor Sensible)"
@@ -16,13 +15,13 @@ class CalorEspecifico(BaseFormula):
     
     formula_latex: str = r"Q = m \cdot c \cdot \Delta T"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         m = inputs['masa']
         c = inputs['calor_especifico']
         delta_t = inputs['delta_temperatura']
         
         Q = m * c * delta_t
-        return Q.to(self.target_variable[2])
+        return Q
 
 class DilatacionLineal(BaseFormula):
     name = "Dilatación Lineal"
@@ -38,13 +37,13 @@ class DilatacionLineal(BaseFormula):
     
     formula_latex: str = r"\Delta L = \alpha \cdot L_0 \cdot \Delta T"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         L0 = inputs['longitud_inicial']
         alpha = inputs['coeficiente_dilatacion']
         delta_t = inputs['delta_temperatura']
         
         delta_L = L0 * alpha * delta_t
-        return delta_L.to(self.target_variable[2])
+        return delta_L
     
 class EquilibrioTermico(BaseFormula):
     name = "Equilibrio Térmico"
@@ -62,7 +61,7 @@ class EquilibrioTermico(BaseFormula):
     
     formula_latex = r"m_1 c_1 \Delta T_1 + m_2 c_2 \Delta T_2 = 0"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         m1 = inputs['masa_1']
         c1 = inputs['calor_especifico_1']
         delta_T1 = inputs['delta_T1']
@@ -70,4 +69,4 @@ class EquilibrioTermico(BaseFormula):
         c2 = inputs['calor_especifico_2']
 
         delta_T2 = -(m1 * c1 * delta_T1) / (m2 * c2)
-        return delta_T2.to(self.target_variable[2])
\ No newline at end of file
+        return delta_T2
\ No newline at end of file
@@ -1,7 +1,6 @@
 from .base_formula import BaseFormula
-from ..unit_handler import Q_, ureg
-from typing import Dict, List, Tuple
-from numpy import log as ln
+from typing import Any, Dict, List, Tuple
+from ..functions import ln
 
 class LeyGasesIdeales(BaseFormula):
     name = "Ley de los Gases Ideales"
@@ -14,17 +13,19 @@ class LeyGasesIdeales(BaseFormula):
     ]
     
     target_variable: Tuple[str, str, str] = ('volumen', 'V', 'liter')
+
+    constants: Dict[str, str] = {'R': 'molar_gas_constant'}
     
     formula_latex: str = r"V = \frac{nRT}{P}"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         n = inputs['moles']
         T = inputs['temperatura']
         P = inputs['presion']
-        R = ureg.R
+        R = inputs['R']
         
         V = (n * R * T) / P
-        return V.to(self.target_variable[2])
+        return V
 
 class EnergiaCineticaMedia(BaseFormula):
     name = "Energía Cinética Media (Gas Monoatómico)"
@@ -35,15 +36,17 @@ class EnergiaCineticaMedia(BaseFormula):
     ]
     
     target_variable: Tuple[str, str, str] = ('energia_cinetica', 'K', 'joule')
+
+    constants: Dict[str, str] = {'k': 'boltzmann_constant'}
     
     formula_latex: str = r"K = \frac{3}{2} k_B T"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         T = inputs['temperatura']
-        kB = ureg.k
+        kB = inputs['k']
         
         K = (3/2) * kB * T
-        return K.to(self.target_variable[2])
+        return K
     
 class PrimeraLeyTermodinamica(BaseFormula):
     name = "Primera Ley de la Termodinámica"
@@ -58,11 +61,11 @@ class PrimeraLeyTermodinamica(BaseFormula):
     
     formula_latex = r"\Delta U = Q - W"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         Q = inputs['calor']
         W = inputs['trabajo']
         delta_U = Q - W
-        return delta_U.to(self.target_variable[2])
+        return delta_U
     
 class TrabajoIsotermico(BaseFormula):
     name = "Trabajo en Proceso Isotérmico"
@@ -76,18 +79,20 @@ class TrabajoIsotermico(BaseFormula):
     ]
     
     target_variable = ('trabajo', 'W', 'joule')
+
+    constants = {'R': 'molar_gas_constant'}
     
     formula_latex = r"W = nRT \ln\left(\frac{V_f}{V_i}\right)"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         n = inputs['moles']
         T = inputs['temperatura']
         V_i = inputs['volumen_inicial']
         V_f = inputs['volumen_final']
-        R = ureg.R
+        R = inputs['R']
 
         W = n * R * T * ln(V_f / V_i)
-        return W.to(self.target_variable[2])
+        return W
     
 class LeyDeBoyle(BaseFormula):
     name = "Ley de Boyle"
@@ -103,12 +108,12 @@ class LeyDeBoyle(BaseFormula):
     
     formula_latex = r"P_1 V_1 = P_2 V_2"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         P1 = inputs['presion_inicial']
         V1 = inputs['volumen_inicial']
         P2 = inputs['presion_final']
         V2 = (P1 * V1) / P2
-        return V2.to(self.target_variable[2])
+        return V2
     
 class CapacidadCalorifica(BaseFormula):
     name = "Capacidad Calorífica"
@@ -123,11 +128,11 @@ class CapacidadCalorifica(BaseFormula):
     
     formula_latex = r"C = \frac{Q}{\Delta T}"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         Q = inputs['calor']
         delta_T = inputs['delta_temperatura']
         C = Q / delta_T
-        return C.to(self.target_variable[2])
+        return C
     
 class LeyDeCharles(BaseFormula):
     name = "Ley de Charles"
@@ -143,9 +148,9 @@ class LeyDeCharles(BaseFormula):
     
     formula_latex = r"\frac{V_1}{T_1} = \frac{V_2}{T_2}"
 
-    def solve(self, inputs: Dict[str, Q_]) -> Q_:
+    def equation(self, inputs: Dict[str, Any]) -> Any:
         V1 = inputs['volumen_1']
         T1 = inputs['temperatura_1']
         T2 = inputs['temperatura_2']
         V2 = V1 * T2 / T1
-        return V2.to(self.target_variable[2])
\ No newline at end of file
+        return V2
\ No newline at end of file
@@ -0,0 +1,13 @@
+import math
+
+def ln(x):
+    # math.log para escalares; numpy solo se importa cuando llegan arreglos o cantidades de pint
+    if type(x) in (float, int):
+        return math.log(x)
+
+    if type(x).__module__.startswith('sympy'):
+        import sympy
+        return sympy.log(x)
+
+    import numpy
+    return numpy.log(x)
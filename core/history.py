@@ -0,0 +1,295 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .user_cache import user_data_dir
+
+# Historial de calculos: registro de solo anexado en SQLite (un archivo en modo WAL). Cada fila
+# guarda la formula, la incognita, las entradas y sus unidades (JSON compacto), el resultado con
+# su unidad, la incertidumbre y el metodo si los hay y el tiempo de calculo. Los indices por
+# (formula, fecha) y por fecha evitan recorrer la tabla al filtrar, y unos disparadores impiden
+# modificar o borrar filas.
+#
+# replay() vuelve a evaluar una seleccion por el camino de los lotes (core.batch: kernels
+# compilados y vectorizados, opcionalmente en varios procesos) y devuelve las filas cuyo
+# resultado cambio, p. ej. despues de modificar una formula. La comparacion usa una tolerancia
+# fija (rtol/atol); la incertidumbre guardada se informa aparte y no amplia ese margen.
+#
+#   history = calculation_history()
+#   history.record("Ley de Boyle", {'presion_inicial': 1, 'volumen_inicial': 2, 'presion_final': 0.5},
+#                  {'presion_inicial': 'bar', 'volumen_inicial': 'liter', 'presion_final': 'bar'}, 4.0, 'liter')
+#   report = history.replay(formula="Ley de Boyle", since=time.time() - 86400)
+
+HISTORY_FILE = 'historial.sqlite'
+SCHEMA_VERSION = 1
+DEFAULT_RTOL = 1e-9
+# Filas por bloque al anadir en lote, al leer y al volver a evaluar
+CHUNK_SIZE = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calculations (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    formula TEXT NOT NULL,
+    unknown TEXT,
+    inputs TEXT NOT NULL,
+    units TEXT NOT NULL,
+    target_unit TEXT,
+    result REAL,
+    uncertainty REAL,
+    method TEXT,
+    seconds REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS calculations_formula_time ON calculations (formula, time);
+CREATE INDEX IF NOT EXISTS calculations_time ON calculations (time);
+CREATE TRIGGER IF NOT EXISTS calculations_no_update BEFORE UPDATE ON calculations
+BEGIN SELECT RAISE(ABORT, 'El historial es de solo anexado.'); END;
+CREATE TRIGGER IF NOT EXISTS calculations_no_delete BEFORE DELETE ON calculations
+BEGIN SELECT RAISE(ABORT, 'El historial es de solo anexado.'); END;
+"""
+
+_COLUMNS = ('time', 'formula', 'unknown', 'inputs', 'units', 'target_unit', 'result', 'uncertainty',
+            'method', 'seconds', 'error')
+_INSERT = f"INSERT INTO calculations ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+def _json(values: Dict[str, Any]) -> str:
+    return json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+
+@dataclass(frozen=True)
+class HistoryRecord:
+    id: int
+    time: float
+    formula: str
+    unknown: Optional[str]
+    inputs: Dict[str, Any]
+    units: Dict[str, str]
+    target_unit: Optional[str]
+    result: Optional[float]
+    uncertainty: Optional[float] = None
+    method: Optional[str] = None
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_json(self) -> dict:
+        # Mismo formato que una linea JSONL de core.batch
+        return {'formula': self.formula, 'inputs': self.inputs, 'units': self.units,
+                'target_unit': self.target_unit, 'unknown': self.unknown}
+
+    def matches(self, result: Optional[float], error: Optional[str], rtol: float = DEFAULT_RTOL,
+                atol: float = 0.0) -> bool:
+        # Tolerancia fija aunque haya incertidumbre: con ella como margen, una regresion menor que la
+        # incertidumbre pasaria desapercibida. El resultado guardado es el valor nominal
+        if self.error is not None or error is not None:
+            return (self.error is None) == (error is None)
+        if self.result is None or result is None:
+            return self.result is None and result is None
+        return math.isclose(result, self.result, rel_tol=rtol, abs_tol=atol)
+
+@dataclass
+class Mismatch:
+    record: HistoryRecord
+    result: Optional[float]
+    unit: Optional[str]
+    error: Optional[str]
+
+@dataclass
+class ReplayReport:
+    checked: int
+    seconds: float
+    mismatches: List[Mismatch] = field(default_factory=list)
+
+    @property
+    def matched(self) -> int:
+        return self.checked - len(self.mismatches)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.checked / self.seconds if self.seconds > 0 else float('inf')
+
+def _record(row: tuple) -> HistoryRecord:
+    record_id, timestamp, formula, unknown, inputs, units, *rest = row
+    return HistoryRecord(record_id, timestamp, formula, unknown, json.loads(inputs), json.loads(units), *rest)
+
+def _filters(formula: Optional[str], since: Optional[float], until: Optional[float]) -> Tuple[str, list]:
+    # Con formula se usa el indice (formula, time); sin ella, el de time
+    clauses, parameters = [], []
+    if formula is not None:
+        clauses.append("formula = ?")
+        parameters.append(formula)
+    if since is not None:
+        clauses.append("time >= ?")
+        parameters.append(since)
+    if until is not None:
+        clauses.append("time < ?")
+        parameters.append(until)
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), parameters
+
+class CalculationHistory:
+    # Una conexion compartida entre hilos; cada operacion la usa bajo un candado
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        try:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # En WAL, NORMAL no sincroniza el disco en cada confirmacion y no puede corromper la base
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise ValueError(f"Versión del historial no soportada: {version}.")
+            with self._connection:
+                self._connection.executescript(_SCHEMA)
+                self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        except Exception:
+            self._connection.close()
+            raise
+
+    def record(self, formula: str, inputs: Dict[str, Any], units: Dict[str, str], result: Optional[float] = None,
+               target_unit: Optional[str] = None, unknown: Optional[str] = None, seconds: Optional[float] = None,
+               uncertainty: Optional[float] = None, method: Optional[str] = None, error: Optional[str] = None,
+               timestamp: Optional[float] = None) -> int:
+        values = (time.time() if timestamp is None else timestamp, formula, unknown, _json(inputs), _json(units),
+                  target_unit, result, uncertainty, method, seconds, error)
+        with self._lock, self._connection:
+            return self._connection.execute(_INSERT, values).lastrowid
+
+    def record_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        # Diccionarios con los argumentos de record(); una transaccion por bloque
+        count = 0
+        now = time.time()
+        iterator = iter(records)
+        while True:
+            chunk = [(record.get('timestamp', now), record['formula'], record.get('unknown'),
+                      _json(record['inputs']), _json(record['units']), record.get('target_unit'),
+                      record.get('result'), record.get('uncertainty'), record.get('method'),
+                      record.get('seconds'), record.get('error'))
+                     for record in islice(iterator, CHUNK_SIZE)]
+            if not chunk:
+                return count
+            with self._lock, self._connection:
+                self._connection.executemany(_INSERT, chunk)
+            count += len(chunk)
+
+    def count(self, formula: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None) -> int:
+        where, parameters = _filters(formula, since, until)
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM calculations{where}", parameters).fetchone()[0]
+
+    def formulas(self) -> List[Tuple[str, int]]:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT formula, COUNT(*) FROM calculations GROUP BY formula ORDER BY formula").fetchall()
+
+    def query(self, formula: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              limit: Optional[int] = None, newest_first: bool = False) -> Iterator[HistoryRecord]:
+        # Se lee por bloques: recorrer todo el historial no lo carga entero en memoria
+        where, parameters = _filters(formula, since, until)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT id, {', '.join(_COLUMNS)} FROM calculations{where} ORDER BY time {order}, id {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            cursor = self._connection.execute(sql, parameters)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield _record(row)
+
+    def replay(self, formula: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+               limit: Optional[int] = None, workers: int = 1, rtol: float = DEFAULT_RTOL,
+               atol: float = 0.0) -> ReplayReport:
+        from .batch import record_row, run_batch
+
+        mismatches: List[Mismatch] = []
+
+        def rows():
+            for record in self.query(formula, since, until, limit):
+                row = record_row(record.to_json())
+                row['history'] = record
+                yield row
+
+        def sink(index: int, row: dict, result: tuple):
+            value, unit, error = result
+            record = row['history']
+            if not record.matches(value, error, rtol, atol):
+                mismatches.append(Mismatch(record, value, unit, error))
+
+        stats = run_batch(rows(), sink, workers, CHUNK_SIZE)
+        return ReplayReport(stats['rows'], stats['seconds'], mismatches)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+_history: Optional[CalculationHistory] = None
+_history_lock = threading.Lock()
+_history_failed = False
+
+def calculation_history() -> Optional[CalculationHistory]:
+    # Historial del usuario; None si esta desactivado (CALCULADORA_DATA_DIR=off) o no se puede abrir
+    global _history, _history_failed
+    if _history is None and not _history_failed:
+        with _history_lock:
+            if _history is None and not _history_failed:
+                directory = user_data_dir()
+                try:
+                    if directory is None:
+                        raise OSError("Historial desactivado.")
+                    _history = CalculationHistory(directory / HISTORY_FILE)
+                except (OSError, ValueError, sqlite3.Error):
+                    _history_failed = True
+    return _history
+
+def _timestamp(text: Optional[str]) -> Optional[float]:
+    from datetime import datetime
+
+    return None if text is None else datetime.fromisoformat(text).timestamp()
+
+def run_history(path: Optional[str] = None, formula: Optional[str] = None, since: Optional[str] = None,
+                until: Optional[str] = None, limit: Optional[int] = None, replay: bool = False, workers: int = 1,
+                rtol: float = DEFAULT_RTOL) -> int:
+    # Linea de comandos: lista los ultimos calculos (20 si no se indica 'limit') o vuelve a evaluar
+    # la seleccion; devuelve 1 si algun resultado cambio. Fechas en ISO 8601
+    from datetime import datetime
+
+    history = CalculationHistory(path) if path else calculation_history()
+    if history is None:
+        raise OSError("El historial está desactivado o no se puede abrir.")
+    first, last = _timestamp(since), _timestamp(until)
+
+    if not replay:
+        for record in reversed(list(history.query(formula, first, last, limit or 20, newest_first=True))):
+            when = datetime.fromtimestamp(record.time).isoformat(sep=' ', timespec='seconds')
+            inputs = ", ".join(f"{name}={value} {record.units.get(name, '')}".rstrip()
+                               for name, value in record.inputs.items())
+            outcome = record.error or f"{record.result:.6g} {record.target_unit or ''}".rstrip()
+            if record.uncertainty is not None:
+                outcome = f"{record.result:.6g} ± {record.uncertainty:.2g} {record.target_unit or ''}".rstrip()
+            print(f"{when}  {record.formula}: {inputs} -> {outcome}")
+        print(f"{history.count(formula, first, last)} cálculos en total")
+        return 0
+
+    report = history.replay(formula, first, last, limit, workers, rtol)
+    for mismatch in report.mismatches:
+        record = mismatch.record
+        now = mismatch.error or f"{mismatch.result:.10g} {mismatch.unit}"
+        before = record.error or f"{record.result:.10g} {record.target_unit}"
+        if record.error is None and record.uncertainty is not None:
+            # La incertidumbre se informa aparte; no entra en la comparacion
+            before += f" (± {record.uncertainty:.2g})"
+        print(f"#{record.id} {record.formula}: antes {before}, ahora {now}")
+    print(f"{report.checked} cálculos repetidos en {report.seconds:.2f} s ({report.rows_per_second:.0f} filas/s): "
+          f"{report.matched} iguales, {len(report.mismatches)} distintos")
+    return 1 if report.mismatches else 0
@@ -0,0 +1,146 @@
+import csv
+import functools
+import io
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Instrumentacion opcional de los puntos calientes (solve, Q_, conversiones de pint, carga del
+# catalogo, construccion y renderizado de vistas). Desactivada solo cuesta comprobar un flag
+# por llamada. Se activa con enable() o con la variable de entorno CALCULADORA_PROFILE=1.
+
+MAX_SAMPLES = 10000
+ENV_VARIABLE = 'CALCULADORA_PROFILE'
+
+class _State:
+    enabled = os.environ.get(ENV_VARIABLE, '').lower() in ('1', 'true', 'on')
+
+state = _State()
+_lock = threading.Lock()
+
+class Metric:
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        # Los percentiles se calculan sobre las ultimas MAX_SAMPLES llamadas
+        self.samples = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.samples.append(seconds)
+
+_timers: Dict[str, Metric] = {}
+_counters: Dict[str, int] = {}
+
+def enable():
+    state.enabled = True
+
+def disable():
+    state.enabled = False
+
+def is_enabled() -> bool:
+    return state.enabled
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+def record(name: str, seconds: float):
+    with _lock:
+        metric = _timers.get(name)
+        if metric is None:
+            metric = _timers[name] = Metric(name)
+        metric.add(seconds)
+
+def count(name: str, amount: int = 1):
+    if state.enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + amount
+
+def timed(name: str, per_class: bool = False) -> Callable:
+    # Con per_class el nombre incluye la clase del primer argumento (p. ej. solve.LeyDeBoyle)
+    def decorate(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not state.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metric_name = f"{name}.{type(args[0]).__name__}" if per_class else name
+                record(metric_name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+class span:
+    # Bloques que no son una funcion completa: with span('vista.render'): ...
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if state.enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+        return False
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+SNAPSHOT_FIELDS = ('name', 'kind', 'count', 'total_ms', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')
+
+def snapshot() -> List[Dict[str, Any]]:
+    with _lock:
+        timers = [(metric.name, metric.count, metric.total, metric.maximum, sorted(metric.samples))
+                  for metric in _timers.values()]
+        counters = list(_counters.items())
+
+    rows = []
+    for name, calls, total, maximum, ordered in sorted(timers):
+        rows.append({
+            'name': name, 'kind': 'timer', 'count': calls,
+            'total_ms': total * 1e3, 'mean_ms': total / calls * 1e3,
+            'p50_ms': _percentile(ordered, 0.50) * 1e3, 'p90_ms': _percentile(ordered, 0.90) * 1e3,
+            'p99_ms': _percentile(ordered, 0.99) * 1e3, 'max_ms': maximum * 1e3,
+        })
+    for name, calls in sorted(counters):
+        rows.append({'name': name, 'kind': 'counter', 'count': calls, 'total_ms': None, 'mean_ms': None,
+                     'p50_ms': None, 'p90_ms': None, 'p99_ms': None, 'max_ms': None})
+    return rows
+
+def to_json(rows: Optional[List[Dict[str, Any]]] = None) -> str:
+    return json.dumps({'enabled': state.enabled, 'metrics': snapshot() if rows is None else rows},
+                      indent=2, ensure_ascii=False)
+
+def to_csv(rows: Optional[List[Dict[str, Any]]] = None) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=SNAPSHOT_FIELDS)
+    writer.writeheader()
+    writer.writerows(snapshot() if rows is None else rows)
+    return buffer.getvalue()
+
+def export(path: str) -> str:
+    # El formato se elige por la extension: .csv o, en cualquier otro caso, JSON
+    text = to_csv() if str(path).lower().endswith('.csv') else to_json()
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        output.write(text)
+    return path
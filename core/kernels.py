@@ -0,0 +1,115 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .formulas.base_formula import BaseFormula
+from .unit_handler import Q_, ureg
+
+@lru_cache(maxsize=None)
+def si_conversion(unit: str) -> Tuple[float, float]:
+    # (escala, desplazamiento) tales que valor_SI = valor * escala + desplazamiento
+    offset = Q_(0.0, unit).to_base_units().magnitude
+    scale = Q_(1.0, unit).to_base_units().magnitude - offset
+    return float(scale), float(offset)
+
+@lru_cache(maxsize=None)
+def unit_label(unit: str) -> str:
+    return f"{ureg.Unit(unit):~P}"
+
+class CompiledKernel:
+    def __init__(self, formula: BaseFormula, units: Tuple[str, ...], target_unit: Optional[str] = None,
+                 unknown: Optional[str] = None):
+        definitions = {var[0]: var for var in list(formula.variables) + [formula.target_variable]}
+        if unknown is None:
+            unknown = formula.target_variable[0]
+        if unknown not in definitions:
+            raise KeyError(f"'{unknown}' no es una variable de '{formula.name}'.")
+
+        self.formula = formula
+        self.unknown = unknown
+        self.inputs: List[Tuple[str, str, str]] = [var for name, var in definitions.items() if name != unknown]
+        self.var_names: List[str] = [var[0] for var in self.inputs]
+        self.units = units
+        self.target_unit = target_unit or definitions[unknown][2]
+        self.unit_label = unit_label(self.target_unit)
+
+        if len(units) != len(self.var_names):
+            raise ValueError(f"'{formula.name}' espera {len(self.var_names)} unidades, se recibieron {len(units)}.")
+
+        for (var_name, _, default_unit), unit in zip(self.inputs, units):
+            if ureg.Unit(unit).dimensionality != ureg.Unit(default_unit).dimensionality:
+                raise ValueError(f"La unidad '{unit}' no es compatible con '{var_name}' ({default_unit}).")
+            if si_conversion(unit)[1]:
+                # Como pint en solve(): una entrada en °C o °F es ambigua en productos y diferencias
+                # (un incremento se da en delta_degree_Celsius o kelvin). Solo el resultado admite origen
+                from pint.errors import OffsetUnitCalculusError
+                raise OffsetUnitCalculusError(unit)
+
+        self.native = type(formula).equation is not BaseFormula.equation
+        if unknown != formula.target_variable[0]:
+            if not self.native:
+                raise NotImplementedError(f"'{formula.name}' no define equation(); solo puede calcular "
+                                          f"'{formula.target_variable[0]}'.")
+            if ureg.Unit(self.target_unit).dimensionality != ureg.Unit(definitions[unknown][2]).dimensionality:
+                raise ValueError(f"La unidad '{self.target_unit}' no es compatible con '{unknown}'.")
+
+            from .symbolic import solver_function
+            self._function = solver_function(formula, unknown)
+        else:
+            self._function = formula.equation
+            if self.native:
+                self._check_target_dimensionality()
+
+        if self.native:
+            self.conversions = [si_conversion(unit) for unit in units]
+            self.target_scale, self.target_offset = si_conversion(self.target_unit)
+            self.constants: Dict[str, float] = {
+                symbol: float(Q_(1.0, unit).to_base_units().magnitude)
+                for symbol, unit in formula.constants.items()
+            }
+
+    def _check_target_dimensionality(self):
+        # Evaluacion unica con pint para validar que la unidad objetivo es coherente
+        probe = {var_name: Q_(1.0, default_unit) for var_name, _, default_unit in self.formula.variables}
+        for symbol, unit in self.formula.constants.items():
+            probe[symbol] = ureg.Unit(unit)
+        self.formula.equation(probe).to(self.target_unit)
+
+    def __call__(self, *values: Any) -> Any:
+        if not self.native:
+            inputs = {name: Q_(value, unit) for name, value, unit in zip(self.var_names, values, self.units)}
+            return self.formula.solve(inputs).to(self.target_unit).magnitude
+
+        si_values = dict(self.constants)
+        for name, value, (scale, _) in zip(self.var_names, values, self.conversions):
+            if scale != 1.0:
+                si_values[name] = value * scale
+            else:
+                si_values[name] = value
+
+        result = self._function(si_values)
+        if self.target_offset:
+            return (result - self.target_offset) / self.target_scale
+        if self.target_scale != 1.0:
+            return result / self.target_scale
+        return result
+
+    def evaluate(self, values: Dict[str, Any]) -> Any:
+        return self(*(values[name] for name in self.var_names))
+
+@lru_cache(maxsize=1024)
+def _compile(formula_class: type, units: Tuple[str, ...], target_unit: Optional[str],
+             unknown: Optional[str]) -> CompiledKernel:
+    return CompiledKernel(formula_class(), units, target_unit, unknown)
+
+def default_units(formula: BaseFormula, unknown: Optional[str] = None) -> List[str]:
+    if unknown is None or unknown == formula.target_variable[0]:
+        return [var[2] for var in formula.variables]
+    return [var[2] for var in list(formula.variables) + [formula.target_variable] if var[0] != unknown]
+
+def compile_formula(formula: BaseFormula, units: Optional[Sequence[str]] = None,
+                    target_unit: Optional[str] = None, unknown: Optional[str] = None) -> CompiledKernel:
+    if unknown == formula.target_variable[0]:
+        unknown = None
+    if units is None:
+        units = default_units(formula, unknown)
+    return _compile(type(formula), tuple(units), target_unit, unknown)
@@ -0,0 +1,302 @@
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .text import normalize_name
+from .user_cache import user_cache_dir, write_atomic
+
+# Base de datos de propiedades de materiales: c(T), alfa(T), densidad, conductividad y datos de
+# cambio de fase. La fuente editable es data/materiales.json; la primera vez se compila a arreglos
+# de NumPy en la cache de usuario (uno por archivo .npy) que despues se abren con mmap:
+#
+#   keys.npy         nombres, alias y palabras normalizados, ordenados (busqueda por prefijo); una
+#                    clave se repite si la comparten varios materiales
+#   key_material.npy material de cada clave
+#   key_exact.npy    si la clave identifica al material por si sola (nombre o alias no ambiguo)
+#   series.npy       (material, propiedad) -> (inicio, puntos) en temperatures/values
+#   temperatures.npy, values.npy   tablas concatenadas, en K y en la unidad de PROPERTIES
+#
+# Las tablas se interpolan linealmente con np.interp; fuera del rango tabulado se usa el valor
+# del extremo mas cercano. Las propiedades constantes son tablas de un solo punto. 'phases' enlaza
+# las fases de una misma sustancia (Agua -> Hielo, Vapor de agua), guardadas como materiales aparte.
+
+SOURCE_FILE = Path(__file__).resolve().parent / 'data' / 'materiales.json'
+INDEX_VERSION = 3
+# Temperatura por defecto para leer una propiedad (20 °C)
+DEFAULT_TEMPERATURE = 293.15
+KEY_BYTES = 48
+
+# Propiedad -> (unidad en la que se guarda, nombre para mostrar)
+PROPERTIES: Dict[str, Tuple[str, str]] = {
+    'calor_especifico': ('joule / (gram * kelvin)', "Calor específico"),
+    'coeficiente_dilatacion': ('1 / kelvin', "Coeficiente de dilatación lineal"),
+    'densidad': ('kilogram / meter ** 3', "Densidad"),
+    'conductividad_termica': ('watt / (meter * kelvin)', "Conductividad térmica"),
+    'temperatura_fusion': ('kelvin', "Temperatura de fusión"),
+    'calor_latente_fusion': ('joule / gram', "Calor latente de fusión"),
+    'temperatura_ebullicion': ('kelvin', "Temperatura de ebullición"),
+    'calor_latente_vaporizacion': ('joule / gram', "Calor latente de vaporización"),
+}
+PROPERTY_NAMES = list(PROPERTIES)
+PHASES = ('solido', 'liquido', 'gas')
+
+_ARRAYS = ('keys', 'key_material', 'key_exact', 'series', 'temperatures', 'values')
+
+def property_for_variable(var_name: str) -> Optional[str]:
+    # calor_especifico_1 (EquilibrioTermico) se rellena con la propiedad calor_especifico
+    name = re.sub(r'_\d+$', '', var_name)
+    return name if name in PROPERTIES else None
+
+def _compile_source(source: dict) -> Tuple[dict, Dict[str, Any]]:
+    import numpy as np
+
+    materials = source['materials']
+    # Clave -> materiales que la tienen como nombre, como alias o como palabra de alguno de ellos
+    name_keys: Dict[str, int] = {}
+    alias_keys: Dict[str, set] = {}
+    word_keys: Dict[str, set] = {}
+    series = np.zeros((len(materials), len(PROPERTY_NAMES), 2), dtype=np.int64)
+    temperatures: List[float] = []
+    values: List[float] = []
+
+    for material_id, material in enumerate(materials):
+        key = normalize_name(material['name'])
+        if key in name_keys:
+            raise ValueError(f"Material repetido: '{material['name']}'.")
+        name_keys[key] = material_id
+        for alias in material.get('aliases', []):
+            alias_keys.setdefault(normalize_name(alias), set()).add(material_id)
+        for name in [material['name']] + material.get('aliases', []):
+            for word in normalize_name(name).split(' '):
+                word_keys.setdefault(word, set()).add(material_id)
+
+        for property_name, data in material['properties'].items():
+            if property_name not in PROPERTIES:
+                raise ValueError(f"Propiedad desconocida '{property_name}' en '{material['name']}'.")
+            points = sorted(data) if isinstance(data, list) else [[DEFAULT_TEMPERATURE, data]]
+            series[material_id, PROPERTY_NAMES.index(property_name)] = (len(temperatures), len(points))
+            temperatures.extend(float(point[0]) for point in points)
+            values.extend(float(point[1]) for point in points)
+
+    ids = {material['name']: material_id for material_id, material in enumerate(materials)}
+    phases = []
+    for material in materials:
+        links = material.get('phases', {})
+        for phase, name in links.items():
+            if phase not in PHASES or name not in ids:
+                raise ValueError(f"Fase no válida '{phase}: {name}' en '{material['name']}'.")
+        phases.append({phase: ids[name] for phase, name in links.items()})
+
+    # Un nombre completo identifica siempre a su material; un alias solo si ningun otro material lo
+    # usa como alias o palabra ('acero' es alias de "Acero al carbono" pero tambien palabra de
+    # "Acero inoxidable"). Las palabras solo sirven para buscar por prefijo
+    entries = set()
+    for key in set(name_keys) | set(alias_keys) | set(word_keys):
+        owners = {name_keys[key]} if key in name_keys else set()
+        owners |= alias_keys.get(key, set()) | word_keys.get(key, set())
+        if key in name_keys:
+            exact = name_keys[key]
+        elif len(owners) == 1 and key in alias_keys:
+            exact = next(iter(owners))
+        else:
+            exact = None
+        for material_id in owners:
+            entries.add((key.encode('utf-8')[:KEY_BYTES], material_id, material_id == exact))
+
+    ordered = sorted(entries)
+    arrays = {
+        'keys': np.array([key for key, _, _ in ordered], dtype=f'S{KEY_BYTES}'),
+        'key_material': np.array([material_id for _, material_id, _ in ordered], dtype=np.int32),
+        'key_exact': np.array([exact for _, _, exact in ordered], dtype=bool),
+        'series': series,
+        'temperatures': np.array(temperatures, dtype=float),
+        'values': np.array(values, dtype=float),
+    }
+    meta = {
+        'version': INDEX_VERSION,
+        'names': [material['name'] for material in materials],
+        'properties': PROPERTY_NAMES,
+        'phases': phases,
+    }
+    return meta, arrays
+
+def _source_hash(data: bytes) -> str:
+    identity = f"{INDEX_VERSION}|{'|'.join(f'{name}={unit}' for name, (unit, _) in PROPERTIES.items())}|"
+    return hashlib.sha256(identity.encode('utf-8') + data).hexdigest()[:16]
+
+def _npy_bytes(array) -> bytes:
+    import io
+
+    import numpy as np
+
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+def _load_index(source_path: Path) -> Tuple[dict, Dict[str, Any]]:
+    import numpy as np
+
+    data = source_path.read_bytes()
+    cache_dir = user_cache_dir('materials', _source_hash(data))
+    meta_path = cache_dir / 'meta.json' if cache_dir else None
+    if meta_path is not None and meta_path.is_file():
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            arrays = {name: np.load(cache_dir / f"{name}.npy", mmap_mode='r') for name in _ARRAYS}
+            return meta, arrays
+        except (OSError, ValueError):
+            pass
+
+    meta, arrays = _compile_source(json.loads(data))
+    if cache_dir is not None:
+        for name, array in arrays.items():
+            write_atomic(cache_dir / f"{name}.npy", _npy_bytes(array))
+        # meta.json se escribe al final: marca el indice como completo
+        write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+    return meta, arrays
+
+def _check_unit(unit: str, expected: str, label: str):
+    from .unit_handler import ureg
+
+    if ureg.Unit(unit).dimensionality != ureg.Unit(expected).dimensionality:
+        raise ValueError(f"La unidad '{unit}' no es compatible con {label} ({expected}).")
+
+class MaterialDatabase:
+    def __init__(self, source_path: Path = SOURCE_FILE):
+        meta, arrays = _load_index(Path(source_path))
+        self.names: List[str] = meta['names']
+        self._ids = {name: material_id for material_id, name in enumerate(self.names)}
+        self._phases: List[Dict[str, int]] = meta['phases']
+        self._keys = arrays['keys']
+        self._key_material = arrays['key_material']
+        self._key_exact = arrays['key_exact']
+        self._series = arrays['series']
+        self._temperatures = arrays['temperatures']
+        self._values = arrays['values']
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def material_id(self, name: str) -> int:
+        material_id = self._ids.get(name)
+        if material_id is not None:
+            return material_id
+        key = normalize_name(name).encode('utf-8')[:KEY_BYTES]
+        start = int(self._keys.searchsorted(key, 'left'))
+        stop = int(self._keys.searchsorted(key, 'right'))
+        for position in range(start, stop):
+            if self._key_exact[position]:
+                material_id = self._ids[name] = int(self._key_material[position])
+                return material_id
+        if stop > start:
+            # Una palabra o un alias compartido: no se elige un material por el usuario
+            candidates = sorted({self.names[material_id] for material_id in self._key_material[start:stop]})
+            if len(candidates) == 1:
+                raise KeyError(f"Material desconocido: {name!r}. ¿Quizá {candidates[0]}?")
+            raise KeyError(f"Material ambiguo: {name!r} puede ser {', '.join(candidates)}.")
+        suggestions = self.lookup(name[:3], limit=5)
+        hint = f" ¿Quizá {', '.join(suggestions)}?" if suggestions else ""
+        raise KeyError(f"Material desconocido: {name!r}.{hint}")
+
+    def lookup(self, prefix: str, limit: Optional[int] = 20, property_name: Optional[str] = None) -> List[str]:
+        # Materiales cuyo nombre, alias o alguna palabra empieza por 'prefix', por orden alfabetico
+        key = normalize_name(prefix).encode('utf-8')[:KEY_BYTES]
+        start = int(self._keys.searchsorted(key, 'left'))
+        stop = int(self._keys.searchsorted(key + b'\xff', 'left')) if key else len(self._keys)
+        property_index = PROPERTY_NAMES.index(property_name) if property_name else None
+
+        found = sorted({int(material_id) for material_id in self._key_material[start:stop]},
+                       key=lambda material_id: normalize_name(self.names[material_id]))
+        if property_index is not None:
+            found = [material_id for material_id in found if self._series[material_id, property_index, 1]]
+        return [self.names[material_id] for material_id in found[:limit]]
+
+    def phase_material(self, name: str, phase: str) -> str:
+        # Material con los datos de otra fase de la misma sustancia (el propio si no hay enlace)
+        if phase not in PHASES:
+            raise KeyError(f"Fase desconocida: {phase!r} ({', '.join(PHASES)}).")
+        material_id = self.material_id(name)
+        return self.names[self._phases[material_id].get(phase, material_id)]
+
+    def properties(self, name: str) -> List[str]:
+        counts = self._series[self.material_id(name), :, 1]
+        return [property_name for property_name, count in zip(PROPERTY_NAMES, counts) if count]
+
+    def has_property(self, material_id: int, property_name: str) -> bool:
+        return bool(self._series[material_id, PROPERTY_NAMES.index(property_name), 1])
+
+    def temperature_range(self, name: str, property_name: str) -> Tuple[float, float]:
+        start, count = self._series[self.material_id(name), PROPERTY_NAMES.index(property_name)]
+        if not count:
+            raise KeyError(f"'{name}' no tiene {PROPERTIES[property_name][1].lower()}.")
+        return float(self._temperatures[start]), float(self._temperatures[start + count - 1])
+
+    def values(self, materials: Any, property_name: str, temperatures: Any = DEFAULT_TEMPERATURE,
+               temperature_unit: str = 'kelvin', unit: Optional[str] = None) -> Any:
+        # Vectorizado: 'materials' puede ser un nombre, un id o un arreglo de ids o nombres del
+        # mismo largo que 'temperatures'; una interpolacion por material distinto
+        import numpy as np
+
+        from .kernels import si_conversion
+
+        if property_name not in PROPERTIES:
+            raise KeyError(f"Propiedad desconocida: {property_name!r} ({', '.join(PROPERTY_NAMES)}).")
+        property_index = PROPERTY_NAMES.index(property_name)
+
+        if isinstance(materials, str):
+            ids = np.asarray(self.material_id(materials))
+        else:
+            ids = np.asarray(materials)
+            if ids.dtype.kind in 'USO':
+                unique, inverse = np.unique(ids, return_inverse=True)
+                ids = np.array([self.material_id(str(name)) for name in unique], dtype=np.int64)[inverse]
+                ids = ids.reshape(np.shape(materials))
+
+        if temperature_unit != 'kelvin':
+            _check_unit(temperature_unit, 'kelvin', "temperatura")
+        scale, offset = si_conversion(temperature_unit)
+        kelvin = np.asarray(temperatures, dtype=float) * scale + offset
+        ids, kelvin = np.broadcast_arrays(ids, kelvin)
+
+        result = np.empty(ids.shape, dtype=float)
+        for material_id in np.unique(ids):
+            start, count = self._series[material_id, property_index]
+            if not count:
+                raise KeyError(f"'{self.names[material_id]}' no tiene {PROPERTIES[property_name][1].lower()}.")
+            mask = ids == material_id
+            result[mask] = np.interp(kelvin[mask], self._temperatures[start:start + count],
+                                     self._values[start:start + count])
+
+        stored_unit = PROPERTIES[property_name][0]
+        if unit is not None and unit != stored_unit:
+            _check_unit(unit, stored_unit, PROPERTIES[property_name][1].lower())
+            from_scale, from_offset = si_conversion(stored_unit)
+            to_scale, to_offset = si_conversion(unit)
+            result = (result * from_scale + from_offset - to_offset) / to_scale
+        return result[()] if result.ndim == 0 else result
+
+    def value(self, name: str, property_name: str, temperature: float = DEFAULT_TEMPERATURE,
+              temperature_unit: str = 'kelvin', unit: Optional[str] = None) -> float:
+        return float(self.values(name, property_name, temperature, temperature_unit, unit))
+
+    def quantity(self, name: str, property_name: str, temperature: Any = DEFAULT_TEMPERATURE,
+                 temperature_unit: str = 'kelvin', unit: Optional[str] = None):
+        from .unit_handler import Q_
+
+        unit = unit or PROPERTIES[property_name][0]
+        return Q_(self.values(name, property_name, temperature, temperature_unit, unit), unit)
+
+_database: Optional[MaterialDatabase] = None
+_database_lock = threading.Lock()
+
+def material_database() -> MaterialDatabase:
+    # Se construye (o se abre desde la cache) la primera vez que se usa
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = MaterialDatabase()
+    return _database
@@ -0,0 +1,216 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .formulas.base_formula import BaseFormula
+from .kernels import compile_formula
+from .unit_handler import Q_, ureg
+
+# Encadenamiento de formulas: la salida de un nodo alimenta una variable de otro. Las unidades
+# se comprueban al conectar y cada nodo se evalua con su kernel compilado, asi que los valores
+# pueden ser escalares o arreglos de NumPy. Al cambiar una entrada solo se recalculan los nodos
+# que dependen de ella, y la propagacion se corta si una salida no cambia.
+#
+#   pipeline = Pipeline()
+#   pipeline.add('calor', CalorEspecifico())
+#   pipeline.add('capacidad', CapacidadCalorifica())
+#   pipeline.connect('calor', 'capacidad', 'calor')
+#   pipeline.set_input('calor', 'masa', 500, 'gram')
+#   ...
+#   pipeline.quantity('capacidad')
+
+def _same_value(old: Any, new: Any) -> bool:
+    if old is new:
+        return True
+    if old is None or new is None:
+        return False
+    if hasattr(old, 'shape') or hasattr(new, 'shape'):
+        import numpy as np
+        return np.shape(old) == np.shape(new) and bool(np.array_equal(old, new))
+    return old == new
+
+class Node:
+    def __init__(self, name: str, formula: BaseFormula, unknown: Optional[str] = None,
+                 output_unit: Optional[str] = None):
+        definitions = {var[0]: var for var in list(formula.variables) + [formula.target_variable]}
+        unknown = unknown or formula.target_variable[0]
+        if unknown not in definitions:
+            raise KeyError(f"'{unknown}' no es una variable de '{formula.name}'.")
+
+        self.name = name
+        self.formula = formula
+        self.unknown = unknown
+        self.unknown_unit = definitions[unknown][2]
+        self.output_unit = output_unit or self.unknown_unit
+        self.inputs: List[Tuple[str, str, str]] = [var for var_name, var in definitions.items() if var_name != unknown]
+        self.values: Dict[str, Any] = {}
+        self.units: Dict[str, str] = {var_name: unit for var_name, _, unit in self.inputs}
+        self.sources: Dict[str, str] = {}
+        self.output: Any = None
+        self.evaluations = 0
+
+    def default_unit(self, var_name: str) -> str:
+        for name, _, unit in self.inputs:
+            if name == var_name:
+                return unit
+        raise KeyError(f"'{var_name}' no es una entrada de '{self.name}' ({self.formula.name}).")
+
+    def missing(self) -> List[str]:
+        return [var_name for var_name, _, _ in self.inputs
+                if var_name not in self.sources and var_name not in self.values]
+
+class Pipeline:
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+        self._order: Optional[List[str]] = None
+        self._stale: Set[str] = set()
+
+    def _node(self, name: str) -> Node:
+        node = self.nodes.get(name)
+        if node is None:
+            raise KeyError(f"No existe el nodo '{name}'.")
+        return node
+
+    def add(self, name: str, formula: BaseFormula, unknown: Optional[str] = None,
+            output_unit: Optional[str] = None) -> Node:
+        if name in self.nodes:
+            raise ValueError(f"Ya existe un nodo llamado '{name}'.")
+        node = Node(name, formula, unknown, output_unit)
+        if output_unit is not None:
+            self._check_units(ureg.Unit(output_unit), node.unknown, ureg.Unit(node.unknown_unit), f"'{name}'")
+        self.nodes[name] = node
+        self._order = None
+        self._stale.add(name)
+        return node
+
+    @staticmethod
+    def _check_units(unit, var_name: str, expected, context: str):
+        if unit.dimensionality != expected.dimensionality:
+            raise ValueError(f"La unidad '{unit}' no es compatible con '{var_name}' ({expected}) en {context}.")
+
+    def _downstream(self, name: str) -> Set[str]:
+        reached, pending = set(), [name]
+        while pending:
+            current = pending.pop()
+            for node in self.nodes.values():
+                if current in node.sources.values() and node.name not in reached:
+                    reached.add(node.name)
+                    pending.append(node.name)
+        return reached
+
+    def connect(self, source: str, target: str, variable: str):
+        # La salida de 'source' pasa a ser la variable 'variable' de 'target'
+        source_node, target_node = self._node(source), self._node(target)
+        expected = target_node.default_unit(variable)
+        if variable in target_node.sources:
+            raise ValueError(f"'{variable}' de '{target}' ya está conectada a '{target_node.sources[variable]}'.")
+        if source == target or source in self._downstream(target):
+            raise ValueError(f"Conectar '{source}' con '{target}' crearía un ciclo.")
+        self._check_units(ureg.Unit(source_node.output_unit), variable, ureg.Unit(expected),
+                          f"la conexión {source} -> {target}")
+
+        target_node.sources[variable] = source
+        target_node.values.pop(variable, None)
+        target_node.units[variable] = source_node.output_unit
+        self._order = None
+        self._stale.add(target)
+
+    def disconnect(self, target: str, variable: str):
+        target_node = self._node(target)
+        if target_node.sources.pop(variable, None) is not None:
+            target_node.units[variable] = target_node.default_unit(variable)
+            self._order = None
+            self._stale.add(target)
+
+    def set_input(self, node_name: str, variable: str, value: Any, unit: Optional[str] = None):
+        node = self._node(node_name)
+        expected = node.default_unit(variable)
+        if variable in node.sources:
+            raise ValueError(f"'{variable}' de '{node_name}' viene de '{node.sources[variable]}'; "
+                             f"desconéctela antes de asignarle un valor.")
+        if hasattr(value, 'units'):
+            value, unit = value.magnitude, str(value.units)
+        unit = unit or expected
+
+        if unit != node.units[variable]:
+            self._check_units(ureg.Unit(unit), variable, ureg.Unit(expected), f"'{node_name}'")
+            node.units[variable] = unit
+        elif _same_value(node.values.get(variable), value):
+            return
+        node.values[variable] = value
+        self._stale.add(node_name)
+
+    def set_inputs(self, node_name: str, values: Dict[str, Any], units: Optional[Dict[str, str]] = None):
+        units = units or {}
+        for variable, value in values.items():
+            self.set_input(node_name, variable, value, units.get(variable))
+
+    def order(self) -> List[str]:
+        if self._order is None:
+            # Orden topologico (Kahn); connect() ya impide los ciclos
+            pending = {name: len(set(node.sources.values())) for name, node in self.nodes.items()}
+            ready = [name for name, count in pending.items() if count == 0]
+            order = []
+            while ready:
+                name = ready.pop(0)
+                order.append(name)
+                for node in self.nodes.values():
+                    if name in node.sources.values():
+                        pending[node.name] -= 1
+                        if pending[node.name] == 0:
+                            ready.append(node.name)
+            self._order = order
+        return self._order
+
+    def _evaluate(self, node: Node) -> Any:
+        names = [var[0] for var in node.inputs]
+        kernel = compile_formula(node.formula, [node.units[var_name] for var_name in names],
+                                 node.output_unit, node.unknown)
+        return kernel(*(self.nodes[node.sources[var_name]].output if var_name in node.sources
+                        else node.values[var_name] for var_name in names))
+
+    def run(self) -> List[str]:
+        # Recalcula lo necesario y devuelve los nodos evaluados, en orden
+        changed: Set[str] = set()
+        evaluated = []
+        for name in self.order():
+            node = self.nodes[name]
+            if name not in self._stale and not changed.intersection(node.sources.values()):
+                continue
+            self._stale.discard(name)
+
+            if node.missing() or any(self.nodes[source].output is None for source in node.sources.values()):
+                if node.output is not None:
+                    node.output = None
+                    changed.add(name)
+                continue
+
+            try:
+                output = self._evaluate(node)
+            except Exception:
+                # El nodo y lo que dependa de salidas ya cambiadas se reintentan en la siguiente ejecucion
+                self._stale.add(name)
+                for changed_name in changed:
+                    self._stale.update(self._downstream(changed_name))
+                raise
+            node.evaluations += 1
+            evaluated.append(name)
+            if not _same_value(node.output, output):
+                node.output = output
+                changed.add(name)
+        return evaluated
+
+    def value(self, node_name: str) -> Any:
+        node = self._node(node_name)
+        self.run()
+        if node.output is None:
+            missing = node.missing() or [f"{var_name} (de '{source}')" for var_name, source in node.sources.items()
+                                         if self.nodes[source].output is None]
+            raise ValueError(f"Faltan datos para '{node_name}': {', '.join(missing)}.")
+        return node.output
+
+    def quantity(self, node_name: str) -> Any:
+        return Q_(self.value(node_name), self._node(node_name).output_unit)
+
+    def results(self) -> Dict[str, Any]:
+        self.run()
+        return {name: Q_(node.output, node.output_unit) for name, node in self.nodes.items()
+                if node.output is not None}
@@ -0,0 +1,105 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+from . import instrumentation
+
+# Cache LRU de resultados de solve(). La clave son las entradas normalizadas a magnitudes SI
+# (asi 1000 gram y 1 kilogram comparten resultado) con su dimensionalidad, mas la unidad pedida.
+# Las conversiones se guardan por unidad, de modo que un acierto no pasa por pint salvo para
+# copiar el resultado.
+# Las entradas en unidades con origen desplazado (°C, °F) no se cachean.
+
+DEFAULT_MAX_ITEMS = 4096
+# Digitos significativos de la clave: absorbe el error de redondeo de las conversiones
+KEY_DIGITS = 12
+
+# Unidad -> (escala, desplazamiento, dimensionalidad)
+_conversions: Dict[Hashable, Tuple[float, float, Hashable]] = {}
+
+def _si_value(value: Any) -> Optional[tuple]:
+    # (magnitud SI, dimensionalidad, entero): 1 kilogram y 1 meter no comparten clave aunque la
+    # magnitud coincida, y una entrada entera no recibe el resultado calculado con una de coma flotante
+    units = getattr(value, '_units', None)
+    if units is None:
+        return None
+    magnitude = value.magnitude
+    if type(magnitude) not in (float, int):
+        return None
+
+    conversion = _conversions.get(units)
+    if conversion is None:
+        from .kernels import si_conversion
+        conversion = _conversions[units] = si_conversion(str(value.units)) + (value.dimensionality,)
+    scale, offset, dimensionality = conversion
+    if offset:
+        # °C y K no son intercambiables para pint (la entrada en °C falla en solve()): sin cache
+        return None
+    return float(f"{float(magnitude) * scale:.{KEY_DIGITS}g}"), dimensionality, type(magnitude) is int
+
+class ResultCache:
+    def __init__(self, max_items: int = DEFAULT_MAX_ITEMS):
+        self.max_items = max_items
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: 'OrderedDict[tuple, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, formula: Any, names: Iterable[str], inputs: Mapping[str, Any],
+                 *extra: Hashable) -> Optional[tuple]:
+        # None si alguna entrada no es una cantidad escalar (p. ej. arreglos): no se cachea
+        values = []
+        for name in names:
+            value = _si_value(inputs.get(name))
+            if value is None:
+                return None
+            values.append(value)
+        return (type(formula), tuple(values)) + extra
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            result = self._items.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self._items.move_to_end(key)
+                self.hits += 1
+        instrumentation.count('solve_cache.miss' if result is None else 'solve_cache.hit')
+        # Se devuelve una copia: quien la recibe puede modificarla (p. ej. con ito())
+        return None if result is None else copy.copy(result)
+
+    def put(self, key: tuple, result: Any):
+        evicted = 0
+        with self._lock:
+            self._items[key] = copy.copy(result)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            instrumentation.count('solve_cache.eviction', evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def resize(self, max_items: int):
+        with self._lock:
+            self.max_items = max_items
+            while len(self._items) > max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._items), 'max_items': self.max_items,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+result_cache = ResultCache()
@@ -0,0 +1,357 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+# Almacen columnar de resultados (lotes, barridos). Cada columna es un archivo binario con un
+# tipo fijo al que se anaden bloques; meta.json guarda el numero de filas confirmadas, el tipo y
+# la unidad de pint de cada columna. Al reabrir, las columnas se leen con np.memmap: se pueden
+# filtrar o dibujar sin cargar todo en memoria.
+#
+#   with ResultStore.create('resultados') as store:
+#       store.add_column('volumen', unit='liter')
+#       store.append({'volumen': xs, 'presion': ys})
+#   results = open_store('resultados')
+#   results['volumen'][results['presion'] > 1e5]
+#
+# Las columnas de texto ('category') se guardan como codigos int32 (-1 = vacio); sus categorias
+# van en un archivo aparte (una linea JSON por categoria) al que solo se anaden lineas, y meta.json
+# guarda cuantas hay confirmadas y cuantos bytes ocupan. Asi meta.json no crece con cada texto
+# nuevo (p. ej. los mensajes de error de un lote). La unidad de una columna puede ser fija ('unit')
+# o variar por fila ('unit_column': columna de categorias).
+
+STORE_VERSION = 2
+META_FILE = 'meta.json'
+CATEGORY = 'category'
+CODE_DTYPE = 'int32'
+
+def _fill_value(dtype: str):
+    if dtype == CATEGORY:
+        return -1
+    if dtype.startswith(('float', 'complex')):
+        return float('nan')
+    return 0
+
+def _storage_dtype(dtype: str) -> str:
+    return CODE_DTYPE if dtype == CATEGORY else dtype
+
+def infer_dtype(values: Any) -> str:
+    import numpy as np
+
+    if isinstance(values, str):
+        return CATEGORY
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+        return values.dtype.name
+    sample = values if values is None or np.isscalar(values) else \
+        next((value for value in values if value is not None), None)
+    if sample is None:
+        # Sin ningun valor el tipo seria una suposicion: la columna se declara con add_column()
+        raise ValueError("No se puede inferir el tipo de una columna sin valores; declárela con add_column().")
+    if isinstance(sample, (bool, np.bool_)):
+        return 'bool'
+    if isinstance(sample, (int, np.integer)):
+        return 'int64'
+    if isinstance(sample, (float, np.floating)):
+        return 'float64'
+    return CATEGORY
+
+class ResultStore:
+    # Escritura por bloques; meta.json se reescribe (de forma atomica) tras cada bloque, de modo
+    # que un lector solo ve filas completas aunque el proceso se interrumpa
+    def __init__(self, path: Union[str, Path], meta: dict):
+        self.path = Path(path)
+        self.meta = meta
+        self._files: Dict[str, Any] = {}
+        self._categories: Dict[str, List[str]] = {
+            name: _read_categories(self.path, spec)
+            for name, spec in meta['columns'].items() if spec['dtype'] == CATEGORY}
+        self._codes: Dict[str, Dict[str, int]] = {
+            name: {value: code for code, value in enumerate(categories)}
+            for name, categories in self._categories.items()}
+
+    @classmethod
+    def create(cls, path: Union[str, Path], attributes: Optional[Dict[str, Any]] = None) -> 'ResultStore':
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        if (path / META_FILE).exists():
+            raise FileExistsError(f"Ya existe un almacén de resultados en '{path}'.")
+        store = cls(path, {'version': STORE_VERSION, 'rows': 0, 'columns': {}, 'attributes': attributes or {}})
+        store.flush()
+        return store
+
+    @classmethod
+    def append_to(cls, path: Union[str, Path]) -> 'ResultStore':
+        store = cls(path, _read_meta(Path(path)))
+        # Se descartan los bytes de un bloque que no llego a confirmarse
+        store._truncate()
+        return store
+
+    def _truncate(self):
+        # Vuelve cada archivo a lo confirmado en meta.json
+        for name, spec in self.meta['columns'].items():
+            file = self._files.get(name)
+            if file is not None:
+                file.flush()
+            os.truncate(self.path / spec['file'], self.rows * _itemsize(spec['dtype']))
+            if spec['dtype'] == CATEGORY:
+                os.truncate(self.path / spec['categories_file'], spec['categories_bytes'])
+
+    def _discard_categories(self):
+        # Categorias anadidas por un bloque que no llego a escribirse
+        for name, categories in self._categories.items():
+            count = self.meta['columns'][name]['categories']
+            for value in categories[count:]:
+                del self._codes[name][value]
+            del categories[count:]
+
+    @property
+    def rows(self) -> int:
+        return self.meta['rows']
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta['columns'])
+
+    def add_column(self, name: str, dtype: str = 'float64', unit: Optional[str] = None,
+                   unit_column: Optional[str] = None):
+        if name in self.meta['columns']:
+            raise ValueError(f"La columna '{name}' ya existe.")
+        spec = {'file': f"c{len(self.meta['columns'])}.bin", 'dtype': dtype}
+        if unit is not None:
+            spec['unit'] = unit
+        if unit_column is not None:
+            spec['unit_column'] = unit_column
+        if dtype == CATEGORY:
+            spec['categories_file'] = f"c{len(self.meta['columns'])}.categories"
+            spec['categories'] = 0
+            spec['categories_bytes'] = 0
+            (self.path / spec['categories_file']).touch()
+            self._categories[name] = []
+            self._codes[name] = {}
+        self.meta['columns'][name] = spec
+
+        # Las filas anteriores a la columna quedan vacias
+        self._write(name, self._fill(dtype, self.rows))
+
+    def _fill(self, dtype: str, count: int):
+        import numpy as np
+        return np.full(count, _fill_value(dtype), dtype=_storage_dtype(dtype))
+
+    def _file(self, name: str):
+        file = self._files.get(name)
+        if file is None:
+            file = self._files[name] = open(self.path / self.meta['columns'][name]['file'], 'ab')
+        return file
+
+    def _write(self, name: str, array):
+        file = self._file(name)
+        if len(array):
+            array.tofile(file)
+
+    def _encode(self, name: str, values: Iterable[Any]):
+        import numpy as np
+
+        codes = self._codes[name]
+        categories = self._categories[name]
+        encoded = []
+        for value in values:
+            if value is None:
+                encoded.append(-1)
+                continue
+            value = str(value)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(categories)
+                categories.append(value)
+            encoded.append(code)
+        return np.asarray(encoded, dtype=CODE_DTYPE)
+
+    def append(self, columns: Mapping[str, Any]) -> int:
+        # Las columnas nuevas se crean con el tipo inferido; las que faltan se rellenan
+        import numpy as np
+
+        sizes = {len(values) for values in columns.values() if not np.isscalar(values)}
+        if len(sizes) > 1:
+            raise ValueError(f"Las columnas del bloque tienen longitudes distintas: {sorted(sizes)}.")
+        count = sizes.pop() if sizes else 1
+
+        for name, values in columns.items():
+            if name not in self.meta['columns']:
+                self.add_column(name, infer_dtype(values))
+
+        # Todas las columnas se convierten antes de escribir ninguna: un valor no valido en una
+        # columna no debe dejar bytes de mas en las anteriores
+        arrays = {}
+        try:
+            for name, spec in self.meta['columns'].items():
+                dtype = spec['dtype']
+                if name not in columns:
+                    array = self._fill(dtype, count)
+                elif dtype == CATEGORY:
+                    values = columns[name]
+                    array = self._encode(name, [values] * count if isinstance(values, str) else values)
+                else:
+                    array = np.broadcast_to(np.asarray(columns[name], dtype=dtype), (count,))
+                    array = np.ascontiguousarray(array)
+                arrays[name] = array
+        except Exception:
+            self._discard_categories()
+            raise
+
+        try:
+            for name, array in arrays.items():
+                self._write(name, array)
+        except Exception:
+            self._discard_categories()
+            self._truncate()
+            raise
+
+        self.meta['rows'] += count
+        self.flush()
+        return count
+
+    def flush(self):
+        for file in self._files.values():
+            file.flush()
+        # Las categorias nuevas se anaden a su archivo antes de confirmarlas en meta.json
+        for name, categories in self._categories.items():
+            spec = self.meta['columns'][name]
+            if len(categories) == spec['categories']:
+                continue
+            data = ''.join(json.dumps(value, ensure_ascii=False) + '\n'
+                           for value in categories[spec['categories']:]).encode('utf-8')
+            with open(self.path / spec['categories_file'], 'ab') as file:
+                file.write(data)
+            spec['categories'] = len(categories)
+            spec['categories_bytes'] += len(data)
+        # A diferencia de la cache, aqui un error de escritura no se puede ignorar
+        meta_path = self.path / META_FILE
+        tmp_path = meta_path.with_name(f"{META_FILE}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.meta, ensure_ascii=False, indent=1), encoding='utf-8')
+        os.replace(tmp_path, meta_path)
+
+    def close(self):
+        self.flush()
+        for file in self._files.values():
+            file.close()
+        self._files.clear()
+
+    def __enter__(self) -> 'ResultStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _itemsize(dtype: str) -> int:
+    import numpy as np
+    return np.dtype(_storage_dtype(dtype)).itemsize
+
+def _read_categories(path: Path, spec: dict) -> List[str]:
+    with open(path / spec['categories_file'], 'rb') as file:
+        data = file.read(spec['categories_bytes'])
+    return [json.loads(line) for line in data.split(b'\n')[:spec['categories']]]
+
+def _read_meta(path: Path) -> dict:
+    try:
+        meta = json.loads((path / META_FILE).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        raise FileNotFoundError(f"'{path}' no contiene un almacén de resultados ({META_FILE}).")
+    if meta.get('version') != STORE_VERSION:
+        raise ValueError(f"Versión de almacén no soportada: {meta.get('version')!r}.")
+    return meta
+
+class StoredResults:
+    # Lectura sin copia: cada columna es un np.memmap de solo lectura con 'rows' elementos
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.meta = _read_meta(self.path)
+        self._arrays: Dict[str, Any] = {}
+        self._categories: Dict[str, List[str]] = {}
+
+    @property
+    def rows(self) -> int:
+        return self.meta['rows']
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.meta['columns'])
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        return self.meta.get('attributes', {})
+
+    def _spec(self, name: str) -> dict:
+        spec = self.meta['columns'].get(name)
+        if spec is None:
+            raise KeyError(f"No existe la columna '{name}' ({', '.join(self.columns)}).")
+        return spec
+
+    def __getitem__(self, name: str):
+        # Columnas de texto: se devuelven los codigos (ver categories() y decode())
+        import numpy as np
+
+        array = self._arrays.get(name)
+        if array is None:
+            spec = self._spec(name)
+            dtype = _storage_dtype(spec['dtype'])
+            if self.rows:
+                array = np.memmap(self.path / spec['file'], dtype=dtype, mode='r', shape=(self.rows,))
+            else:
+                array = np.empty(0, dtype=dtype)
+            self._arrays[name] = array
+        return array
+
+    def unit(self, name: str) -> Optional[str]:
+        return self._spec(name).get('unit')
+
+    def units(self, name: str, selection: Any = None) -> List[Optional[str]]:
+        # Unidad de cada fila (de la columna de unidades o la fija de la columna)
+        spec = self._spec(name)
+        if 'unit_column' in spec:
+            return self.decode(spec['unit_column'], selection)
+        count = len(self[name][selection]) if selection is not None else self.rows
+        return [spec.get('unit')] * count
+
+    def _category_list(self, name: str) -> List[str]:
+        categories = self._categories.get(name)
+        if categories is None:
+            spec = self._spec(name)
+            if spec['dtype'] != CATEGORY:
+                raise ValueError(f"La columna '{name}' no es de texto.")
+            categories = self._categories[name] = _read_categories(self.path, spec)
+        return categories
+
+    def categories(self, name: str) -> List[str]:
+        if self._spec(name)['dtype'] != CATEGORY:
+            return []
+        return list(self._category_list(name))
+
+    def decode(self, name: str, selection: Any = None) -> List[Optional[str]]:
+        categories = self._category_list(name)
+        codes = self[name] if selection is None else self[name][selection]
+        return [categories[code] if code >= 0 else None for code in codes.tolist()]
+
+    def code(self, name: str, value: str) -> int:
+        # Para filtrar sin decodificar: results['formula'] == results.code('formula', 'Ley de Boyle')
+        try:
+            return self._category_list(name).index(value)
+        except ValueError:
+            return -2
+
+    def quantity(self, name: str, selection: Any = None):
+        from .unit_handler import Q_
+
+        unit = self.unit(name)
+        if unit is None:
+            raise ValueError(f"La columna '{name}' no tiene una unidad fija.")
+        return Q_(self[name] if selection is None else self[name][selection], unit)
+
+    def select(self, selection: Any, columns: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        # Copia solo las filas seleccionadas (mascara booleana, indices o slice)
+        return {name: self[name][selection] for name in (columns or self.columns)}
+
+def open_store(path: Union[str, Path]) -> StoredResults:
+    return StoredResults(path)
@@ -0,0 +1,337 @@
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+
+from .batch import Row, RowResult, evaluate_chunk, record_row
+
+# Servicio HTTP/JSON local (sin PySide6) sobre asyncio. Las peticiones de /solve de todas las
+# conexiones se juntan en micro-lotes que se evaluan con evaluate_chunk(): las filas de la misma
+# formula y unidades forman una sola llamada vectorizada al kernel compilado. HTTP/1.1 con
+# keep-alive y pipelining (las respuestas salen en el orden de las peticiones).
+#
+#   GET  /formulas   catalogo: nombre, descripcion, variables, objetivo
+#   POST /solve      {"formula": ..., "inputs": {...}, "units": {...}, "target_unit": ..., "unknown": ...}
+#                    o una lista de esos objetos; responde {"result", "unit", "error"} (o una lista)
+#   GET  /stats      peticiones, lotes y tamano medio de lote
+#
+# Contrapresion: la cola de micro-lotes esta acotada y cada conexion admite un numero limitado
+# de peticiones en vuelo; cuando se llenan se deja de leer del socket y TCP frena al cliente.
+#
+#   python main.py serve --port 8765
+#   curl -d '{"formula": "Ley de Boyle", "inputs": {...}}' http://127.0.0.1:8765/solve
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Filas como maximo por micro-lote y espera para juntar peticiones cuando la cola esta casi vacia
+MAX_BATCH_ROWS = 4096
+BATCH_DELAY = 0.001
+# Peticiones encoladas en total y peticiones en vuelo por conexion
+MAX_PENDING = 1024
+PIPELINE_DEPTH = 64
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _json_body(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+def _response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n")
+    if not keep_alive:
+        head += "Connection: close\r\n"
+    return head.encode('ascii') + b"\r\n" + body
+
+def _result_json(result: RowResult) -> Dict[str, Any]:
+    value, unit, error = result
+    return {'result': value, 'unit': unit, 'error': error}
+
+def _error_future(error: HttpError) -> 'asyncio.Future':
+    future = asyncio.get_running_loop().create_future()
+    future.set_result((error.status, _json_body({'error': str(error)})))
+    return future
+
+def _evaluate_each(requests: List[List[Row]]) -> List[Any]:
+    # Respaldo cuando falla el lote completo: cada peticion por separado, con su resultado o su error
+    outcomes = []
+    for rows in requests:
+        try:
+            outcomes.append(evaluate_chunk(rows))
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bool, bytes]]:
+    # (metodo, ruta, keep_alive, cuerpo); None si el cliente cerro la conexion entre peticiones
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HttpError(400, "Petición incompleta.")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "Cabeceras demasiado grandes.")
+
+    lines = head.decode('latin-1').split("\r\n")
+    try:
+        method, path, version = lines[0].split(' ')
+    except ValueError:
+        raise HttpError(400, f"Línea de petición no válida: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HttpError(411, "Se requiere Content-Length.")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, "Content-Length no válido.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"El cuerpo supera {MAX_BODY_BYTES} bytes.")
+    try:
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        raise HttpError(400, "Cuerpo incompleto.")
+    return method, path.split('?', 1)[0], keep_alive, body
+
+class MicroBatcher:
+    # Junta las filas de peticiones concurrentes y las evalua en un hilo aparte, de modo que el
+    # bucle de eventos sigue leyendo peticiones mientras se calcula el lote anterior
+    def __init__(self, max_rows: int = MAX_BATCH_ROWS, delay: float = BATCH_DELAY, max_pending: int = MAX_PENDING):
+        self.max_rows = max_rows
+        self.delay = delay
+        self.queue: 'asyncio.Queue[Tuple[List[Row], asyncio.Future]]' = asyncio.Queue(max_pending)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-lotes')
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+
+    async def submit(self, rows: List[Row]) -> 'asyncio.Future':
+        # Espera si la cola esta llena: asi la contrapresion llega hasta la lectura del socket
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((rows, future))
+        return future
+
+    def _take(self, items: list, size: int) -> int:
+        while size < self.max_rows and not self.queue.empty():
+            item = self.queue.get_nowait()
+            items.append(item)
+            size += len(item[0])
+        return size
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            size = self._take(items, len(items[0][0]))
+            if self.delay and size < self.max_rows:
+                await asyncio.sleep(self.delay)
+                size = self._take(items, size)
+
+            rows = [row for item_rows, _ in items for row in item_rows]
+            try:
+                results = await loop.run_in_executor(self.executor, evaluate_chunk, rows)
+            except Exception:
+                # Una peticion no debe hacer fallar a las demas del lote
+                outcomes = await loop.run_in_executor(self.executor, _evaluate_each,
+                                                      [item_rows for item_rows, _ in items])
+            else:
+                outcomes, offset = [], 0
+                for item_rows, _ in items:
+                    outcomes.append(results[offset:offset + len(item_rows)])
+                    offset += len(item_rows)
+
+            self.requests += len(items)
+            self.rows += len(rows)
+            self.batches += 1
+            for (_, future), outcome in zip(items, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'requests': self.requests, 'rows': self.rows, 'batches': self.batches,
+                'rows_per_batch': self.rows / self.batches if self.batches else 0.0,
+                'pending': self.queue.qsize()}
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+class FormulaServer:
+    def __init__(self, max_rows: int = MAX_BATCH_ROWS, delay: float = BATCH_DELAY,
+                 max_pending: int = MAX_PENDING, pipeline_depth: int = PIPELINE_DEPTH):
+        self.batch_options = (max_rows, delay, max_pending)
+        self.pipeline_depth = pipeline_depth
+        self.batcher: Optional[MicroBatcher] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._catalog_body: Optional[bytes] = None
+        self.started = time.monotonic()
+
+    def catalog_body(self) -> bytes:
+        if self._catalog_body is None:
+            from .formula_manager import load_catalog
+            self._catalog_body = _json_body([
+                {'name': entry.name, 'description': entry.description,
+                 'variables': [list(var) for var in entry.variables],
+                 'target_variable': list(entry.target_variable)}
+                for entry in load_catalog()])
+        return self._catalog_body
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: Optional[str] = None):
+        self.batcher = MicroBatcher(*self.batch_options)
+        self._batch_task = asyncio.create_task(self.batcher.run())
+        self.catalog_body()
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self.handle, unix_path, limit=MAX_HEADER_BYTES)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+        if self.batcher is not None:
+            self.batcher.close()
+
+    async def _solve(self, body: bytes) -> 'asyncio.Future':
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise HttpError(400, f"JSON inválido: {e}")
+        records = payload if isinstance(payload, list) else [payload]
+        if not records or not all(isinstance(record, dict) for record in records):
+            raise HttpError(400, "Se espera un objeto JSON o una lista no vacía de objetos.")
+
+        single = not isinstance(payload, list)
+        rows = [record_row(record) for record in records]
+        for index, row in enumerate(rows):
+            # Un objeto mal formado se rechaza aqui y no llega al micro-lote de las demas peticiones
+            if row.get('error'):
+                raise HttpError(400, row['error'] if single else f"Elemento {index}: {row['error']}")
+
+        pending = await self.batcher.submit(rows)
+
+        async def respond():
+            results = await pending
+            if single:
+                return 200, _json_body(_result_json(results[0]))
+            return 200, _json_body([_result_json(result) for result in results])
+
+        return asyncio.ensure_future(respond())
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> 'asyncio.Future':
+        if path == '/solve':
+            if method != 'POST':
+                raise HttpError(405, "Use POST en /solve.")
+            return await self._solve(body)
+
+        future = asyncio.get_running_loop().create_future()
+        if path == '/formulas' and method == 'GET':
+            future.set_result((200, self.catalog_body()))
+        elif path == '/stats' and method == 'GET':
+            stats = dict(self.batcher.stats(), uptime=time.monotonic() - self.started)
+            future.set_result((200, _json_body(stats)))
+        elif path in ('/formulas', '/stats'):
+            raise HttpError(405, f"Use GET en {path}.")
+        else:
+            raise HttpError(404, f"Ruta desconocida: {path}")
+        return future
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Lector y escritor separados: se pueden leer nuevas peticiones (pipelining) mientras las
+        # anteriores esperan su micro-lote, con un maximo de pipeline_depth en vuelo
+        responses: asyncio.Queue = asyncio.Queue(self.pipeline_depth)
+        sender = asyncio.create_task(self._send(responses, writer))
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HttpError as e:
+                    # Tras un error de formato no se sabe donde empieza la siguiente peticion
+                    await responses.put((_error_future(e), False))
+                    break
+                if request is None:
+                    break
+                method, path, keep_alive, body = request
+                try:
+                    pending = await self._dispatch(method, path, body)
+                except HttpError as e:
+                    pending = _error_future(e)
+                await responses.put((pending, keep_alive))
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            await responses.put(None)
+            await sender
+
+    @staticmethod
+    async def _send(responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        connected = True
+        while True:
+            item = await responses.get()
+            if item is None:
+                break
+            pending, keep_alive = item
+            try:
+                status, body = await pending
+            except Exception as e:
+                status, body = 500, _json_body({'error': f"{type(e).__name__}: {e}"})
+            if not connected:
+                # Se siguen consumiendo las respuestas para no bloquear al lector
+                continue
+            try:
+                writer.write(_response(status, body, keep_alive))
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: Optional[str] = None,
+                quiet: bool = False, **options):
+    server = FormulaServer(**options)
+    listener = await server.start(host, port, unix_path)
+    if not quiet:
+        if unix_path:
+            address = f"unix:{unix_path}"
+        else:
+            bound_host, bound_port = listener.sockets[0].getsockname()[:2]
+            address = f"http://{bound_host}:{bound_port}"
+        print(f"Escuchando en {address}", file=sys.stderr, flush=True)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+def run_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: Optional[str] = None,
+               quiet: bool = False, **options):
+    try:
+        asyncio.run(serve(host, port, unix_path, quiet, **options))
+    except KeyboardInterrupt:
+        pass
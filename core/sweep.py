@@ -0,0 +1,35 @@
+from typing import Iterator, Sequence, Tuple
+
+from .kernels import CompiledKernel
+
+# Barridos de parametros sobre un kernel compilado. Se generan por bloques para poder dibujar
+# resultados parciales y cancelar entre bloque y bloque.
+
+def sweep_1d(kernel: CompiledKernel, values: Sequence[float], x_index: int, xs,
+             block_size: int = 50000) -> Iterator[Tuple[int, int, object]]:
+    import numpy as np
+
+    xs = np.asarray(xs, dtype=float)
+    arguments = list(values)
+    for start in range(0, len(xs), block_size):
+        stop = min(start + block_size, len(xs))
+        arguments[x_index] = xs[start:stop]
+        with np.errstate(all='ignore'):
+            block = np.broadcast_to(kernel(*arguments), (stop - start,))
+        yield start, stop, np.asarray(block, dtype=float)
+
+def sweep_2d(kernel: CompiledKernel, values: Sequence[float], x_index: int, xs, y_index: int, ys,
+             rows_per_block: int = 50) -> Iterator[Tuple[int, int, object]]:
+    # Devuelve bloques de filas Z[inicio:fin, :] con Z[i, j] = f(x_j, y_i)
+    import numpy as np
+
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    arguments = list(values)
+    arguments[x_index] = xs[np.newaxis, :]
+    for start in range(0, len(ys), rows_per_block):
+        stop = min(start + rows_per_block, len(ys))
+        arguments[y_index] = ys[start:stop, np.newaxis]
+        with np.errstate(all='ignore'):
+            block = np.broadcast_to(kernel(*arguments), (stop - start, len(xs)))
+        yield start, stop, np.asarray(block, dtype=float)
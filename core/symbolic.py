@@ -0,0 +1,125 @@
+import hashlib
+import inspect
+import json
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+
+from .formulas.base_formula import BaseFormula
+from .user_cache import user_cache_dir, write_atomic
+
+# Despeje simbolico de cualquier variable a partir de BaseFormula.equation(). sympy.solve es lento,
+# asi que el resultado se guarda en disco como codigo NumPy y en los siguientes usos solo se compila
+# ese codigo, sin importar sympy.
+CACHE_VERSION = 1
+
+_kernels: Dict[Tuple[type, str, str], Tuple[List[str], Callable]] = {}
+_kernels_lock = threading.Lock()
+
+def variable_names(formula: BaseFormula) -> List[str]:
+    return [var[0] for var in formula.variables] + [formula.target_variable[0]]
+
+def symbolic_equation(formula: BaseFormula):
+    import sympy
+
+    symbols = {name: sympy.Symbol(name, real=True) for name in variable_names(formula)}
+    for symbol in formula.constants:
+        symbols[symbol] = sympy.Symbol(symbol, positive=True)
+
+    expression = formula.equation(dict(symbols))
+    expression = sympy.nsimplify(expression, rational=True)
+    return sympy.Eq(symbols[formula.target_variable[0]], expression), symbols
+
+def symbolic_solution(formula: BaseFormula, unknown: str):
+    import sympy
+
+    equation, symbols = symbolic_equation(formula)
+    if unknown not in symbols or unknown in formula.constants:
+        raise KeyError(f"'{unknown}' no es una variable de '{formula.name}'.")
+    if unknown == formula.target_variable[0]:
+        return equation.rhs
+
+    solutions = sympy.solve(equation, symbols[unknown])
+    if not solutions:
+        raise ValueError(f"No se puede despejar '{unknown}' en '{formula.name}'.")
+    return solutions[0]
+
+def _cache_key(formula: BaseFormula, unknown: str, kind: str = 'solve') -> str:
+    formula_class = type(formula)
+    try:
+        source = inspect.getsource(formula_class)
+    except (OSError, TypeError):
+        source = repr(formula_class.__dict__.get('equation'))
+    target = unknown if kind == 'solve' else f"{unknown}|{kind}"
+    identity = f"{CACHE_VERSION}|{formula_class.__module__}.{formula_class.__qualname__}|{target}|{source}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+def _solver_args(formula: BaseFormula, unknown: str) -> List[str]:
+    return [name for name in variable_names(formula) if name != unknown] + list(formula.constants)
+
+def _generate_code(formula: BaseFormula, unknown: str) -> Tuple[List[str], str]:
+    from sympy.printing.numpy import NumPyPrinter
+
+    solution = symbolic_solution(formula, unknown)
+    return _solver_args(formula, unknown), NumPyPrinter().doprint(solution)
+
+def _generate_gradient_code(formula: BaseFormula, unknown: str) -> Tuple[List[str], str]:
+    # Derivadas parciales del despeje respecto a cada variable (no a las constantes), como tupla
+    import sympy
+    from sympy.printing.numpy import NumPyPrinter
+
+    solution = symbolic_solution(formula, unknown)
+    args = _solver_args(formula, unknown)
+    symbols = {symbol.name: symbol for symbol in solution.free_symbols}
+    printer = NumPyPrinter()
+    partials = [printer.doprint(sympy.diff(solution, symbols[name])) if name in symbols else '0'
+                for name in args if name not in formula.constants]
+    return args, f"({', '.join(partials)},)"
+
+def _build(args: List[str], code: str, label: str) -> Callable:
+    import numpy
+
+    source = f"lambda {', '.join(args)}: {code}"
+    return eval(compile(source, f"<despeje {label}>", 'eval'), {'numpy': numpy})
+
+_GENERATORS = {'solve': _generate_code, 'gradient': _generate_gradient_code}
+
+def _load(formula: BaseFormula, unknown: str, kind: str) -> Tuple[List[str], Callable]:
+    key = (type(formula), unknown, kind)
+    solver = _kernels.get(key)
+    if solver is not None:
+        return solver
+
+    with _kernels_lock:
+        if key in _kernels:
+            return _kernels[key]
+
+        cache_dir = user_cache_dir('sympy')
+        path = cache_dir / f"{_cache_key(formula, unknown, kind)}.json" if cache_dir else None
+        cached = None
+        if path is not None and path.is_file():
+            try:
+                cached = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                cached = None
+
+        if cached is not None:
+            args, code = cached['args'], cached['code']
+        else:
+            args, code = _GENERATORS[kind](formula, unknown)
+            if path is not None:
+                write_atomic(path, json.dumps({'args': args, 'code': code}).encode('utf-8'))
+
+        solver = _kernels[key] = (args, _build(args, code, f"{type(formula).__name__}.{unknown}.{kind}"))
+        return solver
+
+def load_solver(formula: BaseFormula, unknown: str) -> Tuple[List[str], Callable]:
+    return _load(formula, unknown, 'solve')
+
+def load_gradient(formula: BaseFormula, unknown: str) -> Tuple[List[str], Callable]:
+    # La funcion recibe los argumentos en SI (con las constantes al final) y devuelve las
+    # derivadas parciales respecto a las variables, en el mismo orden
+    return _load(formula, unknown, 'gradient')
+
+def solver_function(formula: BaseFormula, unknown: str) -> Callable[[Dict[str, Any]], Any]:
+    args, function = load_solver(formula, unknown)
+    return lambda values: function(*(values[name] for name in args))
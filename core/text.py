@@ -0,0 +1,9 @@
+import re
+import unicodedata
+
+# Normalizacion de texto compartida por las busquedas (materiales, catalogo de formulas)
+
+def normalize_name(name: str) -> str:
+    # Sin acentos ni mayusculas: "Latón" y "laton" son la misma clave
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'\s+', ' ', text).strip().lower()
@@ -0,0 +1,364 @@
+import math
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .formulas.calorimetria import CalorEspecifico
+from .materials import PHASES
+
+# Equilibrio termico de N cuerpos con cambios de fase e intercambio de calor transitorio.
+#
+# Cada cuerpo se describe por su entalpia H(T) en SI, con referencia 0 K:
+#
+#   H(T) = m c_s min(T, T_f) + m L_f [T > T_f] + m c_l (min(T, T_b) - T_f)+ + m L_v [T > T_b]
+#          + m c_g (T - T_b)+
+#
+# Los terminos sensibles son el calor de CalorEspecifico (Q = m c ΔT). H es lineal a trozos y
+# creciente, con un salto (la meseta del cambio de fase) en T_f y en T_b. Con dos cuerpos sin
+# cambios de fase el equilibrio coincide con EquilibrioTermico.
+#
+# Los parametros son arreglos (sistemas, cuerpos): muchos sistemas independientes con el mismo
+# numero de cuerpos se resuelven a la vez, con un coste O(N) por iteracion o por paso.
+#
+#   equilibrium(): biseccion sobre T de sum_i H_i(T) = sum_i H_i(T0_i) en todos los sistemas
+#   simulate():    Euler explicito sobre las entalpias,
+#                  dH_i/dt = sum_j G_ij (T_j - T_i) + G_amb,i (T_amb - T_i)
+#                  Es un generador de instantaneas: la memoria depende del numero de cuerpos y
+#                  no del numero de pasos.
+
+# Iteraciones de la biseccion: el intervalo inicial se reduce por debajo del redondeo
+BISECTION_STEPS = 64
+# Distancia (K) a la que la temperatura de equilibrio se ajusta a una temperatura de cambio de fase
+SNAP_TOLERANCE = 1e-9
+# Sustituto finito de una entalpia infinita (cuerpo sin ese cambio de fase) en temperature_from()
+_NO_TRANSITION = 1e300
+
+_SENSIBLE = CalorEspecifico()
+
+def _sensible(mass, specific_heat, delta_t):
+    return _SENSIBLE.equation({'masa': mass, 'calor_especifico': specific_heat, 'delta_temperatura': delta_t})
+
+@dataclass(frozen=True)
+class Body:
+    # SI: kg, K, J/(kg K) y J/kg. 'specific_heat' vale para las fases sin valor propio
+    mass: float
+    temperature: float
+    specific_heat: float
+    solid_specific_heat: Optional[float] = None
+    liquid_specific_heat: Optional[float] = None
+    gas_specific_heat: Optional[float] = None
+    melting_point: Optional[float] = None
+    latent_fusion: float = 0.0
+    boiling_point: Optional[float] = None
+    latent_vaporization: float = 0.0
+    # Fase inicial: necesaria si la temperatura es justo la de un cambio de fase (vapor a 100 °C)
+    phase: Optional[str] = None
+
+    def __post_init__(self):
+        if self.mass <= 0 or self.specific_heat <= 0:
+            raise ValueError("La masa y el calor específico deben ser positivos.")
+        if self.phase is not None and self.phase not in PHASES:
+            raise ValueError(f"Fase desconocida: {self.phase!r} ({', '.join(PHASES)}).")
+
+    @classmethod
+    def from_material(cls, name: str, mass: float, temperature: float, phase: Optional[str] = None) -> 'Body':
+        # Calor especifico de cada fase (de los materiales enlazados, p. ej. Agua -> Hielo) a la
+        # temperatura inicial llevada al intervalo de la fase; temperaturas y calores latentes
+        # del primer material de la sustancia que los tenga
+        from .materials import material_database
+
+        database = material_database()
+        linked = {phase_name: database.phase_material(name, phase_name) for phase_name in PHASES}
+        materials = [name] + [material for material in linked.values() if material != name]
+
+        def find(property_name: str, unit: str) -> Optional[float]:
+            for material in materials:
+                if database.has_property(database.material_id(material), property_name):
+                    return database.value(material, property_name, unit=unit)
+            return None
+
+        melting = find('temperatura_fusion', 'kelvin')
+        boiling = find('temperatura_ebullicion', 'kelvin')
+        latent_fusion = find('calor_latente_fusion', 'joule / kilogram')
+        latent_vaporization = find('calor_latente_vaporizacion', 'joule / kilogram')
+        low = -math.inf if melting is None else melting
+        high = math.inf if boiling is None else boiling
+        ranges = {'solido': (-math.inf, low), 'liquido': (low, high), 'gas': (high, math.inf)}
+
+        unit = 'joule / (kilogram * kelvin)'
+        heats = {phase_name: database.value(material, 'calor_especifico', min(max(temperature, ranges[phase_name][0]),
+                                                                               ranges[phase_name][1]), unit=unit)
+                 for phase_name, material in linked.items()}
+        return cls(mass, temperature, database.value(name, 'calor_especifico', temperature, unit=unit),
+                   solid_specific_heat=heats['solido'], liquid_specific_heat=heats['liquido'],
+                   gas_specific_heat=heats['gas'], melting_point=melting, latent_fusion=latent_fusion or 0.0,
+                   boiling_point=boiling, latent_vaporization=latent_vaporization or 0.0, phase=phase)
+
+@dataclass
+class EquilibriumResult:
+    # Arreglos (sistemas,) y (sistemas, cuerpos). 'fraction' es la parte de cada cuerpo que ya
+    # paso a la fase siguiente cuando el equilibrio queda en su meseta de cambio de fase
+    temperature: Any
+    phase: Any
+    fraction: Any
+    heat: Any
+
+@dataclass
+class ThermalSnapshot:
+    step: int
+    time: float
+    temperature: Any
+    phase: Any
+    fraction: Any
+    # Calor absorbido por cada cuerpo desde el instante inicial (J)
+    heat: Any
+
+class ThermalSystem:
+    # Cada parametro se difunde a la forma (sistemas, cuerpos); None o NaN en una temperatura de
+    # cambio de fase significa que el cuerpo no la tiene. 'phase' usa los indices de PHASES (-1: sin
+    # indicar). Una sustancia que empieza liquida o gaseosa sin temperatura de fusion se trata como
+    # si fundiera a 0 K, de modo que sus estados siempre quedan por encima de la meseta
+    def __init__(self, mass, temperature, specific_heat, solid_specific_heat=None, liquid_specific_heat=None,
+                 gas_specific_heat=None, melting_point=None, latent_fusion=0.0, boiling_point=None,
+                 latent_vaporization=0.0, phase=None):
+        import numpy as np
+
+        def array(values, default=np.nan):
+            return np.asarray(default if values is None else values, dtype=float)
+
+        arrays = np.broadcast_arrays(*(np.atleast_2d(value) for value in (
+            array(mass), array(temperature), array(specific_heat), array(solid_specific_heat),
+            array(liquid_specific_heat), array(gas_specific_heat), array(melting_point), array(latent_fusion),
+            array(boiling_point), array(latent_vaporization), array(phase, -1))))
+        (mass, temperature, specific_heat, c_solid, c_liquid, c_gas, melting, latent_fusion, boiling,
+         latent_vaporization, phase) = (np.array(value, dtype=float) for value in arrays)
+        phase = phase.astype(np.int8)
+        if np.any(mass <= 0) or np.any(~(specific_heat > 0)):
+            raise ValueError("La masa y el calor específico deben ser positivos.")
+
+        no_melting = np.isnan(melting)
+        no_boiling = np.isnan(boiling)
+        low_melting = no_melting & ((phase >= 1) | ((phase < 0) & ~no_boiling))
+        melting = np.where(low_melting, 0.0, np.where(no_melting, np.inf, melting))
+        boiling = np.where(no_boiling, np.where(phase == 2, melting, np.inf), boiling)
+        if np.any(boiling < melting):
+            raise ValueError("La temperatura de ebullición no puede ser menor que la de fusión.")
+
+        self.mass = mass
+        self.temperature = temperature
+        self.c_solid = np.where(np.isnan(c_solid), specific_heat, c_solid)
+        self.c_liquid = np.where(np.isnan(c_liquid), specific_heat, c_liquid)
+        self.c_gas = np.where(np.isnan(c_gas), specific_heat, c_gas)
+        self.melting = melting
+        self.boiling = boiling
+        self.latent_fusion = np.where(no_melting, 0.0, latent_fusion)
+        self.latent_vaporization = np.where(no_boiling, 0.0, latent_vaporization)
+
+        # Entalpia en los extremos de las mesetas: H1 -> H2 fusion, H3 -> H4 ebullicion
+        with np.errstate(invalid='ignore'):
+            self._h1 = _sensible(mass, self.c_solid, melting)
+            self._h2 = self._h1 + mass * self.latent_fusion
+            self._h3 = np.where(np.isinf(boiling), np.inf, self._h2 + _sensible(mass, self.c_liquid, boiling - melting))
+            self._h4 = self._h3 + mass * self.latent_vaporization
+        self._inverse = [1 / (mass * self.c_solid), 1 / (mass * self.c_liquid), 1 / (mass * self.c_gas)]
+        self._finite = [np.minimum(value, _NO_TRANSITION) for value in (self._h1, self._h2, self._h3, self._h4)]
+
+        known = phase >= 0
+        consistent = np.where(phase == 0, temperature <= melting,
+                              np.where(phase == 1, (melting <= temperature) & (temperature <= boiling),
+                                       temperature >= boiling))
+        if np.any(known & ~consistent):
+            raise ValueError("La fase inicial no corresponde a la temperatura inicial de algún cuerpo.")
+        self.initial_enthalpy = (self.enthalpy(temperature)
+                                 + mass * self.latent_fusion * ((phase >= 1) & (temperature == melting))
+                                 + mass * self.latent_vaporization * ((phase == 2) & (temperature == boiling)))
+
+    @classmethod
+    def from_bodies(cls, bodies: Union[Sequence[Body], Sequence[Sequence[Body]]]) -> 'ThermalSystem':
+        # Una lista de cuerpos es un sistema; una lista de listas (del mismo largo), un lote
+        import numpy as np
+
+        systems = [bodies] if isinstance(bodies[0], Body) else bodies
+        if len({len(system) for system in systems}) > 1:
+            raise ValueError("Todos los sistemas del lote deben tener el mismo número de cuerpos.")
+
+        def field(name: str):
+            return np.array([[np.nan if getattr(body, name) is None else getattr(body, name) for body in system]
+                             for system in systems], dtype=float)
+
+        phases = [[-1 if body.phase is None else PHASES.index(body.phase) for body in system] for system in systems]
+        return cls(field('mass'), field('temperature'), field('specific_heat'), field('solid_specific_heat'),
+                   field('liquid_specific_heat'), field('gas_specific_heat'), field('melting_point'),
+                   field('latent_fusion'), field('boiling_point'), field('latent_vaporization'), phases)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.mass.shape
+
+    def enthalpy(self, temperature, upper: bool = False):
+        # H(T) de cada cuerpo; en una meseta, al principio (upper=False) o al final de ella.
+        # Una temperatura por sistema (forma (sistemas,)) se aplica a todos sus cuerpos
+        import numpy as np
+
+        temperature = np.asarray(temperature, dtype=float)
+        if temperature.ndim == 1:
+            temperature = temperature[:, np.newaxis]
+        melted = temperature >= self.melting if upper else temperature > self.melting
+        boiled = temperature >= self.boiling if upper else temperature > self.boiling
+        return (_sensible(self.mass, self.c_solid, np.minimum(temperature, self.melting))
+                + self.mass * self.latent_fusion * melted
+                + _sensible(self.mass, self.c_liquid, np.maximum(np.minimum(temperature, self.boiling) - self.melting, 0))
+                + self.mass * self.latent_vaporization * boiled
+                + _sensible(self.mass, self.c_gas, np.maximum(temperature - self.boiling, 0)))
+
+    def temperature_from(self, enthalpy):
+        # Solo la temperatura, sin ramas: T = min(H, H1)/C_s + (H entre H2 y H3 - H2)/C_l
+        # + (H - H4)+/C_g; es lo que se evalua en cada paso del transitorio
+        import numpy as np
+
+        h1, h2, h3, h4 = self._finite
+        inverse_solid, inverse_liquid, inverse_gas = self._inverse
+        temperature = np.minimum(enthalpy, h1)
+        temperature *= inverse_solid
+        part = np.clip(enthalpy, h2, h3)
+        part -= h2
+        part *= inverse_liquid
+        temperature += part
+        np.maximum(enthalpy, h4, out=part)
+        part -= h4
+        part *= inverse_gas
+        temperature += part
+        return temperature
+
+    def state(self, enthalpy) -> Tuple[Any, Any, Any]:
+        # Inversa de H: temperatura, fase (indice de PHASES) y fraccion ya cambiada en una meseta
+        import numpy as np
+
+        h = np.asarray(enthalpy, dtype=float)
+        m = self.mass
+        with np.errstate(invalid='ignore', divide='ignore'):
+            conditions = [h <= self._h1, h <= self._h2, h <= self._h3, h <= self._h4]
+            temperature = np.select(conditions, [
+                h / (m * self.c_solid), self.melting, self.melting + (h - self._h2) / (m * self.c_liquid),
+                self.boiling], self.boiling + (h - self._h4) / (m * self.c_gas))
+            phase = np.select(conditions, [0, 0, 1, 1], 2).astype(np.int8)
+            fraction = np.select(conditions[1:2] + conditions[3:4], [
+                (h - self._h1) / (m * self.latent_fusion), (h - self._h3) / (m * self.latent_vaporization)], 0.0)
+        on_plateau = (~conditions[0] & conditions[1]) | (~conditions[2] & conditions[3])
+        fraction = np.where(on_plateau, np.nan_to_num(fraction), 0.0)
+        # Al final de la meseta el cuerpo ya esta entero en la fase siguiente
+        changed = fraction >= 1
+        return temperature, phase + changed, np.where(changed, 0.0, fraction)
+
+    def capacity(self):
+        # Menor capacidad calorifica de cada cuerpo entre sus fases (J/K), para el paso estable
+        import numpy as np
+        return self.mass * np.minimum(np.minimum(self.c_solid, self.c_liquid), self.c_gas)
+
+    def equilibrium(self) -> EquilibriumResult:
+        import numpy as np
+
+        energy = self.initial_enthalpy.sum(axis=1)
+        low = self.temperature.min(axis=1)
+        high = self.temperature.max(axis=1)
+        for _ in range(BISECTION_STEPS):
+            if np.all(high - low <= 1e-13 * high):
+                break
+            middle = 0.5 * (low + high)
+            above = self.enthalpy(middle).sum(axis=1) > energy
+            high = np.where(above, middle, high)
+            low = np.where(above, low, middle)
+        temperature = 0.5 * (low + high)
+
+        # Si el equilibrio cae en una meseta, la biseccion solo se acerca a la temperatura del
+        # cambio de fase: se ajusta a ella y el resto de la energia se reparte entre las mesetas.
+        # Los cuerpos que empezaron por encima ceden primero su calor latente (el vapor se condensa
+        # antes de que se funda el hielo) y los que empezaron por debajo lo absorben despues
+        transitions = np.concatenate([self.melting, self.boiling], axis=1)
+        distance = np.abs(transitions - temperature[:, np.newaxis])
+        nearest = distance.argmin(axis=1)
+        rows = np.arange(len(temperature))
+        snap = distance[rows, nearest] <= SNAP_TOLERANCE * np.maximum(1.0, temperature)
+        temperature = np.where(snap, transitions[rows, nearest], temperature)
+
+        lower = self.enthalpy(temperature)
+        jump = self.enthalpy(temperature, upper=True) - lower
+        started_above = self.initial_enthalpy >= lower + jump
+        jump_above = (jump * started_above).sum(axis=1)
+        jump_below = (jump * ~started_above).sum(axis=1)
+        residual = energy - lower.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share_above = np.where(jump_above > 0, np.clip(residual / jump_above, 0.0, 1.0), 0.0)
+            share_below = np.where(jump_below > 0, np.clip((residual - jump_above) / jump_below, 0.0, 1.0), 0.0)
+        final = lower + jump * np.where(started_above, share_above[:, np.newaxis], share_below[:, np.newaxis])
+
+        _, phase, fraction = self.state(final)
+        return EquilibriumResult(temperature, phase, fraction, final - self.initial_enthalpy)
+
+def _links(pairs: Sequence[Tuple[int, int]], bodies: int):
+    import numpy as np
+
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    if pairs.size and (pairs.min() < 0 or pairs.max() >= bodies):
+        raise ValueError(f"Índice de cuerpo fuera de rango (hay {bodies} cuerpos).")
+    return pairs[:, 0], pairs[:, 1]
+
+def simulate(system: ThermalSystem, pairs: Sequence[Tuple[int, int]], conductance: Any, duration: float,
+             dt: float, every: int = 1, ambient_temperature: Optional[float] = None, ambient_conductance: Any = 0.0,
+             tolerance: Optional[float] = None) -> Iterator[ThermalSnapshot]:
+    # 'pairs' son los enlaces (i, j) entre cuerpos y 'conductance' su conductancia en W/K (por
+    # enlace, o (sistemas, enlaces)). Se emite una instantanea cada 'every' pasos de 'dt' segundos,
+    # y al final; 'tolerance' (K/s) termina antes si todos los cuerpos estan en equilibrio. Si 'dt'
+    # supera el paso estable de Euler, cada paso se divide en subpasos
+    import numpy as np
+
+    if dt <= 0 or duration < 0 or every < 1:
+        raise ValueError("El paso de tiempo, la duración y 'every' deben ser positivos.")
+    systems, bodies = system.shape
+    first, second = _links(pairs, bodies)
+    conductance = np.broadcast_to(np.asarray(conductance, dtype=float), (systems, len(first)))
+    ambient_conductance = np.broadcast_to(np.asarray(ambient_conductance, dtype=float), (systems, bodies))
+    if np.any(conductance < 0) or np.any(ambient_conductance < 0):
+        raise ValueError("Las conductancias no pueden ser negativas.")
+    if ambient_temperature is None:
+        ambient_conductance = np.zeros((systems, bodies))
+        ambient_temperature = 0.0
+
+    # Indices planos para sumar los flujos de todos los sistemas con un solo bincount
+    offset = (np.arange(systems) * bodies)[:, np.newaxis]
+    into_first = (offset + first).ravel()
+    into_second = (offset + second).ravel()
+    size = systems * bodies
+
+    # bincount devuelve enteros si no hay enlaces: se fuerza float para los += siguientes
+    coupling = (np.bincount(into_first, conductance.ravel(), size)
+                + np.bincount(into_second, conductance.ravel(), size)).astype(float).reshape(systems, bodies)
+    coupling += ambient_conductance
+    capacity = system.capacity()
+    with np.errstate(divide='ignore'):
+        stable = np.min(np.where(coupling > 0, capacity / coupling, np.inf))
+    substeps = max(1, math.ceil(dt / stable)) if np.isfinite(stable) else 1
+    h = dt / substeps
+    steps = max(0, math.ceil(duration / dt - 1e-9))
+
+    enthalpy = system.initial_enthalpy.copy()
+    temperature, phase, fraction = system.state(enthalpy)
+    yield ThermalSnapshot(0, 0.0, temperature, phase, fraction, enthalpy - system.initial_enthalpy)
+
+    for step in range(1, steps + 1):
+        for _ in range(substeps):
+            flow = conductance * (temperature[:, second] - temperature[:, first])
+            net = (np.bincount(into_first, flow.ravel(), size)
+                   - np.bincount(into_second, flow.ravel(), size)).astype(float).reshape(systems, bodies)
+            net += ambient_conductance * (ambient_temperature - temperature)
+            enthalpy += h * net
+            temperature = system.temperature_from(enthalpy)
+
+        settled = tolerance is not None and np.max(np.abs(net) / capacity) < tolerance
+        if step % every == 0 or step == steps or settled:
+            temperature, phase, fraction = system.state(enthalpy)
+            yield ThermalSnapshot(step, step * dt, temperature, phase, fraction, enthalpy - system.initial_enthalpy)
+        if settled:
+            return
+
+def equilibrium(bodies: Union[Sequence[Body], Sequence[Sequence[Body]]]) -> EquilibriumResult:
+    return ThermalSystem.from_bodies(bodies).equilibrium()
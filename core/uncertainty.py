@@ -0,0 +1,251 @@
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .formulas.base_formula import BaseFormula
+from .kernels import CompiledKernel, compile_formula
+
+# Propagacion de incertidumbres sobre los kernels compilados, en dos modos:
+#
+#   linealizado: sigma_f^2 = sum (df/dx_i * sigma_i)^2 con las derivadas parciales simbolicas de
+#                la formula (sympy una sola vez; el codigo queda en la cache de usuario)
+#   Monte Carlo: muestras por bloques de NumPy con memoria fija; media y varianza se acumulan
+#                por bloque y el intervalo del 95 % sale de una submuestra de tamano acotado
+#
+# Las entradas son Measurement (valor, incertidumbre, distribucion) en las unidades del kernel.
+
+DISTRIBUTIONS = ('normal', 'uniform', 'triangular')
+DEFAULT_SAMPLES = 1_000_000
+DEFAULT_CHUNK_SIZE = 100_000
+# Muestras que se conservan en total para estimar el intervalo de confianza
+QUANTILE_SAMPLES = 200_000
+
+@dataclass(frozen=True)
+class Measurement:
+    value: float
+    # normal: desviacion tipica; uniform y triangular: semiancho del intervalo (valor ± a)
+    uncertainty: float = 0.0
+    distribution: str = 'normal'
+
+    def __post_init__(self):
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribución desconocida: {self.distribution!r} ({', '.join(DISTRIBUTIONS)}).")
+        if self.uncertainty < 0:
+            raise ValueError("La incertidumbre no puede ser negativa.")
+
+    @property
+    def standard_uncertainty(self) -> float:
+        if self.distribution == 'uniform':
+            return self.uncertainty / math.sqrt(3)
+        if self.distribution == 'triangular':
+            return self.uncertainty / math.sqrt(6)
+        return self.uncertainty
+
+    def sample(self, rng, size: int) -> Any:
+        if not self.uncertainty:
+            return self.value
+        if self.distribution == 'uniform':
+            return rng.uniform(self.value - self.uncertainty, self.value + self.uncertainty, size)
+        if self.distribution == 'triangular':
+            return rng.triangular(self.value - self.uncertainty, self.value, self.value + self.uncertainty, size)
+        return rng.normal(self.value, self.uncertainty, size)
+
+    @classmethod
+    def parse(cls, text: str, distribution: str = 'normal') -> 'Measurement':
+        # Acepta "12.5", "12.5 ± 0.3" y "12.5 +- 0.3" (con coma o punto decimal)
+        parts = re.split(r'±|\+/?-', text.replace(',', '.'))
+        if len(parts) > 2:
+            raise ValueError(f"Valor con incertidumbre no válido: {text!r}")
+        value = float(parts[0])
+        uncertainty = float(parts[1]) if len(parts) == 2 and parts[1].strip() else 0.0
+        return cls(value, abs(uncertainty), distribution)
+
+def as_measurement(value: Union['Measurement', float, Tuple[float, float]]) -> 'Measurement':
+    if isinstance(value, Measurement):
+        return value
+    if isinstance(value, tuple):
+        return Measurement(*value)
+    return Measurement(float(value))
+
+@dataclass
+class UncertainResult:
+    value: float
+    uncertainty: float
+    unit: str
+    method: str
+    samples: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    # Linealizado: aporte |df/dx_i| * sigma_i de cada entrada
+    contributions: Dict[str, float] = field(default_factory=dict)
+    # Monte Carlo: intervalo del 95 % (percentiles 2.5 y 97.5)
+    interval: Optional[Tuple[float, float]] = None
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds > 0 else float('inf')
+
+class _Moments:
+    # Media y suma de cuadrados de desviaciones combinables por bloques (Chan et al.)
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count, self.mean, self.m2 = count, mean, m2
+
+    def merge(self, count: int, mean: float, m2: float):
+        if not count:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+def _chunk_statistics(kernel: CompiledKernel, measurements: Sequence[Measurement], size: int, seed,
+                      keep: int) -> Tuple[int, float, float, int, Any]:
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    arguments = [measurement.sample(rng, size) for measurement in measurements]
+    with np.errstate(all='ignore'):
+        results = np.broadcast_to(np.asarray(kernel(*arguments), dtype=float), (size,))
+    finite = results[np.isfinite(results)]
+    rejected = size - finite.size
+    if not finite.size:
+        return 0, 0.0, 0.0, rejected, finite
+    mean = float(finite.mean())
+    m2 = float(((finite - mean) ** 2).sum())
+    kept = finite if finite.size <= keep else rng.choice(finite, keep, replace=False)
+    return finite.size, mean, m2, rejected, kept
+
+def _process_chunk(task: tuple) -> tuple:
+    formula_class, units, target_unit, unknown, measurements, size, seed, keep = task
+    from .kernels import _compile
+    return _chunk_statistics(_compile(formula_class, units, target_unit, unknown), measurements, size, seed, keep)
+
+class UncertaintyPropagator:
+    # Se construye en el hilo que puede usar pint y sympy (el de la interfaz); linearized() y
+    # monte_carlo() solo usan NumPy y el kernel ya compilado
+    def __init__(self, formula: BaseFormula, units: Optional[Sequence[str]] = None,
+                 target_unit: Optional[str] = None, unknown: Optional[str] = None, gradient: bool = True):
+        self.formula = formula
+        self.kernel = compile_formula(formula, units, target_unit, unknown)
+        self.gradient = None
+        if gradient:
+            self.gradient = self._load_gradient()
+
+    def _load_gradient(self) -> Optional[Callable]:
+        if not self.kernel.native:
+            return None
+        from .symbolic import load_gradient
+        try:
+            args, function = load_gradient(self.formula, self.kernel.unknown)
+        except Exception:
+            # Sin derivadas simbolicas se recurre a diferencias finitas
+            return None
+        return lambda si_values: function(*(si_values[name] for name in args))
+
+    @property
+    def var_names(self) -> List[str]:
+        return self.kernel.var_names
+
+    def _measurements(self, inputs: Mapping[str, Any]) -> List[Measurement]:
+        missing = [name for name in self.var_names if name not in inputs]
+        if missing:
+            raise KeyError(f"Faltan datos para '{self.formula.name}': {', '.join(missing)}.")
+        return [as_measurement(inputs[name]) for name in self.var_names]
+
+    def _partials(self, values: List[float]) -> List[float]:
+        # Derivadas de la salida (en su unidad) respecto a cada entrada (en la suya)
+        kernel = self.kernel
+        if self.gradient is not None:
+            si_values = dict(kernel.constants)
+            for name, value, (scale, offset) in zip(kernel.var_names, values, kernel.conversions):
+                si_values[name] = value * scale + offset
+            partials = self.gradient(si_values)
+            return [float(partial) * scale / kernel.target_scale
+                    for partial, (scale, _) in zip(partials, kernel.conversions)]
+
+        partials = []
+        for index, value in enumerate(values):
+            step = 1e-6 * abs(value) or 1e-6
+            upper, lower = list(values), list(values)
+            upper[index] += step
+            lower[index] -= step
+            partials.append((float(kernel(*upper)) - float(kernel(*lower))) / (2 * step))
+        return partials
+
+    def linearized(self, inputs: Mapping[str, Any]) -> UncertainResult:
+        start = time.perf_counter()
+        measurements = self._measurements(inputs)
+        values = [measurement.value for measurement in measurements]
+        nominal = float(self.kernel(*values))
+
+        contributions = {}
+        for name, partial, measurement in zip(self.var_names, self._partials(values), measurements):
+            if measurement.uncertainty:
+                contributions[name] = abs(partial) * measurement.standard_uncertainty
+        uncertainty = math.sqrt(sum(value * value for value in contributions.values()))
+        return UncertainResult(nominal, uncertainty, self.kernel.target_unit, 'linealizado',
+                               seconds=time.perf_counter() - start, contributions=contributions)
+
+    def monte_carlo(self, inputs: Mapping[str, Any], samples: int = DEFAULT_SAMPLES,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1, seed: Optional[int] = None,
+                    cancelled: Optional[Callable[[], bool]] = None) -> Optional[UncertainResult]:
+        # Cada bloque usa su propia semilla derivada de 'seed': el resultado no depende de workers
+        import numpy as np
+
+        start = time.perf_counter()
+        measurements = self._measurements(inputs)
+        sizes = [min(chunk_size, samples - offset) for offset in range(0, samples, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        keep = max(1, QUANTILE_SAMPLES // max(1, len(sizes)))
+
+        moments = _Moments()
+        rejected = 0
+        kept = []
+        if workers <= 1:
+            chunks = (_chunk_statistics(self.kernel, measurements, size, chunk_seed, keep)
+                      for size, chunk_seed in zip(sizes, seeds))
+        else:
+            from .batch import _ordered_map
+            kernel = self.kernel
+            tasks = ((type(self.formula), tuple(kernel.units), kernel.target_unit, kernel.unknown,
+                      measurements, size, chunk_seed, keep) for size, chunk_seed in zip(sizes, seeds))
+            chunks = _ordered_map(_process_chunk, tasks, workers)
+
+        for count, mean, m2, chunk_rejected, chunk_kept in chunks:
+            if cancelled is not None and cancelled():
+                return None
+            moments.merge(count, mean, m2)
+            rejected += chunk_rejected
+            kept.append(chunk_kept)
+
+        if not moments.count:
+            raise ValueError("Ninguna muestra produjo un resultado finito.")
+        low, high = np.percentile(np.concatenate(kept), [2.5, 97.5])
+        return UncertainResult(moments.mean, moments.std, self.kernel.target_unit, 'Monte Carlo',
+                               samples=samples, rejected=rejected, seconds=time.perf_counter() - start,
+                               interval=(float(low), float(high)))
+
+def propagate(formula: BaseFormula, inputs: Mapping[str, Any], units: Optional[Mapping[str, str]] = None,
+              method: str = 'linear', target_unit: Optional[str] = None, unknown: Optional[str] = None,
+              **options) -> UncertainResult:
+    # Atajo: inputs mapea cada variable a un Measurement, a (valor, sigma) o a un numero exacto
+    from .kernels import default_units
+
+    names = [var[0] for var in list(formula.variables) + [formula.target_variable]
+             if var[0] != (unknown or formula.target_variable[0])]
+    defaults = dict(zip(names, default_units(formula, unknown)))
+    units = units or {}
+    propagator = UncertaintyPropagator(formula, [units.get(name, defaults[name]) for name in names],
+                                       target_unit, unknown, gradient=method == 'linear')
+    if method == 'linear':
+        return propagator.linearized(inputs)
+    if method == 'monte_carlo':
+        return propagator.monte_carlo(inputs, **options)
+    raise ValueError(f"Método desconocido: {method!r} (linear o monte_carlo).")
@@ -0,0 +1,222 @@
+import math
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .formulas.base_formula import BaseFormula
+
+# Indice de compatibilidad de unidades por formula. Se construye una vez, a partir de la
+# dimensionalidad de pint y de los exponentes de cada variable en equation(), cuando la formula
+# se registra en el catalogo. Cada cambio de unidad solo revisa las comprobaciones de esa variable.
+#
+#   same_scale:  variables de igual dimension (V_i y V_f, c_1 y c_2): misma unidad recomendada
+#   absolute:    temperaturas absolutas (T en pV = nRT)
+#   difference:  diferencias de temperatura (variables \Delta o unidades delta_*)
+#   cancel:      unidades que se cancelan en la ecuacion (los gramos de m y de c en Q = m c ΔT)
+
+SAME_SCALE = 'same_scale'
+ABSOLUTE_TEMPERATURE = 'absolute'
+TEMPERATURE_DIFFERENCE = 'difference'
+CANCELLING = 'cancel'
+
+TEMPERATURE = '[temperature]'
+
+DIMENSION_NAMES = {
+    '[mass]': 'masa',
+    '[length]': 'longitud',
+    '[length] ** 3': 'volumen',
+    '[time]': 'tiempo',
+    '[temperature]': 'temperatura',
+    '[substance]': 'cantidad de sustancia',
+    '[current]': 'corriente',
+    '[mass] / [length] / [time] ** 2': 'presión',
+    '[mass] * [length] ** 2 / [time] ** 2': 'energía',
+}
+
+@dataclass(frozen=True)
+class UnitCheck:
+    kind: str
+    variables: Tuple[str, ...]
+    dimension: str = ''
+    # Advertencia con las unidades por defecto, para no necesitar pint hasta que cambien
+    default_warning: str = ''
+
+    def to_json(self) -> list:
+        return [self.kind, list(self.variables), self.dimension, self.default_warning]
+
+    @classmethod
+    def from_json(cls, data: list) -> 'UnitCheck':
+        kind, variables, dimension, default_warning = data
+        return cls(kind, tuple(variables), dimension, default_warning)
+
+def _label(var_name: str) -> str:
+    return f"'{var_name.replace('_', ' ')}'"
+
+def _dimension_name(dimension: str) -> str:
+    name = DIMENSION_NAMES.get(dimension)
+    return f" de {name}" if name else ""
+
+@lru_cache(maxsize=None)
+def dimension_of(unit: str) -> str:
+    from .unit_handler import ureg
+    return str(ureg.Unit(unit).dimensionality)
+
+@lru_cache(maxsize=None)
+def unit_components(unit: str) -> Tuple[Tuple[str, str, float, float], ...]:
+    # (nombre, dimension, exponente, escala SI) de cada unidad simple que forma 'unit'
+    from .kernels import si_conversion
+    from .unit_handler import Q_
+
+    return tuple((name, dimension_of(name), float(exponent), si_conversion(name)[0])
+                 for name, exponent in Q_(1.0, unit).unit_items())
+
+def is_delta_unit(unit: str) -> bool:
+    return any(name.startswith('delta_') for name, *_ in unit_components(unit))
+
+def is_offset_unit(unit: str) -> bool:
+    from .kernels import si_conversion
+    return si_conversion(unit)[1] != 0
+
+def _same_conversion(first: Tuple[float, float], second: Tuple[float, float]) -> bool:
+    return all(math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-12) for a, b in zip(first, second))
+
+def check_warning(check: UnitCheck, units: Sequence[str]) -> str:
+    # Advertencia para las unidades dadas (en el orden de check.variables), o '' si no hay problema
+    from .kernels import si_conversion
+
+    if check.kind == SAME_SCALE:
+        first = si_conversion(units[0])
+        if all(_same_conversion(first, si_conversion(unit)) for unit in units[1:]):
+            return ''
+        names = ", ".join(_label(name) for name in check.variables)
+        return f"Se recomienda usar la misma unidad{_dimension_name(check.dimension)} para {names}"
+
+    if check.kind == ABSOLUTE_TEMPERATURE:
+        unit = units[0]
+        if is_delta_unit(unit):
+            return f"{_label(check.variables[0])} requiere temperatura absoluta, no una diferencia (use kelvin)"
+        if is_offset_unit(unit):
+            return f"{_label(check.variables[0])} es una temperatura absoluta: se convierte a kelvin antes de calcular"
+        return ''
+
+    if check.kind == TEMPERATURE_DIFFERENCE:
+        if is_offset_unit(units[0]):
+            return f"{_label(check.variables[0])} es una diferencia de temperatura: use kelvin o delta_degree_Celsius"
+        return ''
+
+    if check.kind == CANCELLING:
+        found = []
+        for unit in units:
+            component = next((c for c in unit_components(unit) if c[1] == check.dimension), None)
+            if component is None:
+                return ''
+            found.append(component)
+        if all(math.isclose(found[0][3], component[3]) for component in found[1:]):
+            return ''
+        first, second = check.variables
+        return (f"{_label(first)} y {_label(second)} usan unidades{_dimension_name(check.dimension)} "
+                f"distintas ({found[0][0]} / {found[1][0]})")
+
+    raise ValueError(f"Comprobación desconocida: {check.kind}")
+
+def equation_powers(formula: BaseFormula) -> Dict[str, float]:
+    # Exponente de cada variable si la ecuacion es una potencia en ella (f ~ x^p). Se estima
+    # numericamente en dos puntos; las variables que entran en sumas o logaritmos se omiten.
+    if type(formula).equation is BaseFormula.equation:
+        return {}
+
+    names = [var[0] for var in formula.variables]
+    constants = {symbol: 1.0 for symbol in formula.constants}
+
+    def evaluate(values: Dict[str, float]) -> float:
+        return float(formula.equation({**values, **constants}))
+
+    points = [{name: 1.3 + 0.37 * i for i, name in enumerate(names)},
+              {name: 2.9 - 0.23 * i for i, name in enumerate(names)}]
+    powers = {}
+    for name in names:
+        estimates = []
+        try:
+            for point in points:
+                doubled = dict(point, **{name: point[name] * 2})
+                estimates.append(math.log(abs(evaluate(doubled) / evaluate(point)), 2))
+        except (ArithmeticError, ValueError):
+            continue
+        if math.isclose(estimates[0], estimates[1], abs_tol=1e-9) and abs(estimates[0]) > 1e-9:
+            powers[name] = round(estimates[0], 6)
+    return powers
+
+def build_checks(formula: BaseFormula) -> Tuple[UnitCheck, ...]:
+    variables = list(formula.variables)
+    dimensions = {name: dimension_of(unit) for name, _, unit in variables}
+    checks: List[UnitCheck] = []
+
+    groups: Dict[str, List[str]] = {}
+    for name, _, _ in variables:
+        groups.setdefault(dimensions[name], []).append(name)
+    for dimension, names in groups.items():
+        if len(names) > 1:
+            checks.append(UnitCheck(SAME_SCALE, tuple(names), dimension))
+
+    for name, symbol, unit in variables:
+        if dimensions[name] == TEMPERATURE:
+            difference = is_delta_unit(unit) or symbol.lstrip().startswith(r'\Delta')
+            checks.append(UnitCheck(TEMPERATURE_DIFFERENCE if difference else ABSOLUTE_TEMPERATURE,
+                                    (name,), TEMPERATURE))
+
+    # Dos variables se cancelan en una dimension si aportan exponentes de signo opuesto
+    powers = equation_powers(formula)
+    contributions: Dict[str, List[Tuple[str, float]]] = {}
+    for name, _, unit in variables:
+        if name in powers:
+            for _, dimension, exponent, _ in unit_components(unit):
+                contributions.setdefault(dimension, []).append((name, powers[name] * exponent))
+    pairs = {}
+    for dimension, members in contributions.items():
+        for position, (first, first_sign) in enumerate(members):
+            for second, second_sign in members[position + 1:]:
+                if first == second or first_sign * second_sign >= 0 or dimensions[first] == dimensions[second]:
+                    continue
+                pairs.setdefault((first, second, dimension), UnitCheck(CANCELLING, (first, second), dimension))
+    checks.extend(pairs.values())
+
+    defaults = {name: unit for name, _, unit in variables}
+    return tuple(replace(check, default_warning=check_warning(check, [defaults[name] for name in check.variables]))
+                 for check in checks)
+
+class ConsistencyIndex:
+    def __init__(self, variables: Sequence[Tuple[str, str, str]], checks: Sequence[UnitCheck]):
+        self.defaults = {name: unit for name, _, unit in variables}
+        self.checks = tuple(checks)
+        by_variable: Dict[str, List[int]] = {name: [] for name in self.defaults}
+        for position, check in enumerate(self.checks):
+            for name in check.variables:
+                by_variable[name].append(position)
+        self.by_variable: Dict[str, Tuple[int, ...]] = {name: tuple(p) for name, p in by_variable.items()}
+
+    def default_warnings(self) -> Dict[int, str]:
+        return {position: check.default_warning for position, check in enumerate(self.checks)
+                if check.default_warning}
+
+    def evaluate(self, position: int, unit_of: Callable[[str], Optional[str]]) -> str:
+        check = self.checks[position]
+        units = [unit_of(name) or self.defaults[name] for name in check.variables]
+        if all(unit == self.defaults[name] for name, unit in zip(check.variables, units)):
+            return check.default_warning
+        return check_warning(check, units)
+
+    def warnings(self, unit_of: Callable[[str], Optional[str]]) -> Dict[int, str]:
+        results = {}
+        for position in range(len(self.checks)):
+            warning = self.evaluate(position, unit_of)
+            if warning:
+                results[position] = warning
+        return results
+
+@lru_cache(maxsize=None)
+def _index_for_class(formula_class: type) -> ConsistencyIndex:
+    formula = formula_class()
+    return ConsistencyIndex(formula.variables, build_checks(formula))
+
+def consistency_index(formula: BaseFormula) -> ConsistencyIndex:
+    return _index_for_class(type(formula))
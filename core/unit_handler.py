@@ -1,6 +1,57 @@
-import pint
+import threading
 
-ureg = pint.UnitRegistry()
-Q_ = ureg.Quantity
+from .instrumentation import timed
+from .user_cache import user_cache_dir
 
-print("UnitRegistry inicializado")
\ No newline at end of file
+# El UnitRegistry de pint tarda en construirse, asi que se crea en el primer uso.
+# Las definiciones ya procesadas se guardan en la cache de usuario para los siguientes arranques.
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                import pint
+
+                cache_dir = user_cache_dir('pint')
+                try:
+                    _registry = pint.UnitRegistry(cache_folder=cache_dir)
+                except (OSError, TypeError, ImportError):
+                    _registry = pint.UnitRegistry()
+                _instrument_conversions(_registry)
+    return _registry
+
+def _instrument_conversions(registry):
+    # La clase Quantity es propia de cada registro: solo se instrumentan las conversiones de este
+    quantity = registry.Quantity
+    for method in ('to', 'to_base_units'):
+        setattr(quantity, method, timed(f"pint.{method}")(getattr(quantity, method)))
+
+def registry_loaded() -> bool:
+    return _registry is not None
+
+class _LazyRegistry:
+    def __getattr__(self, name):
+        return getattr(get_registry(), name)
+
+    def __call__(self, *args, **kwargs):
+        return get_registry()(*args, **kwargs)
+
+    def __repr__(self):
+        return repr(get_registry()) if registry_loaded() else "<UnitRegistry (sin inicializar)>"
+
+class _LazyQuantity:
+    @timed('pint.Q_')
+    def __call__(self, *args, **kwargs):
+        return get_registry().Quantity(*args, **kwargs)
+
+    def __instancecheck__(self, instance) -> bool:
+        return registry_loaded() and isinstance(instance, _registry.Quantity)
+
+    def __repr__(self):
+        return "Q_"
+
+ureg = _LazyRegistry()
+Q_ = _LazyQuantity()
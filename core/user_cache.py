@@ -0,0 +1,61 @@
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+APP_NAME = "CalculadoraFisica"
+
+def user_cache_dir(*parts: str) -> Optional[Path]:
+    # CALCULADORA_CACHE_DIR permite redirigir la cache; "off" la desactiva por completo
+    override = os.environ.get("CALCULADORA_CACHE_DIR")
+    if override is not None and override.strip().lower() in ("", "0", "off", "none"):
+        return None
+
+    if override:
+        base = Path(override)
+    elif sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local")) / APP_NAME / "Cache"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches" / APP_NAME
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / APP_NAME
+
+    path = base.joinpath(*parts)
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return path
+
+def user_data_dir(*parts: str) -> Optional[Path]:
+    # Datos que no se pueden regenerar (historial); CALCULADORA_DATA_DIR los redirige u "off" los desactiva
+    override = os.environ.get("CALCULADORA_DATA_DIR")
+    if override is not None and override.strip().lower() in ("", "0", "off", "none"):
+        return None
+
+    if override:
+        base = Path(override)
+    elif sys.platform == "win32":
+        base = Path(os.environ.get("APPDATA", Path.home() / "AppData" / "Roaming")) / APP_NAME
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support" / APP_NAME
+    else:
+        base = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share")) / APP_NAME
+
+    path = base.joinpath(*parts)
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return path
+
+def write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
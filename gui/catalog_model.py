@@ -0,0 +1,76 @@
+import bisect
+from typing import List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from core.formula_manager import FormulaEntry
+
+class FormulaListModel(QAbstractListModel):
+    # Catalogo ordenado por nombre y filtrado con SearchIndex. Las filas visibles son posiciones
+    # en 'entries'; las vistas piden solo las filas que pintan. Fuera del modelo las formulas se
+    # identifican por FormulaEntry.key (modulo, clase), nunca por el numero de fila ni por el
+    # nombre, que se usa solo para mostrar y buscar: dos modulos pueden repetir un nombre
+    EntryRole = Qt.UserRole + 1
+
+    def __init__(self, entries: Sequence[FormulaEntry], parent=None):
+        super().__init__(parent)
+        self.entries: List[FormulaEntry] = sorted(entries, key=lambda entry: (entry.name, entry.key))
+        self.positions = {entry.key: position for position, entry in enumerate(self.entries)}
+        self.query = ""
+        # None: sin filtro (todas las filas)
+        self._rows: Optional[List[int]] = None
+        self._index = None
+
+    def search_index(self):
+        # Se construye con la primera busqueda, no al arrancar
+        if self._index is None:
+            from core.formula_search import SearchIndex
+            self._index = SearchIndex(self.entries)
+        return self._index
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.entries) if self._rows is None else len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        entry = self.entry(index)
+        if entry is None:
+            return None
+        if role == Qt.DisplayRole:
+            return entry.name
+        if role == Qt.ToolTipRole:
+            return entry.description
+        if role == self.EntryRole:
+            return entry
+        return None
+
+    def entry(self, index: QModelIndex) -> Optional[FormulaEntry]:
+        if not index.isValid() or not 0 <= index.row() < self.rowCount():
+            return None
+        row = index.row()
+        return self.entries[row if self._rows is None else self._rows[row]]
+
+    def index_of(self, key: Tuple[str, str]) -> QModelIndex:
+        # Fila actual de una formula; indice invalido si no existe o esta filtrada
+        position = self.positions.get(key)
+        if position is None:
+            return QModelIndex()
+        if self._rows is None:
+            return self.index(position)
+        row = bisect.bisect_left(self._rows, position)
+        if row < len(self._rows) and self._rows[row] == position:
+            return self.index(row)
+        return QModelIndex()
+
+    def set_filter(self, query: str):
+        query = query.strip()
+        if query == self.query:
+            return
+        rows = self.search_index().search(query) if query else None
+        self.query = query
+        if rows == self._rows:
+            return
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
@@ -0,0 +1,80 @@
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QPixmap
+
+from core.user_cache import user_cache_dir, write_atomic
+
+RENDER_VERSION = 1
+
+def render_latex_image(latex: str, fontsize: float = 20, dpi: int = 100) -> QImage:
+    # Se usa el parser de mathtext directamente: no hace falta crear una Figure ni un canvas
+    import numpy as np
+    from matplotlib import mathtext
+    from matplotlib.font_manager import FontProperties
+
+    parser = mathtext.MathTextParser('agg')
+    parsed = parser.parse(f"${latex}$", dpi=dpi, prop=FontProperties(size=fontsize))
+    alpha = np.asarray(parsed.image, dtype=np.uint8)
+
+    height, width = alpha.shape
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    rgba[..., 3] = alpha
+
+    image = QImage(rgba.data, width, height, 4 * width, QImage.Format_RGBA8888)
+    return image.copy()
+
+class LatexRenderCache:
+    def __init__(self, cache_dir: Optional[Path] = None, max_items: int = 256):
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.pixmaps = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'renders': 0}
+
+    @staticmethod
+    def cache_key(latex: str, fontsize: float, dpi: int) -> str:
+        return hashlib.sha256(f"{RENDER_VERSION}|{latex}|{fontsize}|{dpi}".encode('utf-8')).hexdigest()
+
+    def pixmap(self, latex: str, fontsize: float = 20, dpi: int = 100) -> QPixmap:
+        key = self.cache_key(latex, fontsize, dpi)
+
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return pixmap
+
+        path = self.cache_dir / f"{key}.png" if self.cache_dir else None
+        image = QImage()
+        if path is not None and path.is_file() and image.load(str(path), 'PNG'):
+            self.stats['disk_hits'] += 1
+        else:
+            image = render_latex_image(latex, fontsize, dpi)
+            self.stats['renders'] += 1
+            if path is not None:
+                data = QByteArray()
+                buffer = QBuffer(data)
+                buffer.open(QIODevice.WriteOnly)
+                image.save(buffer, 'PNG')
+                buffer.close()
+                write_atomic(path, bytes(data))
+
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[key] = pixmap
+        while len(self.pixmaps) > self.max_items:
+            self.pixmaps.popitem(last=False)
+        return pixmap
+
+    def clear_memory(self):
+        self.pixmaps.clear()
+
+_latex_cache: Optional[LatexRenderCache] = None
+
+def get_latex_cache() -> LatexRenderCache:
+    global _latex_cache
+    if _latex_cache is None:
+        _latex_cache = LatexRenderCache(user_cache_dir('latex'))
+    return _latex_cache
@@ -1,24 +1,41 @@
 import sys
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                               QListWidget, QStackedWidget, QLabel, QHBoxLayout,
-                               QSplitter)
+                               QListView, QLineEdit, QStackedWidget, QLabel, QHBoxLayout,
+                               QSplitter, QScrollArea, QDockWidget)
+from PySide6.QtGui import QKeySequence
 from PySide6.QtCore import Qt
 
-from core.formula_manager import load_formulas
+from core.formula_manager import FormulaEntry, load_catalog
+from .catalog_model import FormulaListModel
 from .widgets.formula_view import FormulaView
 
+MAX_LIVE_VIEWS = 8
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, catalog: Optional[List[FormulaEntry]] = None):
         super().__init__()
         self.setWindowTitle("Calculadora")
         self.setGeometry(100, 100, 900, 600)
         
         self.statusBar().showMessage("Calculadora lista.", 3000)
 
-        self.formulas = {f.name: f() for f in load_formulas()}
+        if catalog is None:
+            catalog = load_catalog()
+        self.formulas = {entry.key: entry for entry in catalog}
+        self.catalog_model = FormulaListModel(catalog, self)
+        # Clave (modulo, clase) de la formula mostrada: sigue siendo la misma aunque el filtro cambie
+        # las filas
+        self.current_formula = None
+        # Solo se mantienen vivas las vistas usadas recientemente; del resto se guardan los valores
+        self.formula_views = OrderedDict()
+        self.view_states = {}
+        self.profiling_dock = None
 
         self.setup_ui()
-        self.populate_formula_list()
+        self.setup_menu()
 
     def setup_ui(self):
         main_widget = QWidget()
@@ -28,30 +45,102 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Horizontal)
         main_layout.addWidget(splitter)
 
-        self.formula_list_widget = QListWidget()
-        self.formula_list_widget.currentItemChanged.connect(self.on_formula_selected)
+        catalog_widget = QWidget()
+        catalog_layout = QVBoxLayout(catalog_widget)
+        catalog_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Buscar fórmula, variable o símbolo...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.filter_formulas)
+        self.search_edit.returnPressed.connect(self.select_first_match)
+        catalog_layout.addWidget(self.search_edit)
+
+        # La vista solo pinta las filas visibles; con filas de alto fijo y la distribucion por
+        # lotes no recorre todo el catalogo cada vez que el filtro reinicia el modelo
+        self.formula_list_view = QListView()
+        self.formula_list_view.setUniformItemSizes(True)
+        self.formula_list_view.setLayoutMode(QListView.Batched)
+        self.formula_list_view.setModel(self.catalog_model)
+        self.formula_list_view.selectionModel().currentChanged.connect(self.on_formula_selected)
+        catalog_layout.addWidget(self.formula_list_view)
         
         self.stacked_widget = QStackedWidget()
 
-        splitter.addWidget(self.formula_list_widget)
-        splitter.addWidget(self.stacked_widget)
+        splitter.addWidget(catalog_widget)
+        # Las vistas pueden crecer (p. ej. con el gráfico del barrido), por eso van en un área desplazable
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setWidget(self.stacked_widget)
+        splitter.addWidget(scroll_area)
         splitter.setSizes([250, 650])
 
-    def populate_formula_list(self):
-        self.formula_list_widget.clear()
+    def setup_menu(self):
+        debug_menu = self.menuBar().addMenu("Depuración")
+        profiling_action = debug_menu.addAction("Perfil de rendimiento")
+        profiling_action.setShortcut(QKeySequence("Ctrl+Shift+P"))
+        profiling_action.triggered.connect(self.toggle_profiling_panel)
 
-        for name in sorted(self.formulas.keys()):
-            self.formula_list_widget.addItem(name)
-            
-            formula_instance = self.formulas[name]
+    def toggle_profiling_panel(self):
+        # El panel se crea la primera vez que se abre
+        if self.profiling_dock is None:
+            from .widgets.profiling_panel import ProfilingPanel
 
-            formula_view = FormulaView(formula_instance)
-            self.stacked_widget.addWidget(formula_view)
+            self.profiling_dock = QDockWidget("Perfil de rendimiento", self)
+            self.profiling_dock.setWidget(ProfilingPanel())
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.profiling_dock)
+            return
+        self.profiling_dock.setVisible(not self.profiling_dock.isVisible())
 
-            formula_view._check_unit_consistency()
-            
-    def on_formula_selected(self, current_item, previous_item):
-        if current_item:
+    def filter_formulas(self, text: str):
+        self.catalog_model.set_filter(text)
+        # El modelo se reinicia: se vuelve a marcar la formula mostrada si sigue en la lista
+        if self.current_formula is not None:
+            index = self.catalog_model.index_of(self.current_formula)
+            if index.isValid():
+                self.formula_list_view.setCurrentIndex(index)
 
-            index = self.formula_list_widget.row(current_item)
-            self.stacked_widget.setCurrentIndex(index)
\ No newline at end of file
+    def select_first_match(self):
+        if self.catalog_model.rowCount():
+            self.formula_list_view.setCurrentIndex(self.catalog_model.index(0))
+            self.formula_list_view.setFocus()
+
+    def select_formula(self, key: Tuple[str, str]):
+        index = self.catalog_model.index_of(key)
+        if not index.isValid():
+            self.search_edit.clear()
+            index = self.catalog_model.index_of(key)
+        self.formula_list_view.setCurrentIndex(index)
+
+    def get_formula_view(self, key: Tuple[str, str]) -> FormulaView:
+        formula_view = self.formula_views.get(key)
+        if formula_view is not None:
+            self.formula_views.move_to_end(key)
+            return formula_view
+
+        entry = self.formulas[key]
+        formula_view = FormulaView(entry.create(), entry.consistency)
+        if key in self.view_states:
+            formula_view.restore_state(self.view_states.pop(key))
+        self.stacked_widget.addWidget(formula_view)
+        self.formula_views[key] = formula_view
+
+        while len(self.formula_views) > MAX_LIVE_VIEWS:
+            self.evict_formula_view(next(iter(self.formula_views)))
+        return formula_view
+
+    def evict_formula_view(self, key: Tuple[str, str]):
+        formula_view = self.formula_views.pop(key)
+        formula_view.cancel_tasks()
+        self.view_states[key] = formula_view.save_state()
+        self.stacked_widget.removeWidget(formula_view)
+        formula_view.deleteLater()
+            
+    def on_formula_selected(self, current, previous):
+        entry = self.catalog_model.entry(current)
+        if entry is None or entry.key == self.current_formula:
+            return
+        self.current_formula = entry.key
+        formula_view = self.get_formula_view(entry.key)
+        self.stacked_widget.setCurrentWidget(formula_view)
+        formula_view.show_unit_warnings()
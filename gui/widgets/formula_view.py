@@ -1,13 +1,26 @@
+import time
+
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                               QComboBox, QPushButton, QFormLayout, QFrame, QTextEdit)
+                               QComboBox, QPushButton, QFormLayout, QFrame, QTextEdit, QCheckBox)
 from PySide6.QtGui import QFont, QDoubleValidator
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QSignalBlocker, QTimer
 
 from core.formulas.base_formula import BaseFormula
-from core.unit_handler import ureg, Q_
+from core.instrumentation import timed
+from core.kernels import compile_formula
+from core.materials import property_for_variable
+from core.unit_consistency import ConsistencyIndex, consistency_index
+from core.uncertainty import DEFAULT_SAMPLES
+
+from ..latex_renderer import get_latex_cache
+from ..workers import Task, calculation_pool, start_task
+from .sweep_panel import SweepPanel
+
+# Espera tras el último cambio antes de recalcular en modo automático
+LIVE_DEBOUNCE_MS = 150
 
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+UNCERTAINTY_MODES = [("Sin incertidumbre", None), ("Linealizada", 'linear'), ("Monte Carlo", 'monte_carlo')]
+DISTRIBUTION_NAMES = [("Normal (σ)", 'normal'), ("Uniforme (±a)", 'uniform'), ("Triangular (±a)", 'triangular')]
 
 PREFERRED_UNITS = {
     'gram': ['gram', 'kilogram', 'milligram'],
@@ -34,10 +47,25 @@ PREFERRED_UNITS = {
 }
 
 class FormulaView(QWidget):
-    def __init__(self, formula: BaseFormula):
+    @timed('view.build')
+    def __init__(self, formula: BaseFormula, consistency: ConsistencyIndex = None):
         super().__init__()
         self.formula = formula
+        self.consistency = consistency or consistency_index(formula)
+        # Con las unidades por defecto las advertencias ya vienen calculadas en el indice
+        self.unit_warnings = self.consistency.default_warnings()
         self.input_widgets = {}
+        # Incertidumbre y distribucion de cada entrada, aparte para no cambiar input_widgets
+        self.uncertainty_widgets = {}
+        self.calc_task = None
+        # Formula, entradas y unidades del calculo en curso, para el historial
+        self.calc_record = None
+        self.last_history_record = None
+
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_DEBOUNCE_MS)
+        self.live_timer.timeout.connect(lambda: self.start_calculation(live=True))
 
         self.setup_ui()
 
@@ -75,21 +103,55 @@ class FormulaView(QWidget):
             unit_combo.addItems(units_to_show)
             unit_combo.setCurrentText(default_unit)
             
-            unit_combo.currentIndexChanged.connect(self._check_unit_consistency)
+            unit_combo.currentIndexChanged.connect(lambda _, name=var_name: self._on_unit_changed(name))
+            unit_combo.currentIndexChanged.connect(self.schedule_live_calculation)
+            value_edit.textChanged.connect(self.schedule_live_calculation)
+
+            uncertainty_edit = QLineEdit()
+            uncertainty_edit.setPlaceholderText("± 0")
+            uncertainty_edit.setValidator(QDoubleValidator(0.0, float('inf'), 15))
+            uncertainty_edit.setMaximumWidth(90)
+            uncertainty_edit.textChanged.connect(self.schedule_live_calculation)
+
+            distribution_combo = QComboBox()
+            for text, distribution in DISTRIBUTION_NAMES:
+                distribution_combo.addItem(text, distribution)
+            distribution_combo.currentIndexChanged.connect(self.schedule_live_calculation)
 
             input_hbox = QHBoxLayout()
             input_hbox.addWidget(value_edit)
             input_hbox.addWidget(unit_combo)
+            input_hbox.addWidget(uncertainty_edit)
+            input_hbox.addWidget(distribution_combo)
+
+            if property_for_variable(var_name) is not None:
+                material_button = QPushButton("Material...")
+                material_button.setToolTip("Rellenar con la propiedad de un material")
+                material_button.clicked.connect(lambda _, name=var_name: self.fill_from_material(name))
+                input_hbox.addWidget(material_button)
             
             form_layout.addRow(label_text, input_hbox)
             
             self.input_widgets[var_name] = (value_edit, unit_combo)
+            self.uncertainty_widgets[var_name] = (uncertainty_edit, distribution_combo)
 
         self.layout.addLayout(form_layout)
 
+        calc_hbox = QHBoxLayout()
         self.calc_button = QPushButton("Calcular")
         self.calc_button.clicked.connect(self.calculate)
-        self.layout.addWidget(self.calc_button)
+        calc_hbox.addWidget(self.calc_button, 1)
+
+        self.uncertainty_combo = QComboBox()
+        for text, method in UNCERTAINTY_MODES:
+            self.uncertainty_combo.addItem(text, method)
+        self.uncertainty_combo.currentIndexChanged.connect(self.schedule_live_calculation)
+        calc_hbox.addWidget(self.uncertainty_combo)
+
+        self.live_checkbox = QCheckBox("Cálculo automático")
+        self.live_checkbox.toggled.connect(self.schedule_live_calculation)
+        calc_hbox.addWidget(self.live_checkbox)
+        self.layout.addLayout(calc_hbox)
 
         self.result_label = QLabel("Resultado:")
         self.result_label.setFont(QFont("Arial", 12))
@@ -100,47 +162,223 @@ class FormulaView(QWidget):
         self.result_output.setFixedHeight(100)
         self.layout.addWidget(self.result_output)
 
+        self.sweep_panel = SweepPanel(self)
+        self.layout.addWidget(self.sweep_panel)
+
+    @timed('view.add_latex_display')
     def add_latex_display(self):
-        fig = Figure(figsize=(5, 1), dpi=100)
-        fig.patch.set_facecolor('none')
-        canvas = FigureCanvas(fig)
-        canvas.setStyleSheet("background-color:transparent;")
-        ax = fig.add_subplot(111)
-        formatted_latex = f"${self.formula.formula_latex}$"
-        ax.text(0.5, 0.5, formatted_latex, fontsize=20, ha='center', va='center')
-        ax.axis('off')
-        fig.tight_layout(pad=0)
-        self.layout.addWidget(canvas)
+        latex_label = QLabel()
+        latex_label.setAlignment(Qt.AlignCenter)
+        latex_label.setMinimumHeight(100)
+        try:
+            latex_label.setPixmap(get_latex_cache().pixmap(self.formula.formula_latex, fontsize=20, dpi=100))
+        except ValueError:
+            latex_label.setText(self.formula.formula_latex)
+        self.layout.addWidget(latex_label)
+
+    def read_inputs(self, skip=()) -> tuple:
+        # Valores y unidades en el orden de formula.variables; las variables en 'skip' pueden estar vacías
+        values, units = [], []
+        for var_name, (value_edit, unit_combo) in self.input_widgets.items():
+            value_str = value_edit.text().strip().replace(',', '.')
+            if var_name in skip:
+                value = float(value_str) if value_str else 0.0
+            elif not value_str:
+                raise ValueError(f"El campo '{var_name.replace('_', ' ')}' no puede estar vacío.")
+            else:
+                value = float(value_str)
+
+            unit = unit_combo.currentText()
+            if not unit:
+                raise ValueError(f"Debe seleccionar una unidad para '{var_name.replace('_', ' ')}'.")
+
+            values.append(value)
+            units.append(unit)
+        return values, units
+
+    def read_uncertainties(self, values: list) -> dict:
+        from core.uncertainty import Measurement
+
+        measurements = {}
+        for (var_name, (uncertainty_edit, distribution_combo)), value in zip(self.uncertainty_widgets.items(), values):
+            text = uncertainty_edit.text().strip().replace(',', '.')
+            measurements[var_name] = Measurement(value, abs(float(text)) if text else 0.0,
+                                                 distribution_combo.currentData())
+        return measurements
 
     def calculate(self):
+        self.start_calculation(live=False)
+
+    def schedule_live_calculation(self, *_):
+        if self.live_checkbox.isChecked():
+            self.live_timer.start()
+
+    def start_calculation(self, live: bool = False):
+        # La evaluacion se hace en un hilo aparte; un nuevo calculo cancela el anterior.
+        # El kernel se compila aqui: pint solo se usa (e importa) desde el hilo de la interfaz.
+        method = self.uncertainty_combo.currentData()
         try:
-            inputs = {}
-            for var_name, (value_edit, unit_combo) in self.input_widgets.items():
-                value_str = value_edit.text().strip().replace(',', '.')
-                if not value_str:
-                    raise ValueError(f"El campo '{var_name.replace('_', ' ')}' no puede estar vacío.")
-                
-                value = float(value_str)
-                unit = unit_combo.currentText()
-                if not unit:
-                    raise ValueError(f"Debe seleccionar una unidad para '{var_name.replace('_', ' ')}'.")
-                
-                inputs[var_name] = Q_(value, unit)
-            
-            result = self.formula.solve(inputs)
-            
-            magnitude = result.magnitude
-            units = result.units
-            
-            formatted_result = f"{magnitude} {units:~P}"
+            values, units = self.read_inputs()
+            if method is None:
+                kernel = compile_formula(self.formula, units)
+            else:
+                from core.uncertainty import UncertaintyPropagator
+                measurements = self.read_uncertainties(values)
+                propagator = UncertaintyPropagator(self.formula, units, gradient=method == 'linear')
+        except Exception as e:
+            # En modo automático los datos incompletos simplemente no se calculan todavía
+            if not live:
+                self.show_error(f"{type(e).__name__}: {str(e)}")
+            return
+
+        if self.calc_task is not None:
+            self.calc_task.cancel()
+
+        names = list(self.input_widgets)
+        self.calc_record = {
+            'formula': self.formula.name,
+            'inputs': dict(zip(names, values)),
+            'units': dict(zip(names, units)),
+            'target_unit': (kernel if method is None else propagator.kernel).target_unit,
+        }
+        if method is None:
+            task = Task(self._evaluate, kernel, values)
+        else:
+            task = Task(self._propagate, propagator, measurements, method)
+        task.signals.finished.connect(self._on_calculated)
+        task.signals.failed.connect(self._on_calculation_failed)
+        self.calc_task = start_task(task, calculation_pool())
+
+    @staticmethod
+    def _evaluate(task: Task, kernel, values: list):
+        start = time.perf_counter()
+        magnitude = kernel(*values)
+        seconds = time.perf_counter() - start
+        return f"{magnitude} {kernel.unit_label}", {'result': float(magnitude), 'seconds': seconds}
+
+    @staticmethod
+    def _propagate(task: Task, propagator, measurements: dict, method: str):
+        if method == 'linear':
+            result = propagator.linearized(measurements)
+            details = f"Método linealizado ({result.seconds * 1e3:.2f} ms)"
+        else:
+            result = propagator.monte_carlo(measurements, DEFAULT_SAMPLES, cancelled=lambda: task.cancelled)
+            if result is None:
+                return None
+            low, high = result.interval
+            details = (f"Monte Carlo: {result.samples:,} muestras, "
+                       f"{result.samples_per_second / 1e6:.1f} M muestras/s<br>"
+                       f"Intervalo del 95 %: [{low:.6g}, {high:.6g}]")
+            if result.rejected:
+                details += f"<br>{result.rejected:,} muestras sin resultado finito descartadas"
+        unit_label = propagator.kernel.unit_label
+        # En el historial se guarda el valor nominal (el que reproduce replay) y la incertidumbre
+        # aparte; la media de Monte Carlo varia de una ejecucion a otra
+        nominal = propagator.kernel.evaluate({name: measurement.value for name, measurement in measurements.items()})
+        fields = {'result': float(nominal), 'uncertainty': result.uncertainty, 'method': method,
+                  'seconds': result.seconds}
+        return f"{result.value:.6g} ± {result.uncertainty:.2g} {unit_label}<br><small>{details}</small>", fields
+
+    def _is_current_task(self) -> bool:
+        return self.calc_task is not None and self.sender() is self.calc_task.signals
+
+    @timed('view.show_result')
+    def _on_calculated(self, output: tuple):
+        if not self._is_current_task():
+            return
+        self.calc_task = None
+        formatted_result, fields = output
+
+        output_text = f"<b>Resultado:</b><br>{formatted_result}"
         
-            output_text = f"<b>Resultado:</b><br>{formatted_result}"
-            
-            self.result_output.setHtml(output_text)
+        self.result_output.setHtml(output_text)
+        self.record_history({**self.calc_record, **fields})
+
+    def record_history(self, record: dict):
+        # Un recalculo con los mismos datos (p. ej. en modo automatico) no se vuelve a guardar; otra
+        # unidad del resultado o incognita es un calculo distinto
+        from core.history import calculation_history
 
+        identity = (record['formula'], record.get('unknown'), record['inputs'], record['units'],
+                    record.get('target_unit'), record.get('method'))
+        if identity == self.last_history_record:
+            return
+        history = calculation_history()
+        if history is None:
+            return
+        try:
+            history.record(**record)
         except Exception as e:
-            error_message = f"<b>Error:</b><br><pre>{type(e).__name__}: {str(e)}</pre>"
-            self.result_output.setHtml(error_message)
+            self._show_status_bar_message(f"No se pudo guardar en el historial: {e}")
+            return
+        self.last_history_record = identity
+
+    def _on_calculation_failed(self, message: str):
+        if not self._is_current_task():
+            return
+        self.calc_task = None
+        self.show_error(message)
+
+    def show_error(self, message: str):
+        self.result_output.setHtml(f"<b>Error:</b><br><pre>{message}</pre>")
+
+    def cancel_tasks(self):
+        self.live_timer.stop()
+        if self.calc_task is not None:
+            self.calc_task.cancel()
+            self.calc_task = None
+        self.sweep_panel.cancel()
+
+    def save_state(self) -> dict:
+        return {
+            'inputs': {var_name: (value_edit.text(), unit_combo.currentText())
+                       for var_name, (value_edit, unit_combo) in self.input_widgets.items()},
+            'result': self.result_output.toHtml() if self.result_output.toPlainText() else "",
+            'live': self.live_checkbox.isChecked(),
+            'uncertainties': {var_name: (uncertainty_edit.text(), distribution_combo.currentData())
+                              for var_name, (uncertainty_edit, distribution_combo) in self.uncertainty_widgets.items()},
+            'uncertainty_mode': self.uncertainty_combo.currentData(),
+        }
+
+    def restore_state(self, state: dict):
+        for var_name, (text, unit) in state.get('inputs', {}).items():
+            if var_name not in self.input_widgets:
+                continue
+            value_edit, unit_combo = self.input_widgets[var_name]
+            value_edit.setText(text)
+            with QSignalBlocker(unit_combo):
+                unit_combo.setCurrentText(unit)
+        for var_name, (text, distribution) in state.get('uncertainties', {}).items():
+            if var_name not in self.uncertainty_widgets:
+                continue
+            uncertainty_edit, distribution_combo = self.uncertainty_widgets[var_name]
+            uncertainty_edit.setText(text)
+            with QSignalBlocker(distribution_combo):
+                distribution_combo.setCurrentIndex(max(0, distribution_combo.findData(distribution)))
+        with QSignalBlocker(self.uncertainty_combo):
+            self.uncertainty_combo.setCurrentIndex(max(0, self.uncertainty_combo.findData(state.get('uncertainty_mode'))))
+        self.refresh_unit_warnings()
+        if state.get('result'):
+            self.result_output.setHtml(state['result'])
+        with QSignalBlocker(self.live_checkbox):
+            self.live_checkbox.setChecked(state.get('live', False))
+
+    def fill_from_material(self, var_name: str):
+        from .material_dialog import MaterialDialog
+
+        property_name = property_for_variable(var_name)
+        value_edit, unit_combo = self.input_widgets[var_name]
+        try:
+            dialog = MaterialDialog(property_name, unit_combo.currentText(), self)
+        except (OSError, ValueError) as e:
+            self.show_error(f"No se pudo abrir la base de materiales: {e}")
+            return
+        if dialog.exec() != MaterialDialog.Accepted:
+            return
+        value_edit.setText(f"{dialog.value():.6g}")
+        temperature, temperature_unit = dialog.temperature()
+        self._show_status_bar_message(f"{var_name.replace('_', ' ').capitalize()}: {dialog.material()} "
+                                      f"a {temperature:g} {temperature_unit}")
 
     def _get_unit(self, var_name: str) -> str | None:
         if var_name in self.input_widgets:
@@ -153,63 +391,22 @@ class FormulaView(QWidget):
         if status_bar:
             status_bar.showMessage(message, timeout)
 
-    def _check_unit_consistency(self):
-        warnings = []
-        formula_name = self.formula.name
-
-        # Calorimetría
-        if formula_name == "Calorimetría (Calor Sensible)":
-            mass_unit = self._get_unit('masa')
-            c_unit = self._get_unit('calor_especifico')
-            if mass_unit and c_unit:
-                if ('gram' in mass_unit and 'kilogram' in c_unit) or \
-                ('kilogram' in mass_unit and 'gram' in c_unit) or \
-                ('milligram' in mass_unit and 'kilogram' in c_unit) or \
-                ('milligram' in mass_unit and 'gram' in c_unit):
-                    warnings.append("Advertencia: Esta utilizando unidades distintas de masa vs. c. específico")
-        
-        # Equilibrio Térmico
-        elif formula_name == "Equilibrio Térmico":
-            m1, c1 = self._get_unit('masa_1'), self._get_unit('calor_especifico_1')
-            m2, c2 = self._get_unit('masa_2'), self._get_unit('calor_especifico_2')
-            if m1 and c1 and (('gram,' in m1 and 'kilogram' in c1) or ('kilogram' in m1 and 'gram' in c1) \
-                or ('milligram,' in m1 and 'kilogram' in c1) or ('milligram,' in m1 and 'gram' in c1)):
-                warnings.append("Advertencia: Esta utilizando unidades distintas de masa vs. c. específico")
-                
-            if m2 and c2 and (('gram' in m2 and 'kilogram' in c2) or ('kilogram' in m2 and 'gram' in c2) \
-                or ('milligram,' in m2 and 'kilogram' in c2) or ('milligram,' in m2 and 'gram' in c2)):
-                warnings.append("Advertencia: Esta utilizando unidades distintas de masa vs. c. específico")
-                
-            if c1 and c2 and (('gram' in c1 and 'kilogram' in c2) or ('kilogram' in c1 and 'gram' in c2)):
-                warnings.append("Las unidades de calores específicos (c1/c2) no coinciden")
-
-        # Formulas que requieren temperatura absoluta
-        T_abs_formulas = ["Ley de los Gases Ideales", "Energía Cinética Media (Gas Monoatómico)", "Trabajo en Proceso Isotérmico", "Ley de Charles"]
-        if formula_name in T_abs_formulas:
-            temp_vars = ['temperatura', 'temperatura_1', 'temperatura_2']
-            for var in temp_vars:
-                temp_unit = self._get_unit(var)
-                if temp_unit and ('Celsius' in temp_unit or 'Fahrenheit' in temp_unit):
-                    warnings.append("ADVERTENCIA: Esta ley requiere temperatura absoluta (Kelvin), en caso de utilizarla otra, aparecera un error")
-                    break
-
-        # Formulas con estados Iniciales y finales
-        state_formulas = ["Trabajo en Proceso Isotérmico", "Ley de Boyle", "Ley de Charles"]
-        if formula_name in state_formulas:
-            # Revisa volúmenes
-            v1 = self._get_unit('volumen_inicial') or self._get_unit('volumen_1')
-            v2 = self._get_unit('volumen_final') or self._get_unit('volumen_2')
-            if v1 and v2 and v1 != v2:
-                warnings.append("Se recomienda usar la misma unidad para volumenes")
-
-            # Revisa presiones
-            p1 = self._get_unit('presion_inicial')
-            p2 = self._get_unit('presion_final')
-            if p1 and p2 and p1 != p2:
-                warnings.append("Se recomienda usar la misma unidad para presiones")
-
-        if warnings:
-            final_message = " | ".join(warnings)
-            self._show_status_bar_message(final_message)
+    def _on_unit_changed(self, var_name: str):
+        # Solo se revisan las comprobaciones del indice en las que participa esta variable
+        for position in self.consistency.by_variable.get(var_name, ()):
+            warning = self.consistency.evaluate(position, self._get_unit)
+            if warning:
+                self.unit_warnings[position] = warning
+            else:
+                self.unit_warnings.pop(position, None)
+        self.show_unit_warnings()
+
+    def refresh_unit_warnings(self):
+        self.unit_warnings = self.consistency.warnings(self._get_unit)
+
+    def show_unit_warnings(self):
+        if self.unit_warnings:
+            self._show_status_bar_message(" | ".join(self.unit_warnings[position]
+                                                     for position in sorted(self.unit_warnings)))
         else:
-            self._show_status_bar_message("", 1)
\ No newline at end of file
+            self._show_status_bar_message("", 1)
@@ -0,0 +1,83 @@
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QComboBox,
+                               QDialogButtonBox)
+from PySide6.QtGui import QDoubleValidator
+
+from core.materials import PROPERTIES, material_database
+
+TEMPERATURE_UNITS = ['degree_Celsius', 'kelvin', 'degree_Fahrenheit']
+
+class MaterialDialog(QDialog):
+    # Elige un material y una temperatura; value() devuelve la propiedad en la unidad pedida
+    def __init__(self, property_name: str, unit: str, parent=None):
+        super().__init__(parent)
+        self.property_name = property_name
+        self.unit = unit
+        self.database = material_database()
+        self.setWindowTitle(f"{PROPERTIES[property_name][1]} de un material")
+        self.setup_ui()
+        self.update_matches("")
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Buscar material (nombre, símbolo...)")
+        self.search_edit.textChanged.connect(self.update_matches)
+        layout.addWidget(self.search_edit)
+
+        self.material_list = QListWidget()
+        self.material_list.currentTextChanged.connect(self.update_preview)
+        self.material_list.itemDoubleClicked.connect(self.accept)
+        layout.addWidget(self.material_list)
+
+        temperature_hbox = QHBoxLayout()
+        temperature_hbox.addWidget(QLabel("Temperatura:"))
+        self.temperature_edit = QLineEdit("20")
+        self.temperature_edit.setValidator(QDoubleValidator())
+        self.temperature_edit.textChanged.connect(self.update_preview)
+        temperature_hbox.addWidget(self.temperature_edit)
+        self.temperature_combo = QComboBox()
+        self.temperature_combo.addItems(TEMPERATURE_UNITS)
+        self.temperature_combo.currentIndexChanged.connect(self.update_preview)
+        temperature_hbox.addWidget(self.temperature_combo)
+        layout.addLayout(temperature_hbox)
+
+        self.preview_label = QLabel()
+        self.preview_label.setWordWrap(True)
+        layout.addWidget(self.preview_label)
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+
+    def update_matches(self, text: str):
+        self.material_list.clear()
+        self.material_list.addItems(self.database.lookup(text, limit=None, property_name=self.property_name))
+        if self.material_list.count():
+            self.material_list.setCurrentRow(0)
+        self.update_preview()
+
+    def material(self) -> str:
+        item = self.material_list.currentItem()
+        return item.text() if item is not None else ""
+
+    def temperature(self) -> tuple:
+        return float(self.temperature_edit.text().replace(',', '.')), self.temperature_combo.currentText()
+
+    def value(self) -> float:
+        temperature, temperature_unit = self.temperature()
+        return self.database.value(self.material(), self.property_name, temperature, temperature_unit, self.unit)
+
+    def update_preview(self, *_):
+        ok_button = self.buttons.button(QDialogButtonBox.Ok)
+        try:
+            value = self.value()
+            low, high = self.database.temperature_range(self.material(), self.property_name)
+        except (KeyError, ValueError):
+            self.preview_label.setText("")
+            ok_button.setEnabled(False)
+            return
+        ok_button.setEnabled(True)
+        tabulated = f"tabulado entre {low:g} K y {high:g} K" if low != high else "valor constante"
+        self.preview_label.setText(f"{value:.6g} {self.unit} ({tabulated})")
@@ -0,0 +1,107 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QTableWidget,
+                               QTableWidgetItem, QHeaderView, QFileDialog, QLabel)
+from PySide6.QtCore import Qt, QTimer
+
+from core import instrumentation
+
+# Intervalo de refresco de la tabla mientras el panel está visible
+REFRESH_MS = 1000
+
+COLUMNS = [
+    ("Métrica", 'name'),
+    ("Tipo", 'kind'),
+    ("Llamadas", 'count'),
+    ("Total (ms)", 'total_ms'),
+    ("Media (ms)", 'mean_ms'),
+    ("p50 (ms)", 'p50_ms'),
+    ("p90 (ms)", 'p90_ms'),
+    ("p99 (ms)", 'p99_ms'),
+    ("Máx. (ms)", 'max_ms'),
+]
+
+class ProfilingPanel(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.enabled_checkbox = QCheckBox("Instrumentación activa")
+        self.enabled_checkbox.setChecked(instrumentation.is_enabled())
+        self.enabled_checkbox.toggled.connect(self.set_enabled)
+        controls.addWidget(self.enabled_checkbox)
+        controls.addStretch(1)
+
+        for text, slot in (("Actualizar", self.refresh), ("Reiniciar", self.reset), ("Exportar...", self.export)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            controls.addWidget(button)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+    def set_enabled(self, enabled: bool):
+        if enabled:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        self.refresh()
+
+    def refresh(self):
+        rows = instrumentation.snapshot()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, (_, key) in enumerate(COLUMNS):
+                value = row[key]
+                if value is None:
+                    text = ""
+                elif isinstance(value, float):
+                    text = f"{value:.3f}"
+                else:
+                    text = str(value)
+                item = QTableWidgetItem(text)
+                if not isinstance(value, str):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row_index, column, item)
+        self.table.setSortingEnabled(True)
+        state = "activa" if instrumentation.is_enabled() else "desactivada"
+        self.status_label.setText(f"{len(rows)} métricas (instrumentación {state})")
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar métricas", "perfil.json",
+                                              "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        try:
+            instrumentation.export(path)
+        except OSError as e:
+            self.status_label.setText(f"Error al exportar: {e}")
+            return
+        self.status_label.setText(f"Métricas exportadas a {path}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
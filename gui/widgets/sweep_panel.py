@@ -0,0 +1,284 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
+                               QPushButton, QGroupBox, QCheckBox, QSpinBox, QProgressBar, QGridLayout,
+                               QFileDialog)
+from PySide6.QtGui import QDoubleValidator
+
+from core.kernels import compile_formula, unit_label
+from core.sweep import sweep_1d, sweep_2d
+
+from ..workers import Task, start_task
+
+# Numero aproximado de actualizaciones del grafico durante un barrido
+PROGRESS_STEPS = 25
+
+class SweepPanel(QGroupBox):
+    def __init__(self, formula_view):
+        super().__init__("Barrido de parámetros")
+        self.formula_view = formula_view
+        self.formula = formula_view.formula
+        self.task = None
+        self.figure = None
+        self.canvas = None
+        self.artist = None
+        self.data = None
+        self.limits = None
+        # Variables, unidades y valores del ultimo barrido, para guardarlo en un almacen columnar
+        self.sweep_info = None
+        self.save_task = None
+
+        self.setCheckable(True)
+        self.setChecked(False)
+
+        self.setup_ui()
+        self.toggled.connect(self.content.setVisible)
+        self.content.setVisible(False)
+
+    def setup_ui(self):
+        outer_layout = QVBoxLayout(self)
+        self.content = QWidget()
+        outer_layout.addWidget(self.content)
+        layout = QVBoxLayout(self.content)
+
+        grid = QGridLayout()
+        for column, text in enumerate(["", "Variable", "Desde", "Hasta", "Puntos"]):
+            grid.addWidget(QLabel(text), 0, column)
+
+        self.x_axis = self._add_axis_row(grid, 1, QLabel("X:"), 0, 200)
+        self.y_enabled = QCheckBox("Y:")
+        self.y_enabled.toggled.connect(self._update_y_enabled)
+        self.y_axis = self._add_axis_row(grid, 2, self.y_enabled, min(1, len(self.formula.variables) - 1), 100)
+        self.y_enabled.setEnabled(len(self.formula.variables) > 1)
+        self._update_y_enabled(False)
+        layout.addLayout(grid)
+
+        buttons = QHBoxLayout()
+        self.plot_button = QPushButton("Graficar")
+        self.plot_button.clicked.connect(self.start_sweep)
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.cancel)
+        self.cancel_button.setEnabled(False)
+        self.save_button = QPushButton("Guardar...")
+        self.save_button.clicked.connect(self.save_results)
+        self.save_button.setEnabled(False)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setTextVisible(False)
+        buttons.addWidget(self.plot_button)
+        buttons.addWidget(self.cancel_button)
+        buttons.addWidget(self.save_button)
+        buttons.addWidget(self.progress_bar)
+        layout.addLayout(buttons)
+
+        self.plot_layout = layout
+
+    def _add_axis_row(self, grid: QGridLayout, row: int, label: QWidget, default_index: int, points: int) -> tuple:
+        var_combo = QComboBox()
+        for var_name, symbol, _ in self.formula.variables:
+            var_combo.addItem(f"{var_name.replace('_', ' ').capitalize()} ({symbol})", var_name)
+        var_combo.setCurrentIndex(default_index)
+
+        start_edit = QLineEdit("1")
+        start_edit.setValidator(QDoubleValidator())
+        stop_edit = QLineEdit("10")
+        stop_edit.setValidator(QDoubleValidator())
+
+        points_spin = QSpinBox()
+        points_spin.setRange(2, 5000)
+        points_spin.setValue(points)
+
+        grid.addWidget(label, row, 0)
+        for column, widget in enumerate((var_combo, start_edit, stop_edit, points_spin), start=1):
+            grid.addWidget(widget, row, column)
+        return var_combo, start_edit, stop_edit, points_spin
+
+    def _update_y_enabled(self, enabled: bool):
+        for widget in self.y_axis:
+            widget.setEnabled(enabled)
+
+    @staticmethod
+    def _read_axis(axis: tuple):
+        import numpy as np
+
+        var_combo, start_edit, stop_edit, points_spin = axis
+        start = float(start_edit.text().replace(',', '.'))
+        stop = float(stop_edit.text().replace(',', '.'))
+        return var_combo.currentData(), np.linspace(start, stop, points_spin.value())
+
+    def _ensure_canvas(self):
+        if self.canvas is not None:
+            return
+        # matplotlib solo se importa cuando se hace el primer barrido
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
+        self.figure = Figure(figsize=(5, 3), dpi=100)
+        self.canvas = FigureCanvas(self.figure)
+        self.canvas.setMinimumHeight(300)
+        self.plot_layout.addWidget(self.canvas)
+
+    def _axis_label(self, var_name: str, unit: str) -> str:
+        symbol = next(var[1] for var in self.formula.variables if var[0] == var_name)
+        return f"${symbol}$ [{unit_label(unit)}]"
+
+    def start_sweep(self):
+        import numpy as np
+
+        self.cancel()
+        try:
+            x_var, xs = self._read_axis(self.x_axis)
+            y_var, ys = self._read_axis(self.y_axis) if self.y_enabled.isChecked() else (None, None)
+            if x_var == y_var:
+                raise ValueError("Las variables X e Y deben ser distintas.")
+
+            names = [var[0] for var in self.formula.variables]
+            values, units = self.formula_view.read_inputs(skip={x_var, y_var})
+            kernel = compile_formula(self.formula, units)
+        except Exception as e:
+            self.formula_view.show_error(f"{type(e).__name__}: {e}")
+            return
+
+        self._ensure_canvas()
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
+        target_label = f"${self.formula.target_variable[1]}$ [{kernel.unit_label}]"
+        x_index = names.index(x_var)
+        self.sweep_info = {
+            'x': (x_var, units[x_index], xs),
+            'y': (y_var, units[names.index(y_var)], ys) if y_var is not None else None,
+            'target': (self.formula.target_variable[0], kernel.target_unit),
+            'inputs': {name: [value, unit] for name, value, unit in zip(names, values, units)
+                       if name not in (x_var, y_var)},
+        }
+        self.save_button.setEnabled(False)
+        ax.set_xlabel(self._axis_label(x_var, units[x_index]))
+
+        if y_var is None:
+            self.data = np.full(len(xs), np.nan)
+            (self.artist,) = ax.plot(xs, self.data)
+            ax.set_ylabel(target_label)
+            task = Task(self._run_sweep_1d, kernel, values, x_index, xs)
+        else:
+            y_index = names.index(y_var)
+            self.data = np.full((len(ys), len(xs)), np.nan)
+            self.limits = None
+            self.artist = ax.imshow(self.data, origin='lower', aspect='auto',
+                                    extent=(xs[0], xs[-1], ys[0], ys[-1]))
+            ax.set_ylabel(self._axis_label(y_var, units[y_index]))
+            self.figure.colorbar(self.artist, ax=ax, label=target_label)
+            task = Task(self._run_sweep_2d, kernel, values, x_index, xs, y_index, ys)
+
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+        task.signals.progress.connect(self._on_progress)
+        task.signals.finished.connect(self._on_finished)
+        task.signals.failed.connect(self._on_failed)
+        self.task = start_task(task)
+        self.progress_bar.setValue(0)
+        self.cancel_button.setEnabled(True)
+
+    @staticmethod
+    def _run_sweep_1d(task: Task, kernel, values, x_index, xs):
+        block_size = max(1, len(xs) // PROGRESS_STEPS)
+        for start, stop, block in sweep_1d(kernel, values, x_index, xs, block_size):
+            if task.cancelled:
+                return None
+            task.report((task, start, stop, block))
+
+    @staticmethod
+    def _run_sweep_2d(task: Task, kernel, values, x_index, xs, y_index, ys):
+        rows_per_block = max(1, len(ys) // PROGRESS_STEPS)
+        for start, stop, block in sweep_2d(kernel, values, x_index, xs, y_index, ys, rows_per_block):
+            if task.cancelled:
+                return None
+            task.report((task, start, stop, block))
+
+    def _on_progress(self, update):
+        import numpy as np
+
+        task, start, stop, block = update
+        if task is not self.task:
+            return
+        self.data[start:stop] = block
+
+        if self.data.ndim == 1:
+            self.artist.set_ydata(self.data)
+            self.artist.axes.relim()
+            self.artist.axes.autoscale_view()
+        else:
+            finite = block[np.isfinite(block)]
+            if finite.size:
+                low, high = finite.min(), finite.max()
+                if self.limits is not None:
+                    low, high = min(low, self.limits[0]), max(high, self.limits[1])
+                if (low, high) != self.limits:
+                    self.limits = (low, high)
+                    self.artist.set_clim(low, high)
+            self.artist.set_data(self.data)
+
+        self.progress_bar.setValue(int(1000 * stop / len(self.data)))
+        self.canvas.draw_idle()
+
+    def _on_finished(self, _):
+        self.task = None
+        self.progress_bar.setValue(1000)
+        self.cancel_button.setEnabled(False)
+        self.save_button.setEnabled(True)
+
+    def save_results(self):
+        if self.data is None or self.sweep_info is None or self.task is not None:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Guardar resultados del barrido", "barrido",
+                                              "Almacén de resultados (*)")
+        if not path:
+            return
+        task = Task(self._write_store, path, self.formula.name, self.sweep_info, self.data)
+        task.signals.finished.connect(self._on_saved)
+        task.signals.failed.connect(self.formula_view.show_error)
+        self.save_task = start_task(task)
+        self.save_button.setEnabled(False)
+
+    @staticmethod
+    def _write_store(task: Task, path: str, formula_name: str, info: dict, data):
+        # Un barrido 2D se guarda en formato largo (x, y, resultado), por bloques de filas
+        import numpy as np
+
+        from core.result_store import ResultStore
+
+        x_var, x_unit, xs = info['x']
+        target, target_unit = info['target']
+        attributes = {'formula': formula_name, 'inputs': info['inputs']}
+        with ResultStore.create(path, attributes) as store:
+            store.add_column(x_var, unit=x_unit)
+            if info['y'] is not None:
+                y_var, y_unit, ys = info['y']
+                store.add_column(y_var, unit=y_unit)
+            store.add_column(target, unit=target_unit)
+
+            if data.ndim == 1:
+                store.append({x_var: xs, target: data})
+                return path
+            rows_per_block = max(1, 1_000_000 // len(xs))
+            for start in range(0, len(ys), rows_per_block):
+                if task.cancelled:
+                    break
+                stop = min(start + rows_per_block, len(ys))
+                store.append({x_var: np.tile(xs, stop - start), y_var: np.repeat(ys[start:stop], len(xs)),
+                              target: data[start:stop].ravel()})
+        return path
+
+    def _on_saved(self, path: str):
+        self.save_task = None
+        self.save_button.setEnabled(self.task is None and self.data is not None)
+        self.formula_view._show_status_bar_message(f"Resultados guardados en {path}")
+
+    def _on_failed(self, message: str):
+        self.task = None
+        self.cancel_button.setEnabled(False)
+        self.formula_view.show_error(message)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.cancel_button.setEnabled(False)
@@ -0,0 +1,58 @@
+import threading
+from typing import Any, Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+class TaskSignals(QObject):
+    progress = Signal(object)
+    finished = Signal(object)
+    failed = Signal(str)
+
+class Task(QRunnable):
+    # La funcion recibe la propia tarea como primer argumento para consultar task.cancelled
+    # y publicar resultados parciales con task.report(). Una tarea cancelada no emite nada mas.
+    def __init__(self, function: Callable[..., Any], *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def report(self, value: Any):
+        if not self.cancelled:
+            self.signals.progress.emit(value)
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.function(self, *self.args, **self.kwargs)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(f"{type(e).__name__}: {e}")
+        else:
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+
+def start_task(task: Task, pool: QThreadPool = None) -> Task:
+    (pool or QThreadPool.globalInstance()).start(task)
+    return task
+
+_calculation_pool = None
+
+def calculation_pool() -> QThreadPool:
+    # Un solo hilo para los calculos de las vistas: las tareas obsoletas se descartan al empezar
+    # sin llegar a ejecutarse
+    global _calculation_pool
+    if _calculation_pool is None:
+        _calculation_pool = QThreadPool()
+        _calculation_pool.setMaxThreadCount(1)
+    return _calculation_pool
@@ -1,9 +1,14 @@
+import argparse
 import sys
-from PySide6.QtWidgets import QApplication
-from gui.main_window import MainWindow
 
-if __name__ == '__main__':
-    app = QApplication(sys.argv)
+# Solo estos argumentos son de la linea de comandos propia; el resto es para Qt
+COMMANDS = ('batch', 'serve', 'history', '-h', '--help')
+
+def run_gui(qt_args=()):
+    from PySide6.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+
+    app = QApplication([sys.argv[0], *qt_args])
     
     stylesheet = """
         QStatusBar {
@@ -17,5 +22,70 @@ if __name__ == '__main__':
 
     ventana = MainWindow()
     ventana.show()
-    sys.exit(app.exec())
-    #mostrar_ventana()
\ No newline at end of file
+    return app.exec()
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Calculadora de Física")
+    subparsers = parser.add_subparsers(dest='command')
+
+    batch = subparsers.add_parser('batch', help="Evalúa un archivo CSV/JSONL sin interfaz gráfica")
+    batch.add_argument('input', help="Archivo de entrada (.csv o .jsonl, '-' para stdin)")
+    batch.add_argument('-o', '--output', help="Archivo de salida (por defecto stdout)")
+    batch.add_argument('--input-format', choices=['csv', 'jsonl'])
+    batch.add_argument('--output-format', choices=['csv', 'jsonl'])
+    batch.add_argument('-j', '--workers', type=int, default=1, help="Procesos en paralelo")
+    batch.add_argument('--chunk-size', type=int, default=10000, help="Filas por bloque")
+    batch.add_argument('--store', metavar='DIRECTORIO',
+                       help="Guarda los resultados en un almacén columnar en lugar de CSV/JSONL")
+    batch.add_argument('-q', '--quiet', action='store_true')
+
+    serve = subparsers.add_parser('serve', help="Servicio HTTP/JSON local para evaluar fórmulas")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765, help="Puerto (0: uno libre)")
+    serve.add_argument('--unix', metavar='RUTA', help="Escucha en un socket Unix en lugar de TCP")
+    serve.add_argument('--max-batch', type=int, default=4096, help="Filas como máximo por micro-lote")
+    serve.add_argument('--batch-delay', type=float, default=1.0, help="Espera para juntar peticiones (ms)")
+    serve.add_argument('-q', '--quiet', action='store_true')
+
+    history = subparsers.add_parser('history', help="Consulta o repite los cálculos guardados en el historial")
+    history.add_argument('--formula', help="Solo los cálculos de esta fórmula")
+    history.add_argument('--since', metavar='FECHA', help="Desde esta fecha (ISO 8601, p. ej. 2024-05-01)")
+    history.add_argument('--until', metavar='FECHA', help="Hasta esta fecha (sin incluirla)")
+    history.add_argument('-n', '--limit', type=int, help="Número máximo de cálculos (al listar, 20)")
+    history.add_argument('--replay', action='store_true',
+                         help="Vuelve a evaluar la selección y muestra los resultados que cambiaron")
+    history.add_argument('-j', '--workers', type=int, default=1, help="Procesos en paralelo al repetir")
+    history.add_argument('--rtol', type=float, default=1e-9, help="Tolerancia relativa al comparar")
+    history.add_argument('--db', metavar='ARCHIVO', help="Archivo de historial (por defecto el del usuario)")
+    return parser
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS:
+        # Opciones de Qt como '-platform offscreen' o '-style fusion': su valor no es un subcomando
+        return run_gui(argv)
+    args = build_parser().parse_args(argv)
+
+    if args.command == 'batch':
+        from core.batch import run_batch_files
+
+        run_batch_files(args.input, args.output, args.input_format, args.output_format,
+                        workers=args.workers, chunk_size=args.chunk_size, quiet=args.quiet,
+                        store_path=args.store)
+        return 0
+
+    if args.command == 'serve':
+        from core.server import run_server
+
+        run_server(args.host, args.port, args.unix, quiet=args.quiet,
+                   max_rows=args.max_batch, delay=args.batch_delay / 1000)
+        return 0
+
+    from core.history import run_history
+
+    return run_history(args.db, args.formula, args.since, args.until, args.limit,
+                       replay=args.replay, workers=args.workers, rtol=args.rtol)
+
+if __name__ == '__main__':
+    sys.exit(main())
+    #mostrar_ventana()
@@ -0,0 +1,21 @@
+import pytest
+
+from core.result_cache import result_cache
+
+@pytest.fixture(autouse=True)
+def user_dirs(tmp_path, monkeypatch):
+    # Ninguna prueba escribe en la cache ni en los datos reales del usuario
+    monkeypatch.setenv('CALCULADORA_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('CALCULADORA_DATA_DIR', str(tmp_path / 'data'))
+    result_cache.clear()
+    yield tmp_path
+    result_cache.clear()
+
+@pytest.fixture
+def catalog(user_dirs):
+    from core.formula_manager import load_catalog
+    return load_catalog()
+
+@pytest.fixture
+def formulas(catalog):
+    return {entry.class_name: entry.create() for entry in catalog}
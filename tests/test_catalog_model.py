@@ -0,0 +1,57 @@
+import dataclasses
+
+import pytest
+
+pytest.importorskip('PySide6')
+
+from gui.catalog_model import FormulaListModel
+
+@pytest.fixture
+def duplicated(catalog):
+    # Dos formulas de modulos distintos con el mismo nombre
+    entry = catalog[0]
+    other = dataclasses.replace(catalog[1], name=entry.name)
+    return [entry, other] + list(catalog[2:])
+
+def test_entries_are_keyed_by_module_and_class(duplicated):
+    model = FormulaListModel(duplicated)
+
+    assert model.rowCount() == len(duplicated)
+    first, second = duplicated[0], duplicated[1]
+    assert model.entry(model.index_of(first.key)) is first
+    assert model.entry(model.index_of(second.key)) is second
+
+def test_filter_keeps_both_duplicates(duplicated):
+    model = FormulaListModel(duplicated)
+    model.set_filter(duplicated[0].name)
+
+    keys = {model.entry(model.index(row)).key for row in range(model.rowCount())}
+    assert {duplicated[0].key, duplicated[1].key} <= keys
+
+def test_filtered_out_entry_has_no_index(catalog):
+    model = FormulaListModel(catalog)
+    model.set_filter('zzzz')
+
+    assert model.rowCount() == 0
+    assert not model.index_of(catalog[0].key).isValid()
+
+def test_window_keeps_a_view_per_key(duplicated, monkeypatch):
+    monkeypatch.setenv('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtCore import QCoreApplication, QEvent
+    from PySide6.QtWidgets import QApplication
+
+    from gui.main_window import MainWindow
+
+    app = QApplication.instance() or QApplication([])
+    window = MainWindow(duplicated)
+    try:
+        for entry in duplicated[:2]:
+            window.select_formula(entry.key)
+            assert window.current_formula == entry.key
+        assert list(window.formula_views) == [duplicated[0].key, duplicated[1].key]
+        assert window.formula_views[duplicated[0].key] is not window.formula_views[duplicated[1].key]
+    finally:
+        window.close()
+        window.deleteLater()
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    assert app is not None
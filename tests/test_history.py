@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+from core.history import CalculationHistory, HistoryRecord
+
+BOYLE_INPUTS = {'presion_inicial': 1, 'volumen_inicial': 2, 'presion_final': 0.5}
+BOYLE_UNITS = {'presion_inicial': 'bar', 'volumen_inicial': 'liter', 'presion_final': 'bar'}
+
+@pytest.fixture
+def history(tmp_path):
+    history = CalculationHistory(tmp_path / 'historial.sqlite')
+    yield history
+    history.close()
+
+def _record(result, uncertainty=None):
+    return HistoryRecord(1, 0.0, "Ley de Boyle", None, BOYLE_INPUTS, BOYLE_UNITS, 'liter', result,
+                         uncertainty=uncertainty)
+
+def test_module_example_replays_unchanged(history):
+    history.record("Ley de Boyle", BOYLE_INPUTS, BOYLE_UNITS, 4.0, 'liter')
+
+    report = history.replay()
+
+    assert report.checked == 1
+    assert report.mismatches == []
+
+def test_changed_result_is_reported(history):
+    history.record("Ley de Boyle", BOYLE_INPUTS, BOYLE_UNITS, 4.5, 'liter')
+    history.record("Ley de Boyle", dict(BOYLE_INPUTS, presion_final=1), BOYLE_UNITS, 2.0, 'liter')
+
+    report = history.replay()
+
+    assert report.checked == 2
+    assert [mismatch.record.result for mismatch in report.mismatches] == [4.5]
+    assert report.mismatches[0].result == pytest.approx(4.0)
+
+def test_fixed_tolerance_ignores_uncertainty():
+    assert _record(4.0, uncertainty=0.5).matches(4.0, None)
+    assert _record(4.0, uncertainty=0.5).matches(4.0 * (1 + 1e-12), None)
+    assert not _record(4.0, uncertainty=0.5).matches(4.1, None)
+    assert _record(4.0).matches(4.1, None, rtol=0.05)
+
+def test_errors_match_only_errors():
+    assert _record(None).matches(None, None)
+    assert not _record(4.0).matches(None, "ValueError: x")
+    failed = HistoryRecord(1, 0.0, "Ley de Boyle", None, {}, {}, None, None, error="KeyError: x")
+    assert failed.matches(None, "KeyError: y")
+    assert not failed.matches(4.0, None)
+
+def test_query_filters_and_order(history):
+    history.record("Ley de Boyle", BOYLE_INPUTS, BOYLE_UNITS, 4.0, 'liter', timestamp=100.0)
+    history.record("Otra", {}, {}, 1.0, timestamp=200.0)
+    history.record("Ley de Boyle", BOYLE_INPUTS, BOYLE_UNITS, 4.0, 'liter', timestamp=300.0)
+
+    assert [record.time for record in history.query()] == [100.0, 200.0, 300.0]
+    assert [record.time for record in history.query("Ley de Boyle")] == [100.0, 300.0]
+    assert [record.time for record in history.query(since=150.0, until=300.0)] == [200.0]
+    assert [record.time for record in history.query(limit=1, newest_first=True)] == [300.0]
+    assert history.count("Ley de Boyle") == 2
+
+def test_record_many_keeps_every_row(history):
+    records = [{'formula': "Ley de Boyle", 'inputs': BOYLE_INPUTS, 'units': BOYLE_UNITS, 'result': 4.0,
+                'target_unit': 'liter'} for _ in range(25)]
+
+    assert history.record_many(records) == 25
+    assert history.count() == 25
+
+def test_history_is_append_only(history):
+    history.record("Ley de Boyle", BOYLE_INPUTS, BOYLE_UNITS, 4.0, 'liter')
+
+    with pytest.raises(sqlite3.DatabaseError):
+        with history._connection:
+            history._connection.execute("DELETE FROM calculations")
+    assert history.count() == 1
+
+def test_view_records_a_new_target_unit(catalog, history, monkeypatch):
+    pytest.importorskip('PySide6')
+    monkeypatch.setenv('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+
+    import core.history
+    from gui.widgets.formula_view import FormulaView
+
+    app = QApplication.instance() or QApplication([])
+    monkeypatch.setattr(core.history, 'calculation_history', lambda: history)
+    entry = next(entry for entry in catalog if entry.class_name == 'LeyDeBoyle')
+    view = FormulaView(entry.create(), entry.consistency)
+    record = {'formula': entry.name, 'inputs': BOYLE_INPUTS, 'units': BOYLE_UNITS, 'target_unit': 'liter',
+              'result': 4.0}
+    try:
+        view.record_history(record)
+        view.record_history(dict(record))
+        view.record_history(dict(record, target_unit='milliliter', result=4000.0))
+    finally:
+        view.deleteLater()
+
+    assert [saved.target_unit for saved in history.query()] == ['liter', 'milliliter']
+    assert app is not None
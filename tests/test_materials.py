@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from core.materials import DEFAULT_TEMPERATURE, MaterialDatabase
+
+@pytest.fixture
+def database():
+    return MaterialDatabase()
+
+def test_names_and_aliases_resolve(database):
+    assert database.names[database.material_id('Acero al carbono')] == "Acero al carbono"
+    assert database.names[database.material_id('laton')] == "Latón"
+    assert database.names[database.material_id('inox')] == "Acero inoxidable"
+    assert database.names[database.material_id('Cu')] == "Cobre"
+    assert database.names[database.material_id('agua')] == "Agua"
+
+def test_ambiguous_word_lists_candidates(database):
+    with pytest.raises(KeyError, match="Acero al carbono, Acero inoxidable"):
+        database.material_id('acero')
+    with pytest.raises(KeyError, match="Vidrio borosilicato, Vidrio común"):
+        database.material_id('vidrio')
+
+def test_word_alone_does_not_resolve(database):
+    with pytest.raises(KeyError):
+        database.material_id('de')
+    with pytest.raises(KeyError):
+        database.material_id('no existe')
+
+def test_words_still_found_by_prefix(database):
+    assert database.lookup('acero') == ["Acero al carbono", "Acero inoxidable"]
+    assert "Vapor de agua" in database.lookup('agua')
+    assert database.lookup('acero', property_name='temperatura_ebullicion') == []
+
+def test_index_is_reused_from_cache(database):
+    reopened = MaterialDatabase()
+    assert reopened.names == database.names
+    assert reopened.value('Cobre', 'calor_especifico') == database.value('Cobre', 'calor_especifico')
+
+def test_values_interpolate_and_clamp(database):
+    low, high = database.temperature_range('Agua', 'calor_especifico')
+    values = database.values('Agua', 'calor_especifico', [low - 50, low, high, high + 50])
+    assert values[0] == values[1]
+    assert values[2] == values[3]
+    assert database.value('Agua', 'calor_especifico', 20, 'degree_Celsius') == \
+        pytest.approx(database.value('Agua', 'calor_especifico', DEFAULT_TEMPERATURE))
+
+def test_values_by_name_array(database):
+    values = database.values(np.array(['Cobre', 'Plomo', 'Cobre']), 'densidad')
+    assert values[0] == values[2] != values[1]
+
+def test_unit_conversion(database):
+    assert database.value('Agua', 'densidad', unit='gram / centimeter ** 3') == \
+        pytest.approx(database.value('Agua', 'densidad') / 1000)
+    assert database.value('Agua', 'temperatura_fusion', unit='degree_Celsius') == pytest.approx(0.0)
+
+def test_incompatible_units_rejected(database):
+    with pytest.raises(ValueError):
+        database.value('Agua', 'densidad', unit='kelvin')
+    with pytest.raises(ValueError):
+        database.value('Agua', 'densidad', 20, temperature_unit='meter')
+
+def test_missing_property(database):
+    with pytest.raises(KeyError):
+        database.value('Aire', 'temperatura_fusion')
@@ -0,0 +1,51 @@
+import pytest
+from pint.errors import DimensionalityError, OffsetUnitCalculusError
+
+from core.result_cache import result_cache
+from core.unit_handler import Q_
+
+def _calor_especifico(formulas, masa):
+    return formulas['CalorEspecifico'].solve({
+        'masa': masa,
+        'calor_especifico': Q_(1, 'joule / (gram * kelvin)'),
+        'delta_temperatura': Q_(1, 'kelvin'),
+    })
+
+def test_equivalent_units_share_an_entry(formulas):
+    first = _calor_especifico(formulas, Q_(1.0, 'kilogram'))
+    second = _calor_especifico(formulas, Q_(1000.0, 'gram'))
+
+    assert second == first
+    assert result_cache.stats()['hits'] == 1
+
+def test_wrong_dimension_is_not_a_hit(formulas):
+    _calor_especifico(formulas, Q_(1, 'kilogram'))
+
+    with pytest.raises(DimensionalityError):
+        _calor_especifico(formulas, Q_(1, 'meter'))
+
+def test_int_and_float_inputs_do_not_share_an_entry(formulas):
+    result_cache.enabled = False
+    try:
+        expected = type(_calor_especifico(formulas, Q_(1, 'gram')).magnitude)
+    finally:
+        result_cache.enabled = True
+
+    _calor_especifico(formulas, Q_(1.0, 'gram'))
+    assert type(_calor_especifico(formulas, Q_(1, 'gram')).magnitude) is expected
+    assert type(_calor_especifico(formulas, Q_(1.0, 'gram')).magnitude) is float
+
+def test_offset_units_are_not_cached(formulas):
+    charles = formulas['LeyDeCharles']
+    inputs = {'volumen_1': Q_(2.0, 'liter'), 'temperatura_1': Q_(303.15, 'kelvin'),
+              'temperatura_2': Q_(310.0, 'kelvin')}
+    charles.solve(inputs)
+
+    with pytest.raises(OffsetUnitCalculusError):
+        charles.solve(dict(inputs, temperatura_1=Q_(30.0, 'degree_Celsius')))
+
+def test_hit_returns_a_copy(formulas):
+    first = _calor_especifico(formulas, Q_(2.0, 'kilogram'))
+    first.ito('kilojoule')
+
+    assert _calor_especifico(formulas, Q_(2.0, 'kilogram')).units == Q_(1, 'joule').units
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+from core.result_store import CATEGORY, ResultStore, infer_dtype, open_store
+
+def test_round_trip(tmp_path):
+    with ResultStore.create(tmp_path / 'store', {'source': 'prueba'}) as store:
+        store.add_column('volumen', unit='liter')
+        store.append({'volumen': [1.0, 2.0], 'formula': ['a', 'b']})
+        store.append({'volumen': np.array([3.0]), 'formula': 'a', 'n': np.array([7])})
+
+    results = open_store(tmp_path / 'store')
+    assert len(results) == 3
+    assert results.attributes == {'source': 'prueba'}
+    assert results['volumen'].tolist() == [1.0, 2.0, 3.0]
+    assert str(results.quantity('volumen').units) == 'liter'
+    assert results.decode('formula') == ['a', 'b', 'a']
+    assert results.categories('formula') == ['a', 'b']
+    assert results['n'].tolist() == [0, 0, 7]
+
+def test_failed_append_leaves_columns_aligned(tmp_path):
+    with ResultStore.create(tmp_path / 'store') as store:
+        store.add_column('x', 'float64')
+        store.add_column('y', 'float64')
+        store.add_column('label', CATEGORY)
+        store.append({'x': [1, 2], 'y': [1, 2], 'label': ['a', 'b']})
+        with pytest.raises(ValueError):
+            store.append({'x': [3, 4], 'label': ['c', 'd'], 'y': ['a', 'b']})
+        store.append({'x': [5, 6], 'y': [5, 6], 'label': ['e', 'f']})
+
+    results = open_store(tmp_path / 'store')
+    assert results['x'].tolist() == [1, 2, 5, 6]
+    assert results['y'].tolist() == [1, 2, 5, 6]
+    assert results.decode('label') == ['a', 'b', 'e', 'f']
+
+def test_categories_stay_out_of_meta(tmp_path):
+    with ResultStore.create(tmp_path / 'store') as store:
+        store.add_column('error', CATEGORY)
+        for chunk in range(50):
+            store.append({'error': [f"Error en la fila {chunk}-{row}" for row in range(20)]})
+        meta_size = (tmp_path / 'store' / 'meta.json').stat().st_size
+
+    assert meta_size < 1024
+    results = open_store(tmp_path / 'store')
+    assert len(results.categories('error')) == 1000
+    assert results.decode('error', slice(-1, None)) == ["Error en la fila 49-19"]
+
+def test_categories_with_line_separators(tmp_path):
+    values = ["a\nb", "c d", "é"]
+    with ResultStore.create(tmp_path / 'store') as store:
+        store.append({'text': values})
+
+    assert open_store(tmp_path / 'store').decode('text') == values
+
+def test_append_to_discards_uncommitted_bytes(tmp_path):
+    store = ResultStore.create(tmp_path / 'store')
+    store.add_column('label', CATEGORY)
+    store.append({'x': [1.0], 'label': ['a']})
+    store.close()
+    # Restos de un bloque interrumpido
+    with open(tmp_path / 'store' / 'c0.bin', 'ab') as file:
+        file.write(b'\0' * 4)
+    with open(tmp_path / 'store' / 'c0.categories', 'ab') as file:
+        file.write(json.dumps('perdida').encode() + b'\n')
+
+    with ResultStore.append_to(tmp_path / 'store') as store:
+        store.append({'x': [2.0], 'label': ['b']})
+
+    results = open_store(tmp_path / 'store')
+    assert results.decode('label') == ['a', 'b']
+    assert results['x'].tolist() == [1.0, 2.0]
+
+def test_infer_dtype():
+    assert infer_dtype(np.array([1, 2])) == 'int64'
+    assert infer_dtype([None, 2.5]) == 'float64'
+    assert infer_dtype([None, 'a']) == CATEGORY
+    assert infer_dtype([True]) == 'bool'
+    with pytest.raises(ValueError):
+        infer_dtype([None, None])
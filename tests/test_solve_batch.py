@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from pint.errors import OffsetUnitCalculusError
+
+from core.unit_handler import Q_
+
+# solve_batch() evalua con el kernel compilado sin pasar por pint: debe dar lo mismo que un bucle
+# sobre solve(), tanto en las unidades por defecto como con entradas en otras unidades
+
+ROWS = 16
+
+# Unidades multiplicativas alternativas para las unidades por defecto del catalogo
+CONVERTED_UNITS = {
+    'gram': 'kilogram',
+    'meter': 'millimeter',
+    'kelvin': 'degree_Rankine',
+    'joule': 'kilocalorie',
+    'pascal': 'atmosphere',
+    'liter': 'centimeter ** 3',
+    'mol': 'millimole',
+    'joule / (gram * kelvin)': 'joule / (kilogram * kelvin)',
+    '1 / kelvin': '1 / delta_degree_Fahrenheit',
+}
+
+def _columns(formula, seed):
+    generator = np.random.default_rng(seed)
+    return {var[0]: generator.uniform(1.0, 5.0, ROWS) for var in formula.variables}
+
+def _solve_loop(formula, columns, units, target_unit=None):
+    results = []
+    for row in range(ROWS):
+        inputs = {name: Q_(float(values[row]), units[name]) for name, values in columns.items()}
+        result = formula.solve(inputs)
+        results.append(result.to(target_unit).magnitude if target_unit else result.magnitude)
+    return np.array(results)
+
+def test_default_units(formulas):
+    for name, formula in formulas.items():
+        columns = _columns(formula, 1)
+        units = {var[0]: var[2] for var in formula.variables}
+
+        batch = formula.solve_batch(columns)
+
+        assert batch.units == Q_(1.0, formula.target_variable[2]).units, name
+        assert np.allclose(batch.magnitude, _solve_loop(formula, columns, units)), name
+
+def test_converted_units(formulas):
+    for name, formula in formulas.items():
+        columns = _columns(formula, 2)
+        units = {var[0]: CONVERTED_UNITS.get(var[2], var[2]) for var in formula.variables}
+
+        batch = formula.solve_batch(columns, units=units)
+
+        assert np.allclose(batch.magnitude, _solve_loop(formula, columns, units)), name
+
+def test_quantity_columns_and_target_unit(formulas):
+    for name, formula in formulas.items():
+        columns = _columns(formula, 3)
+        units = {var[0]: CONVERTED_UNITS.get(var[2], var[2]) for var in formula.variables}
+        target_unit = CONVERTED_UNITS.get(formula.target_variable[2], formula.target_variable[2])
+
+        batch = formula.solve_batch({var: Q_(values, units[var]) for var, values in columns.items()},
+                                    target_unit=target_unit)
+
+        assert np.allclose(batch.magnitude, _solve_loop(formula, columns, units, target_unit)), name
+
+def test_offset_units_rejected_like_solve(formulas):
+    checked = 0
+    for formula in formulas.values():
+        if not any(var[2] == 'kelvin' for var in formula.variables):
+            continue
+        columns = _columns(formula, 4)
+        units = {var[0]: 'degree_Celsius' if var[2] == 'kelvin' else var[2] for var in formula.variables}
+
+        with pytest.raises(OffsetUnitCalculusError):
+            _solve_loop(formula, columns, units)
+        with pytest.raises(OffsetUnitCalculusError):
+            formula.solve_batch(columns, units=units)
+        checked += 1
+    assert checked
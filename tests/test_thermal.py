@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from core.thermal import Body, ThermalSystem, equilibrium, simulate
+
+WATER_C = 4186.0
+ICE_C = 2090.0
+LATENT_FUSION = 334000.0
+
+def _water(mass, temperature):
+    return Body(mass, temperature, WATER_C, solid_specific_heat=ICE_C, melting_point=273.15,
+                latent_fusion=LATENT_FUSION)
+
+def test_two_bodies_without_phase_change():
+    first, second = Body(2.0, 350.0, 900.0), Body(1.0, 290.0, 4186.0)
+
+    result = equilibrium([first, second])
+
+    expected = (2.0 * 900.0 * 350.0 + 1.0 * 4186.0 * 290.0) / (2.0 * 900.0 + 1.0 * 4186.0)
+    assert result.temperature[0] == pytest.approx(expected, rel=1e-12)
+    assert result.heat.sum() == pytest.approx(0.0, abs=1e-6)
+
+def test_equilibrium_on_the_melting_plateau():
+    ice = Body(1.0, 273.15, WATER_C, solid_specific_heat=ICE_C, melting_point=273.15,
+               latent_fusion=LATENT_FUSION, phase='solido')
+    warm = _water(0.1, 293.15)
+
+    result = equilibrium([ice, warm])
+
+    assert result.temperature[0] == pytest.approx(273.15)
+    assert result.phase[0, 0] == 0
+    assert result.fraction[0, 0] == pytest.approx(0.1 * WATER_C * 20.0 / LATENT_FUSION)
+    assert result.heat.sum() == pytest.approx(0.0, abs=1e-6)
+
+def test_all_ice_melts():
+    result = equilibrium([_water(0.01, 263.15), _water(1.0, 353.15)])
+
+    heat_to_melt = 0.01 * (ICE_C * 10.0 + LATENT_FUSION)
+    expected = 273.15 + (1.0 * WATER_C * 80.0 - heat_to_melt) / (1.01 * WATER_C)
+    assert result.temperature[0] == pytest.approx(expected, rel=1e-9)
+    assert result.phase[0].tolist() == [1, 1]
+
+def test_many_systems_match_single_solves():
+    systems = [[_water(0.01 * (i + 1), 263.15), Body(1.0, 300.0 + i, 900.0)] for i in range(5)]
+
+    together = equilibrium(systems)
+
+    for i, bodies in enumerate(systems):
+        assert together.temperature[i] == pytest.approx(equilibrium(bodies).temperature[0], rel=1e-12)
+
+def test_simulation_conserves_energy_and_settles():
+    system = ThermalSystem.from_bodies([Body(1.0, 400.0, 900.0), Body(2.0, 300.0, 500.0), Body(0.5, 350.0, 4186.0)])
+    target = system.equilibrium().temperature[0]
+
+    snapshots = list(simulate(system, [(0, 1), (1, 2)], 50.0, duration=2000.0, dt=1.0, every=100,
+                              tolerance=1e-9))
+
+    last = snapshots[-1]
+    assert snapshots[0].step == 0
+    assert np.abs(last.heat.sum()) < 1e-6 * np.abs(last.heat).max()
+    assert np.allclose(last.temperature, target, atol=1e-3)
+
+def test_ambient_loss_cools_towards_ambient():
+    system = ThermalSystem.from_bodies([Body(1.0, 400.0, 900.0)])
+
+    last = list(simulate(system, [], [], duration=5000.0, dt=5.0, every=1000, ambient_temperature=300.0,
+                         ambient_conductance=10.0))[-1]
+
+    assert last.temperature[0, 0] == pytest.approx(300.0, abs=1e-3)
+
+def test_invalid_bodies_and_links():
+    with pytest.raises(ValueError):
+        Body(0.0, 300.0, 900.0)
+    with pytest.raises(ValueError):
+        Body(1.0, 300.0, 900.0, phase='plasma')
+    system = ThermalSystem.from_bodies([Body(1.0, 300.0, 900.0), Body(1.0, 310.0, 900.0)])
+    with pytest.raises(ValueError):
+        next(simulate(system, [(0, 2)], 1.0, duration=1.0, dt=0.1))
+
+def test_body_from_material():
+    water = Body.from_material('Agua', 1.0, 293.15)
+
+    assert water.melting_point == pytest.approx(273.15)
+    assert water.boiling_point == pytest.approx(373.15, abs=0.5)
+    assert water.latent_fusion > 0
+    with pytest.raises(KeyError, match="Acero inoxidable"):
+        Body.from_material('acero', 1.0, 293.15)